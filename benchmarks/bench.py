@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+# -*- coding: utf-8
+
+from __future__ import print_function
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, os.pardir))
+sys.path.insert(0, os.path.join(here, os.pardir, "tests"))
+
+import pycurl
+from proxy import Fault, FaultProxy
+from server import WebDAV
+from webdav.client import Client, WebDavException
+from webdav.urn import Urn
+
+benchmarks = list()
+
+
+def benchmark(name):
+
+    def decorator(function):
+        benchmarks.append((name, function))
+        return function
+
+    return decorator
+
+
+def fill(directory, files, size):
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    for index in range(files):
+        with open(os.path.join(directory, "file{index}".format(index=index)), 'wb') as f:
+            f.write(os.urandom(size))
+
+
+def reset(path):
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+
+
+@benchmark('list')
+def bench_list(client, dav, workdir, args):
+    dav.tree("/list", depth=1, width=0, files=args.entries)
+    return (lambda: client.list("list")), None, 1, 0
+
+
+@benchmark('check')
+def bench_check(client, dav, workdir, args):
+    dav.create("/check/file", b"x")
+    return (lambda: client.check("check/file")), None, 1, 0
+
+
+@benchmark('info')
+def bench_info(client, dav, workdir, args):
+    dav.create("/info/file", b"x")
+    return (lambda: client.info("info/file")), None, 1, 0
+
+
+@benchmark('info_many')
+def bench_info_many(client, dav, workdir, args):
+    files = max(args.entries // 10, 1)
+    dav.tree("/many", depth=2, width=10, files=files)
+    paths = ["many/dir{0}/file{1}".format(directory, index) for directory in range(10) for index in range(files)]
+    return (lambda: client.info_many(paths)), None, len(paths), 0
+
+
+@benchmark('clean_many')
+def bench_clean_many(client, dav, workdir, args):
+    paths = ["clean/file{index}".format(index=index) for index in range(args.entries)]
+
+    def setup():
+        dav.tree("/clean", depth=1, width=0, files=args.entries)
+
+    return (lambda: client.clean_many(paths, jobs=args.jobs)), setup, len(paths), 0
+
+
+def urns(paths):
+
+    for path in paths:
+        urn = Urn(path)
+        urn.quote(), urn.path(), urn.parent(), urn.filename()
+
+
+@benchmark('urn')
+def bench_urn(client, dav, workdir, args):
+    paths = ["dir{0}/sub dir/file{1}".format(index % 100, index) for index in range(args.entries * 10)]
+    return (lambda: urns(paths)), Urn.cache.clear, len(paths), 0
+
+
+@benchmark('urn_memo')
+def bench_urn_memo(client, dav, workdir, args):
+    paths = ["dir{0}/sub dir/file{1}".format(index % 100, index) for index in range(args.entries * 10)]
+    urns(paths)
+    return (lambda: urns(paths)), None, len(paths), 0
+
+
+def bench_download_file(client, dav, workdir, size):
+    dav.create("/download/file{size}".format(size=size), os.urandom(size))
+    local_path = os.path.join(workdir, "download")
+    remote_path = "download/file{size}".format(size=size)
+    return (lambda: client.download_file(remote_path=remote_path, local_path=local_path)), None, 1, size
+
+
+def bench_upload_file(client, dav, workdir, size):
+    local_path = os.path.join(workdir, "upload{size}".format(size=size))
+    with open(local_path, 'wb') as f:
+        f.write(os.urandom(size))
+    dav.create("/upload/")
+    return (lambda: client.upload_file(remote_path="upload/file", local_path=local_path)), None, 1, size
+
+
+@benchmark('download_file_small')
+def bench_download_small(client, dav, workdir, args):
+    return bench_download_file(client, dav, workdir, args.small_size)
+
+
+@benchmark('download_file_large')
+def bench_download_large(client, dav, workdir, args):
+    return bench_download_file(client, dav, workdir, args.large_size)
+
+
+@benchmark('upload_file_small')
+def bench_upload_small(client, dav, workdir, args):
+    return bench_upload_file(client, dav, workdir, args.small_size)
+
+
+@benchmark('upload_file_large')
+def bench_upload_large(client, dav, workdir, args):
+    return bench_upload_file(client, dav, workdir, args.large_size)
+
+
+@benchmark('download_directory')
+def bench_download_directory(client, dav, workdir, args):
+    dav.tree("/tree", depth=args.depth, width=args.width, files=args.files, size=args.small_size)
+    local_path = os.path.join(workdir, "tree")
+    return (lambda: client.download_directory(remote_path="tree/", local_path=local_path, jobs=args.jobs)), None, 1, tree_size(args)
+
+
+@benchmark('push')
+def bench_push(client, dav, workdir, args):
+    local_path = os.path.join(workdir, "push")
+    for directory in walk_tree(local_path, args):
+        fill(directory, args.files, args.small_size)
+    remote = dav.local("/push")
+
+    def setup():
+        reset(remote)
+
+    return (lambda: client.push(remote_directory="push/", local_directory=local_path, jobs=args.jobs)), setup, 1, tree_size(args)
+
+
+@benchmark('pull')
+def bench_pull(client, dav, workdir, args):
+    dav.tree("/pull", depth=args.depth, width=args.width, files=args.files, size=args.small_size)
+    local_path = os.path.join(workdir, "pull")
+
+    def setup():
+        reset(local_path)
+
+    return (lambda: client.pull(remote_directory="pull/", local_directory=local_path, jobs=args.jobs)), setup, 1, tree_size(args)
+
+
+def walk_tree(root, args, depth=None):
+
+    depth = args.depth if depth is None else depth
+    yield root
+    if depth > 1:
+        for index in range(args.width):
+            for item in walk_tree(os.path.join(root, "dir{index}".format(index=index)), args, depth - 1):
+                yield item
+
+
+def tree_size(args):
+    directories = sum(args.width ** level for level in range(args.depth))
+    return directories * args.files * args.small_size
+
+
+def run(function, client, dav, workdir, args):
+
+    operation, setup, ops, size = function(client, dav, workdir, args)
+    timings, requests, errors, connections = list(), 0, 0, dict()
+
+    for _ in range(args.repeat):
+        if setup:
+            setup()
+        dav.reset()
+        before = client.stats.snapshot()
+        started = time.time()
+        try:
+            operation()
+        except (WebDavException, EnvironmentError):
+            errors += 1
+        timings.append(time.time() - started)
+        requests = len(dav.requests)
+        after = client.stats.snapshot()
+        connections = {key: after[key] - before[key] for key in ('connects', 'handshakes', 'reused', 'saved')}
+
+    timings.sort()
+    median = timings[len(timings) // 2]
+    result = {
+        'seconds': median,
+        'best': timings[0],
+        'ops_per_sec': ops / median if median else None,
+        'requests': requests,
+        'connections': connections,
+        'errors': errors,
+    }
+    if size:
+        result['mb_per_sec'] = size / median / 1000000 if median else None
+    return result
+
+
+def commit():
+
+    try:
+        output = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=here, stderr=subprocess.STDOUT)
+        return output.decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+
+    regressions = list()
+    for (name, result) in sorted(results['results'].items()):
+        old = baseline['results'].get(name)
+        if not old:
+            continue
+        ratio = result['seconds'] / old['seconds'] if old['seconds'] else 1
+        marker = ""
+        if ratio > 1 + threshold:
+            marker = " <- regression"
+            regressions.append(name)
+        print("{name:<22} {old:>10.4f}s {new:>10.4f}s {ratio:>7.2f}x{marker}".format(
+            name=name, old=old['seconds'], new=result['seconds'], ratio=ratio, marker=marker), file=sys.stderr)
+    return regressions
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="webdavclient benchmarks against a local WebDAV server")
+    parser.add_argument("--latency", type=float, default=0, help="server latency per request, ms")
+    parser.add_argument("--bandwidth", type=float, default=0, help="server bandwidth per connection, MB/s")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--entries", type=int, default=1000, help="entries in the listed directory")
+    parser.add_argument("--small-size", type=int, default=4 * 1024)
+    parser.add_argument("--large-size", type=int, default=32 * 1024 * 1024)
+    parser.add_argument("--depth", type=int, default=3, help="depth of directory trees")
+    parser.add_argument("--width", type=int, default=3, help="subdirectories per directory")
+    parser.add_argument("--files", type=int, default=10, help="files per directory")
+    parser.add_argument("--jobs", type=int, help="concurrent transfers for the directory benchmarks")
+    parser.add_argument("--fault", action="append", default=[], metavar="METHOD:KEY=VALUE,...",
+                        help="route requests through a fault-injecting proxy, e.g. GET:rtt=20,bandwidth=5,error=0.01;\n"
+                             "keys: rtt (ms), bandwidth (MB/s), slow (ms per chunk), error (503), throttle (429),\n"
+                             "reset, truncate or a status code, all as probabilities; * matches every method")
+    parser.add_argument("--seed", type=int, default=0, help="seed for fault injection")
+    parser.add_argument("--only", nargs="*", help="benchmarks to run: " + " ".join(name for (name, _) in benchmarks))
+    parser.add_argument("-o", "--output", help="write JSON results to a file instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown before failing --compare")
+    args = parser.parse_args()
+
+    config = {key: value for (key, value) in vars(args).items() if key not in ('output', 'compare', 'only')}
+    results = {
+        'commit': commit(),
+        'python': platform.python_version(),
+        'pycurl': pycurl.version,
+        'config': config,
+        'results': dict(),
+    }
+
+    bandwidth = args.bandwidth * 1000000 if args.bandwidth else None
+    faults = dict(Fault.parse(spec) for spec in args.fault)
+    for (name, function) in benchmarks:
+        if args.only and name not in args.only:
+            continue
+        workdir = tempfile.mkdtemp(prefix="webdav-bench-")
+        try:
+            with WebDAV(latency=args.latency / 1000.0, bandwidth=bandwidth) as dav:
+                if not faults:
+                    client = Client(dav.options())
+                    results['results'][name] = run(function, client, dav, workdir, args)
+                    continue
+                with FaultProxy(dav.url, faults=faults, seed=args.seed) as proxy:
+                    client = Client(dav.options(webdav_hostname=proxy.url))
+                    result = results['results'][name] = run(function, client, dav, workdir, args)
+                    result['injected'] = {"{0} {1}".format(*key): count for (key, count) in proxy.injected.items()}
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
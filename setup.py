@@ -48,7 +48,7 @@ setup(
     requires = ['python (>= 2.7.6)'],
     install_requires=['pycurl', 'lxml', 'argcomplete'],
     scripts = ['wdc'],
-    tests_require=['pytest', 'pyhamcrest', 'junit-xml', 'pytest-allure-adaptor'],
+    tests_require=['pytest', 'pyhamcrest', 'junit-xml', 'pytest-allure-adaptor', 'numpy'],
     cmdclass = {'install': Install, 'test': Test},
     description  = 'Webdav API, resource API и wdc для WebDAV-серверов (Yandex.Disk, Dropbox, Google Disk, Box, 4shared и т.д.)',
     long_description = open('README.rst').read(),
@@ -1,7 +1,10 @@
 __author__ = 'designerror'
 
+import pytest
 from hamcrest.core.base_matcher import BaseMatcher
 from hamcrest.core.helpers.hasmethod import hasmethod
+from server import WebDAV
+from webdav.client import Client
 
 class Valid(BaseMatcher):
     def _matches(self, item):
@@ -29,4 +32,13 @@ def success():
     return Success()
 
 def not_success():
-    return NotSuccess()
\ No newline at end of file
+    return NotSuccess()
+
+@pytest.fixture
+def dav():
+    with WebDAV() as server:
+        yield server
+
+@pytest.fixture
+def client(dav):
+    return Client(dav.options())
@@ -0,0 +1,216 @@
+import random
+import socket
+import struct
+import threading
+import time
+from collections import Counter
+
+from server import ThreadingServer
+
+try:
+    from http.client import HTTPConnection
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import urlparse
+except ImportError:
+    from httplib import HTTPConnection
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from urlparse import urlparse
+
+hop_by_hop = {'connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'te', 'trailer',
+              'upgrade', 'expect', 'content-length', 'host'}
+
+
+class Fault(object):
+
+    def __init__(self, rtt=0, bandwidth=None, errors=None, reset=0, truncate=0, slow_body=0):
+        self.rtt = rtt
+        self.bandwidth = bandwidth
+        self.errors = errors or {}
+        self.reset = reset
+        self.truncate = truncate
+        self.slow_body = slow_body
+
+    @classmethod
+    def parse(cls, spec):
+
+        method, _, values = spec.partition(":")
+        fault = cls()
+        for item in filter(None, values.split(",")):
+            key, _, value = item.partition("=")
+            value = float(value)
+            if key == 'rtt':
+                fault.rtt = value / 1000.0
+            elif key == 'bandwidth':
+                fault.bandwidth = value * 1000000
+            elif key == 'slow':
+                fault.slow_body = value / 1000.0
+            elif key in ('reset', 'truncate'):
+                setattr(fault, key, value)
+            elif key == 'error':
+                fault.errors[503] = value
+            elif key == 'throttle':
+                fault.errors[429] = value
+            elif key.isdigit():
+                fault.errors[int(key)] = value
+            else:
+                raise ValueError("Unknown fault: {key}".format(key=key))
+        return method.upper() or "*", fault
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    chunk = 16 * 1024
+
+    def log_message(self, format, *args):
+        pass
+
+    def __getattr__(self, name):
+
+        if name.startswith("do_"):
+            return self.forward
+        raise AttributeError(name)
+
+    def handle_one_request(self):
+
+        try:
+            BaseHTTPRequestHandler.handle_one_request(self)
+        except (socket.error, ValueError):
+            self.close_connection = True
+
+    def read_body(self):
+
+        if self.headers.get('Transfer-Encoding', "").lower() == "chunked":
+            chunks = list()
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                if not size:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b"".join(chunks)
+
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b""
+
+    def upstream(self):
+
+        connection = getattr(self, 'connection_upstream', None)
+        if connection is None:
+            url = urlparse(self.server.proxy.upstream)
+            connection = self.connection_upstream = HTTPConnection(url.hostname, url.port)
+        return connection
+
+    def abort(self):
+
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        self.close_connection = True
+        self.wfile.flush()
+        self.connection.close()
+
+    def forward(self):
+
+        proxy = self.server.proxy
+        fault = proxy.fault(self.command)
+        body = self.read_body()
+
+        if fault.rtt:
+            time.sleep(fault.rtt)
+
+        injected = proxy.draw(self.command, fault)
+        if injected == 'reset':
+            return self.abort()
+        if isinstance(injected, int):
+            self.send_response(injected)
+            self.send_header('Retry-After', "0")
+            self.send_header('Content-Length', "0")
+            self.end_headers()
+            return
+
+        headers = {key: value for (key, value) in self.headers.items() if key.lower() not in hop_by_hop}
+        try:
+            self.upstream().request(self.command, self.path, body=body, headers=headers)
+            response = self.upstream().getresponse()
+            data = response.read()
+        except (socket.error, IOError):
+            self.connection_upstream = None
+            return self.abort()
+
+        self.send_response(response.status, response.reason)
+        for (key, value) in response.getheaders():
+            if key.lower() not in hop_by_hop:
+                self.send_header(key, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+
+        if self.command == "HEAD":
+            return
+
+        limit = len(data) // 2 if injected == 'truncate' else len(data)
+        for offset in range(0, limit, self.chunk):
+            started = time.time()
+            part = data[offset:min(offset + self.chunk, limit)]
+            self.wfile.write(part)
+            delay = fault.slow_body
+            if fault.bandwidth:
+                delay += float(len(part)) / fault.bandwidth - (time.time() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+        if injected == 'truncate':
+            self.abort()
+
+
+class FaultProxy(object):
+
+    def __init__(self, upstream, faults=None, seed=None):
+        self.upstream = upstream
+        self.faults = dict(faults or {})
+        self.random = random.Random(seed)
+        self.injected = Counter()
+        self.lock = threading.Lock()
+        self.server = None
+
+    def fault(self, method):
+        return self.faults.get(method, self.faults.get("*", Fault()))
+
+    def draw(self, method, fault):
+
+        with self.lock:
+            value = self.random.random()
+            outcomes = [('reset', fault.reset), ('truncate', fault.truncate)] + sorted(fault.errors.items())
+            for (outcome, probability) in outcomes:
+                if value < probability:
+                    self.injected[(method, outcome)] += 1
+                    return outcome
+                value -= probability
+        return None
+
+    def start(self):
+
+        self.server = ThreadingServer(("127.0.0.1", 0), ProxyHandler)
+        self.server.proxy = self
+        thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.01})
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return "http://{host}:{port}".format(host=host, port=port)
@@ -0,0 +1,660 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from email.utils import formatdate, mktime_tz, parsedate_tz
+from fnmatch import fnmatchcase
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import quote, unquote, urlparse
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import quote, unquote
+    from urlparse import urlparse
+
+DAV = "DAV:"
+CS = "http://calendarserver.org/ns/"
+ET.register_namespace('D', DAV)
+
+Request = namedtuple('Request', 'method path headers')
+
+live_properties = ['resourcetype', 'displayname', 'getcontentlength', 'getlastmodified',
+                   'creationdate', 'getetag', 'getcontenttype']
+
+
+def dav(name):
+    return "{{{ns}}}{name}".format(ns=DAV, name=name)
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def dav(self):
+        return self.server.dav
+
+    def handle_one_request(self):
+
+        try:
+            BaseHTTPRequestHandler.handle_one_request(self)
+        except (socket.error, ValueError):
+            self.close_connection = True
+
+    def dispatch(self):
+
+        url = urlparse(self.path)
+        path = unquote(url.path) or "/"
+        self.dav.record(Request(self.command, path, dict(self.headers.items())))
+
+        if self.dav.latency:
+            time.sleep(self.dav.latency)
+
+        failure = self.dav.fail.get((self.command, "/" + path.strip("/"))) or self.dav.fail.get("/" + path.strip("/"))
+        if failure:
+            self.read_body()
+            return self.respond(failure)
+
+        return getattr(self, "method_{method}".format(method=self.command))(path)
+
+    def __getattr__(self, name):
+
+        if name.startswith("do_") and name[3:] in WebDAV.methods:
+            return self.dispatch
+        raise AttributeError(name)
+
+    def read_body(self):
+
+        if self.headers.get('Transfer-Encoding', "").lower() == "chunked":
+            chunks = list()
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                if not size:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.dav.throttled_read(self.rfile, size))
+                self.rfile.readline()
+            return b"".join(chunks)
+
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.dav.throttled_read(self.rfile, length) if length else b""
+
+    def respond(self, code, body=b"", headers=None, content_type=None):
+
+        self.send_response(code)
+        for (key, value) in (headers or {}).items():
+            self.send_header(key, value)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        if body and self.command != "HEAD":
+            self.dav.throttled_write(self.wfile, body)
+
+    def respond_xml(self, code, root, headers=None):
+
+        body = ET.tostring(root, encoding="utf-8")
+        self.respond(code, body, headers=headers, content_type='application/xml; charset="utf-8"')
+
+    def respond_locked(self, multistatus, locked):
+
+        for item in locked:
+            response = ET.SubElement(multistatus, dav('response'))
+            ET.SubElement(response, dav('href')).text = self.dav.href(item, os.path.isdir(self.dav.local(item)))
+            ET.SubElement(response, dav('status')).text = "HTTP/1.1 423 Locked"
+        self.respond_xml(207, multistatus)
+
+    def method_OPTIONS(self, path):
+
+        headers = {'DAV': "1, 2", 'Allow': ", ".join(sorted(WebDAV.methods)), 'MS-Author-Via': "DAV"}
+        if self.dav.search:
+            headers['DASL'] = "<DAV:basicsearch>"
+        self.read_body()
+        self.respond(200, headers=headers)
+
+    def method_HEAD(self, path):
+        self.method_GET(path)
+
+    def method_GET(self, path):
+
+        local = self.dav.local(path)
+        self.read_body()
+
+        if not os.path.exists(local):
+            return self.respond(404)
+
+        if os.path.isdir(local):
+            return self.respond(200, content_type="text/html")
+
+        with open(local, 'rb') as f:
+            data = f.read()
+
+        headers = {'ETag': self.dav.etag(local), 'Accept-Ranges': "bytes",
+                   'Last-Modified': formatdate(os.path.getmtime(local), usegmt=True)}
+        ranges = self.headers.get('Range')
+        if ranges and ranges.startswith("bytes=") and self.dav.ranges:
+            first, last = ranges[len("bytes="):].split(",")[0].split("-")
+            if not first:
+                first, last = max(len(data) - int(last), 0), len(data) - 1
+            else:
+                first, last = int(first), min(int(last), len(data) - 1) if last else len(data) - 1
+            if first >= len(data):
+                return self.respond(416, headers={'Content-Range': "bytes */{size}".format(size=len(data))})
+            headers['Content-Range'] = "bytes {first}-{last}/{size}".format(first=first, last=last, size=len(data))
+            return self.respond(206, data[first:last + 1], headers=headers, content_type="application/octet-stream")
+
+        self.respond(200, data, headers=headers, content_type="application/octet-stream")
+
+    def method_PUT(self, path):
+
+        local = self.dav.local(path)
+        data = self.read_body()
+
+        if not os.path.isdir(os.path.dirname(local)):
+            return self.respond(409)
+        if os.path.isdir(local):
+            return self.respond(405)
+
+        existed = os.path.exists(local)
+        with open(local, 'wb') as f:
+            f.write(data)
+        self.dav.changed(path)
+
+        self.respond(204 if existed else 201, headers={'ETag': self.dav.etag(local)})
+
+    def method_MKCOL(self, path):
+
+        local = self.dav.local(path)
+        self.read_body()
+
+        if os.path.exists(local):
+            return self.respond(405)
+        if not os.path.isdir(os.path.dirname(local.rstrip(os.sep))):
+            return self.respond(409)
+
+        os.mkdir(local)
+        self.dav.changed(path)
+        self.respond(201)
+
+    def method_DELETE(self, path):
+
+        local = self.dav.local(path)
+        self.read_body()
+
+        if not os.path.exists(local) or local.rstrip(os.sep) == self.dav.root:
+            return self.respond(404)
+
+        locked = self.dav.locked_below(path)
+        if "/" + path.strip("/") in locked:
+            return self.respond(423)
+
+        if locked:
+            multistatus = ET.Element(dav('multistatus'))
+            for (child, resource) in reversed(list(self.dav.walk(path, "infinity"))):
+                if any(item == child or item.startswith(child + "/") for item in locked):
+                    continue
+                if os.path.isdir(resource):
+                    os.rmdir(resource)
+                else:
+                    os.remove(resource)
+                self.dav.forget(child)
+            self.dav.changed(path)
+            return self.respond_locked(multistatus, locked)
+
+        if os.path.isdir(local):
+            shutil.rmtree(local)
+        else:
+            os.remove(local)
+        self.dav.forget(path)
+        self.dav.changed(path)
+        self.respond(204)
+
+    def method_COPY(self, path):
+        self.transfer(path, move=False)
+
+    def method_MOVE(self, path):
+        self.transfer(path, move=True)
+
+    def transfer(self, path, move):
+
+        local = self.dav.local(path)
+        self.read_body()
+
+        destination = unquote(urlparse(self.headers.get('Destination', "")).path)
+        target = self.dav.local(destination)
+        overwrite = self.headers.get('Overwrite', "T").upper() != "F"
+        depth = self.headers.get('Depth', "infinity").lower()
+
+        if not os.path.exists(local):
+            return self.respond(404)
+        if local.rstrip(os.sep) == target.rstrip(os.sep):
+            return self.respond(403)
+        if not os.path.isdir(os.path.dirname(target.rstrip(os.sep))):
+            return self.respond(409)
+
+        existed = os.path.exists(target)
+        if existed and not overwrite:
+            return self.respond(412)
+        if move and self.dav.locked_below(path):
+            return self.respond_locked(ET.Element(dav('multistatus')), self.dav.locked_below(path))
+        if existed:
+            shutil.rmtree(target) if os.path.isdir(target) else os.remove(target)
+
+        self.dav.carry(path, destination, move, depth)
+        if move:
+            shutil.move(local.rstrip(os.sep), target.rstrip(os.sep))
+            self.dav.changed(path)
+        elif os.path.isdir(local):
+            if depth == "0":
+                os.mkdir(target)
+            else:
+                shutil.copytree(local, target)
+        else:
+            shutil.copy2(local, target)
+        self.dav.changed(destination)
+
+        self.respond(204 if existed else 201)
+
+    def method_PROPFIND(self, path):
+
+        local = self.dav.local(path)
+        body = self.read_body()
+
+        if not os.path.exists(local):
+            return self.respond(404)
+
+        names = None
+        if body.strip():
+            request = ET.fromstring(body)
+            prop = request.find(dav('prop'))
+            if prop is not None:
+                names = [node.tag for node in prop]
+
+        depth = self.headers.get('Depth', "infinity").lower()
+        if depth == "infinity" and not self.dav.infinity:
+            error = ET.Element(dav('error'))
+            ET.SubElement(error, dav('propfind-finite-depth'))
+            return self.respond_xml(403, error)
+
+        multistatus = ET.Element(dav('multistatus'))
+        for (remote, resource) in self.dav.walk(path, depth):
+            self.dav.propstat(multistatus, remote, resource, names)
+
+        self.respond_xml(207, multistatus)
+
+    def method_SEARCH(self, path):
+
+        body = self.read_body()
+        if not self.dav.search:
+            return self.respond(501)
+
+        search = ET.fromstring(body).find(dav('basicsearch'))
+        names = [node.tag for node in search.find("{select}/{prop}".format(select=dav('select'), prop=dav('prop')))]
+        scope = search.find("{source}/{scope}".format(source=dav('from'), scope=dav('scope')))
+        root = unquote(urlparse(scope.findtext(dav('href'))).path)
+        depth = (scope.findtext(dav('depth')) or "infinity").lower()
+        where = search.find(dav('where'))
+        condition = where[0] if where is not None and len(where) else None
+
+        if not os.path.exists(self.dav.local(root)):
+            return self.respond(404)
+
+        multistatus = ET.Element(dav('multistatus'))
+        for (remote, resource) in self.dav.walk(root, depth):
+            if condition is None or self.dav.matches(condition, remote, resource):
+                self.dav.propstat(multistatus, remote, resource, names)
+
+        self.respond_xml(207, multistatus)
+
+    def method_PROPPATCH(self, path):
+
+        local = self.dav.local(path)
+        body = self.read_body()
+
+        if not os.path.exists(local):
+            return self.respond(404)
+
+        names = list()
+        request = ET.fromstring(body)
+        for action in request:
+            for prop in action.iter(dav('prop')):
+                for node in prop:
+                    names.append(node.tag)
+                    if action.tag == dav('set'):
+                        self.dav.set_property(path, node.tag, node.text or "")
+                    else:
+                        self.dav.remove_property(path, node.tag)
+
+        multistatus = ET.Element(dav('multistatus'))
+        response = ET.SubElement(multistatus, dav('response'))
+        ET.SubElement(response, dav('href')).text = self.dav.href(path, os.path.isdir(local))
+        propstat = ET.SubElement(response, dav('propstat'))
+        prop = ET.SubElement(propstat, dav('prop'))
+        for name in names:
+            ET.SubElement(prop, name)
+        ET.SubElement(propstat, dav('status')).text = "HTTP/1.1 200 OK"
+
+        self.respond_xml(207, multistatus)
+
+
+class WebDAV(object):
+
+    methods = {"OPTIONS", "HEAD", "GET", "PUT", "DELETE", "MKCOL", "COPY", "MOVE", "PROPFIND", "PROPPATCH", "SEARCH"}
+
+    def __init__(self, root=None, latency=0, bandwidth=None, quota=10 * 1024 ** 3):
+
+        self.temporary = root is None
+        self.root = os.path.realpath(root or tempfile.mkdtemp(prefix="webdav-"))
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.quota = quota
+        self.ranges = True
+        self.infinity = True
+        self.search = False
+        self.ctag = 'getctag'
+        self.ctags = dict()
+        self.generation = 0
+        self.locked = set()
+        self.properties = dict()
+        # status codes answered instead of the real response, by path or by (method, path)
+        self.fail = dict()
+        self.requests = list()
+        self.lock = threading.Lock()
+        self.server = None
+
+    def start(self):
+
+        self.server = ThreadingServer(("127.0.0.1", 0), Handler)
+        self.server.dav = self
+        thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.01})
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+        if self.temporary:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return "http://{host}:{port}".format(host=host, port=port)
+
+    def options(self, **options):
+
+        options.setdefault('webdav_hostname', self.url)
+        options.setdefault('webdav_login', "login")
+        options.setdefault('webdav_password', "password")
+        return options
+
+    def record(self, request):
+        with self.lock:
+            self.requests.append(request)
+
+    def reset(self):
+        with self.lock:
+            del self.requests[:]
+
+    def local(self, path):
+
+        parts = [part for part in path.split("/") if part and part not in (".", "..")]
+        local = os.path.join(self.root, *parts)
+        return local + os.sep if path.endswith("/") and parts else local
+
+    def href(self, path, directory):
+
+        path = "/" + path.strip("/")
+        if directory and not path.endswith("/"):
+            path += "/"
+        return quote(path)
+
+    def etag(self, local):
+        stat = os.stat(local)
+        return '"{mtime:x}-{size:x}"'.format(mtime=int(stat.st_mtime * 1000000), size=stat.st_size)
+
+    def changed(self, path):
+
+        # a collection tag changes with anything below it, like getctag on CalDAV and ownCloud servers
+        remote = "/" + path.strip("/")
+        with self.lock:
+            self.generation += 1
+            for (child, local) in self.walk(remote, "infinity"):
+                if os.path.isdir(local):
+                    self.ctags[child] = self.generation
+            while remote != "/":
+                remote = remote.rsplit("/", 1)[0] or "/"
+                self.ctags[remote] = self.generation
+
+    def ctag_of(self, remote):
+        with self.lock:
+            return '"c{generation:x}"'.format(generation=self.ctags.get("/" + remote.strip("/"), 0))
+
+    def forget(self, path):
+
+        prefix = "/" + path.strip("/")
+        with self.lock:
+            for key in [key for key in self.properties if key == prefix or key.startswith(prefix + "/")]:
+                del self.properties[key]
+
+    def carry(self, source, target, move, depth="infinity"):
+
+        # dead properties go along with a copied or moved resource, those of a replaced target are dropped
+        source, target = "/" + source.strip("/"), "/" + target.strip("/")
+        with self.lock:
+            for key in [key for key in self.properties if key == target or key.startswith(target + "/")]:
+                del self.properties[key]
+            for key in [key for key in self.properties if key == source or (depth != "0" and key.startswith(source + "/"))]:
+                self.properties[target + key[len(source):]] = self.properties.pop(key) if move else dict(self.properties[key])
+
+    def locked_below(self, path):
+        remote = "/" + path.strip("/")
+        return [item for item in self.locked if item == remote or item.startswith(remote.rstrip("/") + "/")]
+
+    def set_property(self, path, name, value):
+        with self.lock:
+            self.properties.setdefault("/" + path.strip("/"), dict())[name] = value
+
+    def remove_property(self, path, name):
+        with self.lock:
+            self.properties.get("/" + path.strip("/"), dict()).pop(name, None)
+
+    def walk(self, path, depth):
+
+        local = self.local(path)
+        remote = "/" + path.strip("/")
+        yield (remote, local)
+
+        if depth == "0" or not os.path.isdir(local):
+            return
+
+        for name in sorted(os.listdir(local)):
+            child = "{parent}/{name}".format(parent=remote.rstrip("/"), name=name)
+            if depth == "1":
+                yield (child, os.path.join(local, name))
+            else:
+                for item in self.walk(child, depth):
+                    yield item
+
+    def live_property(self, remote, local, name):
+
+        directory = os.path.isdir(local)
+        stat = os.stat(local)
+
+        if name == dav('resourcetype'):
+            node = ET.Element(name)
+            if directory:
+                ET.SubElement(node, dav('collection'))
+            return node
+
+        values = {
+            dav('displayname'): os.path.basename(remote.rstrip("/")),
+            dav('getlastmodified'): formatdate(stat.st_mtime, usegmt=True),
+            dav('creationdate'): time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(stat.st_ctime)),
+        }
+        if directory and self.ctag == 'getctag':
+            values["{{{ns}}}getctag".format(ns=CS)] = self.ctag_of(remote)
+        if directory and self.ctag == 'getetag':
+            values[dav('getetag')] = self.ctag_of(remote)
+        if not directory:
+            values[dav('getcontentlength')] = str(stat.st_size)
+            values[dav('getetag')] = self.etag(local)
+            values[dav('getcontenttype')] = "application/octet-stream"
+        if remote == "/":
+            values[dav('quota-available-bytes')] = str(self.quota)
+            values[dav('quota-used-bytes')] = "0"
+
+        if name not in values:
+            return None
+
+        node = ET.Element(name)
+        node.text = values[name]
+        return node
+
+    def matches(self, condition, remote, local):
+
+        operator = condition.tag[len(dav('')):]
+        if operator == 'and':
+            return all(self.matches(node, remote, local) for node in condition)
+        if operator == 'or':
+            return any(self.matches(node, remote, local) for node in condition)
+        if operator == 'not':
+            return not self.matches(condition[0], remote, local)
+        if operator == 'is-collection':
+            return os.path.isdir(local)
+
+        name = condition.find(dav('prop'))[0].tag
+        node = self.live_property(remote, local, name)
+        with self.lock:
+            dead = self.properties.get(remote, {})
+            value = node.text if node is not None else dead.get(name)
+        literal = condition.findtext(dav('literal'))
+        if value is None:
+            return False
+
+        if operator == 'like':
+            return fnmatchcase(value, literal.replace("%", "*").replace("_", "?"))
+        if name == dav('getcontentlength'):
+            value, literal = int(value), int(literal)
+        elif name == dav('getlastmodified'):
+            value, literal = mktime_tz(parsedate_tz(value)), mktime_tz(parsedate_tz(literal))
+
+        operators = {'eq': value == literal, 'lt': value < literal, 'lte': value <= literal,
+                     'gt': value > literal, 'gte': value >= literal}
+        return operators[operator]
+
+    def propstat(self, multistatus, remote, local, names):
+
+        response = ET.SubElement(multistatus, dav('response'))
+        ET.SubElement(response, dav('href')).text = self.href(remote, os.path.isdir(local))
+
+        with self.lock:
+            dead = dict(self.properties.get(remote, {}))
+
+        found, missing = list(), list()
+        for name in names if names is not None else [dav(name) for name in live_properties] + list(dead):
+            node = self.live_property(remote, local, name)
+            if node is None and name in dead:
+                node = ET.Element(name)
+                node.text = dead[name]
+            if node is None and names is not None:
+                missing.append(ET.Element(name))
+            if node is not None:
+                found.append(node)
+
+        for (nodes, status) in ((found, "HTTP/1.1 200 OK"), (missing, "HTTP/1.1 404 Not Found")):
+            if not nodes:
+                continue
+            propstat = ET.SubElement(response, dav('propstat'))
+            prop = ET.SubElement(propstat, dav('prop'))
+            prop.extend(nodes)
+            ET.SubElement(propstat, dav('status')).text = status
+
+    def throttled_write(self, stream, data):
+
+        if not self.bandwidth:
+            stream.write(data)
+            return
+
+        chunk = max(int(self.bandwidth / 50), 1024)
+        for offset in range(0, len(data), chunk):
+            started = time.time()
+            part = data[offset:offset + chunk]
+            stream.write(part)
+            delay = float(len(part)) / self.bandwidth - (time.time() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+    def throttled_read(self, stream, size):
+
+        if not self.bandwidth:
+            return stream.read(size)
+
+        chunks, chunk = list(), max(int(self.bandwidth / 50), 1024)
+        while size > 0:
+            started = time.time()
+            part = stream.read(min(chunk, size))
+            if not part:
+                break
+            chunks.append(part)
+            size -= len(part)
+            delay = float(len(part)) / self.bandwidth - (time.time() - started)
+            if delay > 0:
+                time.sleep(delay)
+        return b"".join(chunks)
+
+    def create(self, path, data=b""):
+
+        local = self.local(path)
+        if path.endswith("/"):
+            if not os.path.isdir(local):
+                os.makedirs(local)
+                self.changed(path)
+            return local
+
+        parent = os.path.dirname(local)
+        if not os.path.isdir(parent):
+            os.makedirs(parent)
+        with open(local, 'wb') as f:
+            f.write(data)
+        self.changed(path)
+        return local
+
+    def tree(self, path, depth, width, files, size=16):
+
+        self.create(path.rstrip("/") + "/")
+        for index in range(files):
+            self.create("{path}/file{index}".format(path=path.rstrip("/"), index=index), b"x" * size)
+        if depth > 1:
+            for index in range(width):
+                self.tree("{path}/dir{index}".format(path=path.rstrip("/"), index=index), depth - 1, width, files, size)
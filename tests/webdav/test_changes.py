@@ -0,0 +1,61 @@
+import pytest
+from hamcrest import assert_that, equal_to
+from webdav.client import RemoteResourceNotFound
+from test_requests import requests, assert_budget
+
+
+@pytest.fixture(params=['getctag', 'getetag', None])
+def ctag(request, dav):
+    dav.ctag = request.param
+    return request.param
+
+
+@pytest.fixture
+def tree(dav):
+    dav.tree("/tree", depth=3, width=2, files=2)
+    return dav
+
+
+def nothing():
+    return {'added': [], 'modified': [], 'deleted': []}
+
+
+class TestChanges:
+
+    def test_initial(self, tree, client, ctag):
+        changes, state = client.changes("tree")
+        assert_that(len(changes['added']), equal_to(20))
+        assert_that(changes['modified'] + changes['deleted'], equal_to([]))
+        assert_that(state['path'], equal_to("/tree/"))
+
+    def test_nothing_changed(self, tree, client, ctag):
+        _, state = client.changes("tree")
+        counter = requests(tree, lambda: client.changes("tree", since=state))
+        assert_that(client.changes("tree", since=state)[0], equal_to(nothing()))
+        if ctag:
+            assert_budget(counter, PROPFIND=1)
+        else:
+            assert_budget(counter, PROPFIND=7)
+
+    def test_added_modified_deleted(self, tree, client, ctag):
+        _, state = client.changes("tree")
+        tree.create("/tree/dir0/dir1/file0", b"changed")
+        tree.create("/tree/dir0/file2", b"new")
+        tree.create("/tree/dir0/dir2/file0", b"new")
+        client.clean("tree/dir1/dir0")
+
+        counter = requests(tree, lambda: client.changes("tree", since=state))
+        changes, state = client.changes("tree", since=state)
+        assert_that(changes, equal_to({
+            'added': ["/tree/dir0/dir2/", "/tree/dir0/dir2/file0", "/tree/dir0/file2"],
+            'modified': ["/tree/dir0/dir1/file0"],
+            'deleted': ["/tree/dir1/dir0/"],
+        }))
+        if ctag:
+            # the root probe, then tree, dir0, dir0/dir1, dir0/dir2 and dir1
+            assert_budget(counter, PROPFIND=6)
+        assert_that(client.changes("tree", since=state)[0], equal_to(nothing()))
+
+    def test_not_found(self, client, ctag):
+        with pytest.raises(RemoteResourceNotFound):
+            client.changes("tree")
@@ -0,0 +1,78 @@
+import os
+import time
+
+import pytest
+from hamcrest import assert_that, equal_to, contains_inanyorder
+from webdav.client import RemoteResourceNotFound
+from test_requests import requests, assert_budget
+
+
+@pytest.fixture(params=['search', 'infinity', 'crawl'])
+def mode(request, dav):
+    dav.search = request.param == 'search'
+    dav.infinity = request.param != 'crawl'
+    return request.param
+
+
+@pytest.fixture
+def tree(dav):
+    dav.create("/dir1/small.txt", b"x" * 10)
+    dav.create("/dir1/large.bin", b"x" * 1000)
+    dav.create("/dir1/dir2/medium.txt", b"x" * 100)
+    dav.create("/dir1/dir2/dir3/old.txt", b"x")
+    old = time.time() - 3600
+    os.utime(dav.local("/dir1/dir2/dir3/old.txt"), (old, old))
+    return dav
+
+
+def paths(entries):
+    return [entry['path'] for entry in entries]
+
+
+class TestFind:
+
+    def test_everything(self, tree, client, mode):
+        assert_that(paths(client.find("dir1")), contains_inanyorder(
+            "/dir1/small.txt", "/dir1/large.bin", "/dir1/dir2/", "/dir1/dir2/medium.txt",
+            "/dir1/dir2/dir3/", "/dir1/dir2/dir3/old.txt"))
+
+    def test_kind(self, tree, client, mode):
+        assert_that(paths(client.find("dir1", kind='directory')), contains_inanyorder("/dir1/dir2/", "/dir1/dir2/dir3/"))
+
+    def test_size(self, tree, client, mode):
+        entries = list(client.find("dir1", min_size=10, max_size=100))
+        assert_that(paths(entries), contains_inanyorder("/dir1/small.txt", "/dir1/dir2/medium.txt"))
+        assert_that(sorted(entry['size'] for entry in entries), equal_to([10, 100]))
+
+    def test_modified_since(self, tree, client, mode):
+        found = paths(client.find("dir1", kind='file', modified_since=time.time() - 60))
+        assert_that(found, contains_inanyorder("/dir1/small.txt", "/dir1/large.bin", "/dir1/dir2/medium.txt"))
+
+    def test_name_and_predicate(self, tree, client, mode):
+        found = paths(client.find("dir1", name="*.txt", predicate=lambda entry: entry['size'] > 1))
+        assert_that(found, contains_inanyorder("/dir1/small.txt", "/dir1/dir2/medium.txt"))
+
+    def test_properties(self, tree, client, mode):
+        option = {'namespace': "urn:example", 'name': "state"}
+        client.set_property("dir1/large.bin", dict(option, value="stale"))
+        client.set_property("dir1/small.txt", dict(option, value="fresh"))
+        entries = list(client.find("dir1", properties=[dict(option, value="stale")]))
+        assert_that(paths(entries), equal_to(["/dir1/large.bin"]))
+        assert_that(entries[0]['properties'], equal_to(["stale"]))
+
+    def test_not_found(self, client, mode):
+        with pytest.raises(RemoteResourceNotFound):
+            list(client.find("dir1"))
+
+    def test_lazy(self, tree, client, mode):
+        found = client.find("dir1", kind='file')
+        assert_that(next(found)['is_dir'], equal_to(False))
+
+    def test_requests(self, tree, client, mode):
+        counter = requests(tree, lambda: list(client.find("dir1", min_size=10)))
+        budgets = {
+            'search': {'OPTIONS': 1, 'SEARCH': 1},
+            'infinity': {'OPTIONS': 1, 'PROPFIND': 1},
+            'crawl': {'OPTIONS': 1, 'PROPFIND': 4},
+        }
+        assert_budget(counter, **budgets[mode])
@@ -1 +1,253 @@
 __author__ = 'designerror'
+
+import os
+import shutil
+import threading
+from io import BytesIO
+
+import pytest
+from hamcrest import assert_that, equal_to, contains_inanyorder, is_
+from conftest import success, not_success
+from webdav.client import RemoteResourceNotFound, RemoteParentNotFound, RemoteResourceExists, UnhandledError
+
+
+class TestMethods:
+
+    def test_check(self, dav, client):
+        dav.create("/dir1/file1", b"data")
+        assert_that(client.check(), is_(success()))
+        assert_that(client.check("dir1/file1"), is_(success()))
+        assert_that(client.check("dir1/file2"), is_(not_success()))
+
+    def test_list(self, dav, client):
+        dav.tree("/dir1", depth=2, width=2, files=2)
+        assert_that(client.list("dir1"), contains_inanyorder("dir0/", "dir1/", "file0", "file1"))
+
+    def test_list_not_found(self, client):
+        with pytest.raises(RemoteResourceNotFound):
+            client.list("dir1")
+
+    def test_info(self, dav, client):
+        dav.create("/dir1/file1", b"data")
+        info = client.info("dir1/file1")
+        assert_that(info['name'], equal_to("file1"))
+        assert_that(info['size'], equal_to("4"))
+
+    def test_info_many(self, dav, client):
+        dav.create("/dir1/file1", b"data")
+        dav.create("/dir1/file2", b"da")
+        dav.create("/dir2/file3", b"d")
+        info = client.info_many(["dir1/file1", "dir1/file2", "dir2/file3", "dir2/file4", "dir3/file5"])
+        assert_that(info['dir1/file1']['size'], equal_to("4"))
+        assert_that(info['dir1/file2']['size'], equal_to("2"))
+        assert_that(info['dir2/file3']['name'], equal_to("file3"))
+        assert_that(info['dir2/file4'], equal_to(None))
+        assert_that(info['dir3/file5'], equal_to(None))
+
+    def test_check_many(self, dav, client):
+        dav.create("/dir1/file1", b"data")
+        dav.create("/dir1/dir2/")
+        checks = client.check_many(["/", "dir1", "dir1/file1", "dir1/dir2/", "dir1/file1/", "dir1/file2"])
+        assert_that(checks, equal_to({"/": True, "dir1": True, "dir1/file1": True, "dir1/dir2/": True,
+                                      "dir1/file1/": False, "dir1/file2": False}))
+
+    def test_free(self, dav, client):
+        assert_that(client.free(), equal_to(dav.quota))
+
+    def test_mkdir_and_clean(self, client):
+        client.mkdir("dir1")
+        assert_that(client.is_dir("dir1"), is_(success()))
+        client.clean("dir1/")
+        assert_that(client.check("dir1"), is_(not_success()))
+
+    def test_makedirs(self, dav, client):
+        client.makedirs("dir1/dir2/dir3")
+        client.makedirs("dir1/dir2/dir3")
+        assert_that(os.path.isdir(dav.local("/dir1/dir2/dir3")), is_(success()))
+        with pytest.raises(RemoteResourceExists):
+            client.makedirs("dir1/dir2", exist_ok=False)
+
+    def test_makedirs_after_removal(self, dav, client):
+        client.makedirs("dir1/dir2")
+        client.clean("dir1")
+        client.makedirs("dir1/dir2/dir3")
+        shutil.rmtree(dav.local("/dir1"))
+        client.makedirs("dir1/dir2/dir4")
+        assert_that(os.path.isdir(dav.local("/dir1/dir2/dir4")), is_(success()))
+
+    def test_makedirs_many(self, dav, client):
+        dav.create("/dir1/")
+        client.makedirs_many(["dir1/dir2/dir3", "dir1/dir2/dir4", "dir5/dir6", "dir1"])
+        for path in ("/dir1/dir2/dir3", "/dir1/dir2/dir4", "/dir5/dir6"):
+            assert_that(os.path.isdir(dav.local(path)), is_(success()))
+
+    def test_clean_many(self, dav, client):
+        dav.tree("/dir1", depth=2, width=2, files=2)
+        dav.create("/file1", b"data")
+        results = client.clean_many(["dir1/", "dir1/dir0/file0", "dir1/file1", "file1", "file2", "dir2/file3"])
+        assert_that(results['dir1/'], equal_to(None))
+        assert_that(results['dir1/dir0/file0'], equal_to(None))
+        assert_that(results['file1'], equal_to(None))
+        assert_that(results['file2'], is_(RemoteResourceNotFound))
+        assert_that(results['dir2/file3'], is_(RemoteResourceNotFound))
+        assert_that(os.listdir(dav.root), equal_to([]))
+
+    def test_clean_many_partial(self, dav, client):
+        dav.tree("/dir1", depth=2, width=1, files=2)
+        dav.locked.add("/dir1/dir0/file1")
+        results = client.clean_many(["dir1", "dir1/dir0/file0", "dir1/dir0/file1"])
+        assert_that(results['dir1'], is_(UnhandledError))
+        assert_that(results['dir1/dir0/file0'], equal_to(None))
+        assert_that(results['dir1/dir0/file1'], is_(UnhandledError))
+        assert_that(os.listdir(dav.local("/dir1/dir0")), equal_to(["file1"]))
+
+    def test_upload_and_download(self, client, tmpdir):
+        local_path = tmpdir.join("file1")
+        local_path.write_binary(b"data" * 1024)
+        client.upload_file(remote_path="file1", local_path=str(local_path))
+        client.download_file(remote_path="file1", local_path=str(tmpdir.join("file2")))
+        assert_that(tmpdir.join("file2").read_binary(), equal_to(b"data" * 1024))
+
+    def test_download_not_found(self, client, tmpdir):
+        with pytest.raises(RemoteResourceNotFound):
+            client.download_file(remote_path="file1", local_path=str(tmpdir.join("file1")))
+        assert_that(tmpdir.join("file1").exists(), is_(not_success()))
+
+    @pytest.mark.parametrize("code", [401, 403, 500])
+    def test_server_errors(self, dav, client, tmpdir, code):
+        dav.tree("/dir1", depth=1, width=1, files=1)
+        dav.fail.update({"/dir1": code, "/dir1/file0": code})
+        with pytest.raises(UnhandledError):
+            client.download_file(remote_path="dir1/file0", local_path=str(tmpdir.join("file0")))
+        assert_that(tmpdir.join("file0").exists(), is_(not_success()))
+        with pytest.raises(UnhandledError):
+            client.list("dir1")
+        with pytest.raises(UnhandledError):
+            client.info("dir1/file0")
+        with pytest.raises(UnhandledError):
+            client.is_dir("dir1")
+
+        dav.fail = {("GET", "/dir1/file0"): code}
+        buff = BytesIO()
+        with pytest.raises(UnhandledError):
+            client.download_to(buff=buff, remote_path="dir1/file0")
+        assert_that(buff.getvalue(), equal_to(b""))
+
+    def test_upload_without_parent(self, client, tmpdir):
+        local_path = tmpdir.join("file1")
+        local_path.write_binary(b"data")
+        with pytest.raises(RemoteParentNotFound):
+            client.upload_file(remote_path="dir1/file1", local_path=str(local_path))
+        with pytest.raises(RemoteParentNotFound):
+            client.mkdir("dir1/dir2")
+
+    def test_upload_from_and_download_to(self, client):
+        client.upload_from(buff=BytesIO(b"data"), remote_path="file1")
+        buff = BytesIO()
+        client.download_to(buff=buff, remote_path="file1")
+        assert_that(buff.getvalue(), equal_to(b"data"))
+
+    def test_copy_and_move(self, dav, client):
+        dav.create("/dir1/file1", b"data")
+        client.copy(remote_path_from="dir1/file1", remote_path_to="dir1/file2")
+        client.move(remote_path_from="dir1/file1", remote_path_to="dir1/file3")
+        assert_that(client.list("dir1"), contains_inanyorder("file2", "file3"))
+
+    def test_copy_and_move_errors(self, dav, client):
+        dav.create("/dir1/file1", b"data")
+        dav.create("/dir1/file2", b"other")
+        with pytest.raises(RemoteResourceNotFound):
+            client.copy(remote_path_from="dir1/file3", remote_path_to="dir1/file4")
+        with pytest.raises(RemoteParentNotFound):
+            client.move(remote_path_from="dir1/file1", remote_path_to="dir2/file1")
+        with pytest.raises(RemoteResourceExists):
+            client.copy(remote_path_from="dir1/file1", remote_path_to="dir1/file2", overwrite=False)
+        client.copy(remote_path_from="dir1/file1", remote_path_to="dir1/file2")
+        assert_that(open(dav.local("/dir1/file2"), 'rb').read(), equal_to(b"data"))
+
+    def test_copy_many_and_move_many(self, dav, client):
+        dav.tree("/dir1", depth=2, width=2, files=2)
+        results = client.copy_many([("dir1/dir0", "dir2"), ("dir1/file0", "file0"), ("dir1/dir1", "dir3")], depth=0)
+        assert_that(list(results.values()), equal_to([None, None, None]))
+        assert_that(os.listdir(dav.local("/dir2")), equal_to([]))
+        results = client.move_many([("dir1/dir0", "dir2"), ("dir1/file1", "file1"), ("dir1/file2", "file2")])
+        assert_that(results[("dir1/dir0", "dir2")], equal_to(None))
+        assert_that(results[("dir1/file1", "file1")], equal_to(None))
+        assert_that(results[("dir1/file2", "file2")], is_(RemoteResourceNotFound))
+        assert_that(sorted(os.listdir(dav.local("/dir2"))), equal_to(["file0", "file1"]))
+
+    def test_move_many_partial(self, dav, client):
+        dav.tree("/dir1", depth=2, width=1, files=2)
+        dav.locked.add("/dir1/dir0/file1")
+        error = client.move_many([("dir1", "dir2")])[("dir1", "dir2")]
+        assert_that(error, is_(UnhandledError))
+        assert_that(error.failed, equal_to(["/dir1/dir0/file1"]))
+
+    def test_set_and_get_property(self, dav, client):
+        dav.create("/file1", b"data")
+        option = {'namespace': "urn:example", 'name': "color"}
+        client.set_property("file1", dict(option, value="blue"))
+        assert_that(client.get_property("file1", option), equal_to("blue"))
+
+    def test_set_and_get_properties(self, dav, client):
+        dav.create("/file1", b"data")
+        options = [{'namespace': "urn:example", 'name': "color"}, {'namespace': "urn:other", 'name': "color"},
+                   {'name': "plain"}, {'namespace': "urn:example", 'name': "missing"}]
+        client.set_properties("file1", [dict(options[0], value="blue"), dict(options[1], value="red"),
+                                        dict(options[2], value="")])
+        assert_that(client.get_properties("file1", options), equal_to(["blue", "red", "", None]))
+        assert_that(client.get_properties("file1", [{'name': "getcontentlength", 'namespace': "DAV:"}]), equal_to(["4"]))
+
+    def test_properties_many(self, dav, client):
+        dav.create("/dir1/file1", b"data")
+        dav.create("/dir1/file2", b"data")
+        option = {'namespace': "urn:example", 'name': "color"}
+        client.set_properties_many({"dir1/file1": [dict(option, value="blue")], "dir1/file2": [dict(option, value="red")]})
+        values = client.get_properties_many(["dir1/file1", "dir1/file2", "dir1/file3"], [option])
+        assert_that(values, equal_to({"dir1/file1": ["blue"], "dir1/file2": ["red"], "dir1/file3": None}))
+
+    def test_property_not_found(self, client):
+        with pytest.raises(RemoteResourceNotFound):
+            client.get_property("file1", {'name': "color"})
+        with pytest.raises(RemoteResourceNotFound):
+            client.set_property("file1", {'name': "color", 'value': "blue"})
+
+    def test_download_directory(self, dav, client, tmpdir):
+        dav.tree("/dir1", depth=2, width=1, files=2)
+        local_path = str(tmpdir.join("dir1"))
+        client.download_directory(remote_path="dir1", local_path=local_path)
+        assert_that(os.listdir(os.path.join(local_path, "dir0")), contains_inanyorder("file0", "file1"))
+
+    def test_push_and_pull(self, dav, client, tmpdir):
+        dav.tree("/dir1", depth=2, width=1, files=1)
+        local_path = tmpdir.mkdir("dir1")
+        local_path.join("file2").write_binary(b"data")
+        client.pull(remote_directory="dir1/", local_directory=str(local_path))
+        client.push(remote_directory="dir1/", local_directory=str(local_path))
+        assert_that(sorted(os.listdir(str(local_path.join("dir0")))), equal_to(["file0"]))
+        assert_that(client.list("dir1"), contains_inanyorder("dir0/", "file0", "file2"))
+
+    def test_shared_between_threads(self, dav, client):
+        errors = list()
+
+        def work(index):
+            try:
+                for round in range(10):
+                    path = "dir{index}/dir{round}".format(index=index, round=round)
+                    client.makedirs(path)
+                    client.upload_from(buff=BytesIO(path.encode()), remote_path=path + "/file")
+                    buff = BytesIO()
+                    client.download_to(buff=buff, remote_path=path + "/file")
+                    assert buff.getvalue() == path.encode()
+                    assert client.list(path) == ["file"]
+                    client.clean(path)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert_that(errors, equal_to([]))
+        assert_that(sorted(os.listdir(dav.root)), equal_to(["dir{0}".format(index) for index in range(8)]))
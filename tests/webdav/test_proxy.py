@@ -0,0 +1,53 @@
+import time
+
+import pytest
+from proxy import Fault, FaultProxy
+from webdav.client import Client, NotConnection, UnhandledError
+
+
+@pytest.fixture
+def proxy(dav):
+    with FaultProxy(dav.url, seed=1) as proxy:
+        yield proxy
+
+
+@pytest.fixture
+def proxied(dav, proxy):
+    return Client(dav.options(webdav_hostname=proxy.url))
+
+
+class TestFaultProxy:
+
+    def test_forwards_requests(self, dav, proxied):
+        dav.create("/dir1/file1", b"data")
+        assert proxied.check("dir1/file1")
+        assert proxied.list("dir1") == ["file1"]
+
+    def test_rtt_per_method(self, dav, proxy, proxied):
+        proxy.faults['PROPFIND'] = Fault(rtt=0.1)
+        started = time.time()
+        proxied.check()
+        assert time.time() - started < 0.1
+        started = time.time()
+        proxied.list()
+        assert time.time() - started >= 0.1
+
+    def test_server_errors(self, dav, proxy, proxied, tmpdir):
+        proxy.faults['PUT'] = Fault(errors={503: 1.0})
+        tmpdir.join("file1").write_binary(b"data")
+        with pytest.raises(UnhandledError):
+            proxied.upload_file(remote_path="file1", local_path=str(tmpdir.join("file1")))
+        assert proxy.injected[('PUT', 503)] == 1
+
+    def test_connection_reset(self, dav, proxy, proxied):
+        proxy.faults['*'] = Fault(reset=1.0)
+        with pytest.raises(NotConnection):
+            proxied.check()
+
+    def test_parse(self):
+        method, fault = Fault.parse("GET:rtt=20,bandwidth=2,error=0.1,429=0.2,reset=0.01")
+        assert method == "GET"
+        assert fault.rtt == 0.02
+        assert fault.bandwidth == 2000000
+        assert fault.errors == {503: 0.1, 429: 0.2}
+        assert fault.reset == 0.01
@@ -0,0 +1,89 @@
+import os
+import socket
+
+import pytest
+from proxy import Fault, FaultProxy
+from server import WebDAV
+from webdav.client import Client
+
+
+@pytest.fixture
+def replica(dav):
+    with WebDAV(root=dav.root) as server:
+        yield server
+
+
+@pytest.fixture
+def proxy(dav):
+    with FaultProxy(dav.url, seed=1) as proxy:
+        yield proxy
+
+
+def methods(server):
+    return [request.method for request in server.requests]
+
+
+def closed_port():
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return "http://127.0.0.1:{port}".format(port=port)
+
+
+class TestReplicas:
+
+    def test_reads_spread_and_writes_pinned(self, dav, replica, tmpdir):
+        client = Client(dav.options(webdav_replicas=[replica.url]))
+        dav.create("/dir1/file1", b"data")
+        for _ in range(20):
+            assert client.check("dir1/file1")
+        assert "HEAD" in methods(dav) and "HEAD" in methods(replica)
+
+        tmpdir.join("file2").write_binary(b"data")
+        client.mkdir("dir2")
+        client.upload_file(remote_path="dir2/file2", local_path=str(tmpdir.join("file2")))
+        client.clean("dir1/file1")
+        assert not {"MKCOL", "PUT", "DELETE"} & set(methods(replica))
+
+    def test_failover(self, dav):
+        dead = closed_port()
+        client = Client(dav.options(webdav_replicas=dead))
+        dav.create("/dir1/file1", b"data")
+        for _ in range(10):
+            assert client.list("dir1") == ["file1"]
+        assert client.endpoints.ejected == {dead}
+
+    def test_retry_on_server_error(self, dav, proxy):
+        proxy.faults['PROPFIND'] = Fault(errors={503: 1.0})
+        client = Client(dav.options(webdav_replicas=[proxy.url]))
+        client.endpoints.ejected.add(dav.url)
+        dav.create("/dir1/file1", b"data")
+        assert client.list("dir1") == ["file1"]
+        assert proxy.injected[('PROPFIND', 503)] == 1
+        assert client.endpoints.ejected == {proxy.url}
+
+    def test_retry_many(self, dav, tmpdir):
+        dav.tree("/tree", depth=2, width=2, files=3)
+        client = Client(dav.options(webdav_replicas=[closed_port(), closed_port()]))
+        client.download_directory(remote_path="tree", local_path=str(tmpdir.join("tree")), jobs=4)
+        assert sorted(os.listdir(str(tmpdir.join("tree", "dir1")))) == sorted(os.listdir(dav.local("/tree/dir1")))
+        assert len(client.endpoints.ejected) == 2
+
+    def test_health_checks(self, dav, proxy):
+        client = Client(dav.options(webdav_replicas=[proxy.url]))
+        proxy.faults['OPTIONS'] = Fault(errors={503: 1.0})
+        client._check_endpoints()
+        assert client.endpoints.ejected == {proxy.url}
+        proxy.faults.clear()
+        client._check_endpoints()
+        assert not client.endpoints.ejected
+
+    def test_latency_weighted(self, dav):
+        with WebDAV(root=dav.root, latency=0.05) as slow:
+            client = Client(dav.options(webdav_replicas=[slow.url], webdav_balance='latency'))
+            dav.create("/file1", b"data")
+            for _ in range(10):
+                assert client.check("file1")
+            assert methods(slow).count("HEAD") == 1
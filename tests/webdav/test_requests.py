@@ -0,0 +1,201 @@
+import os
+from collections import Counter
+from io import BytesIO
+
+import pycurl
+import pytest
+from webdav.client import Client
+from webdav.connection import WebDAVSettings
+
+
+def requests(dav, operation):
+
+    dav.reset()
+    operation()
+    return Counter(request.method for request in dav.requests)
+
+
+def assert_budget(counter, **budget):
+
+    for (method, count) in counter.items():
+        assert count <= budget.get(method, 0), "{method}: {count} > {budget}".format(
+            method=method, count=count, budget=budget.get(method, 0))
+
+
+@pytest.fixture
+def files(dav, tmpdir):
+    dav.create("/dir1/file1", b"data")
+    dav.create("/dir1/dir2/")
+    tmpdir.join("local1").write_binary(b"data")
+    return tmpdir
+
+
+properties = [{'namespace': "urn:example", 'name': "property{0}".format(index), 'value': "value"} for index in range(5)]
+
+client_budgets = [
+    ('check', lambda client, tmpdir: client.check("dir1/file1"), {'HEAD': 1}),
+    ('list', lambda client, tmpdir: client.list("dir1"), {'PROPFIND': 1}),
+    ('free', lambda client, tmpdir: client.free(), {'PROPFIND': 1}),
+    ('info', lambda client, tmpdir: client.info("dir1/file1"), {'PROPFIND': 1}),
+    ('info_many', lambda client, tmpdir: client.info_many(["dir1/file1", "dir1/dir2", "dir1/file2"]), {'PROPFIND': 1}),
+    ('check_many', lambda client, tmpdir: client.check_many(["dir1/file1", "dir1/dir2/file3"]), {'PROPFIND': 2}),
+    ('is_dir', lambda client, tmpdir: client.is_dir("dir1/dir2"), {'PROPFIND': 1}),
+    ('mkdir', lambda client, tmpdir: client.mkdir("dir1/dir3"), {'MKCOL': 1}),
+    ('clean', lambda client, tmpdir: client.clean("dir1/file1"), {'DELETE': 1}),
+    ('makedirs', lambda client, tmpdir: client.makedirs("dir1/dir3"), {'MKCOL': 1}),
+    ('makedirs_deep', lambda client, tmpdir: client.makedirs("dir1/dir3/dir4/dir5"), {'MKCOL': 5}),
+    ('makedirs_many', lambda client, tmpdir: client.makedirs_many(["dir1/dir3/dir4", "dir1/dir3/dir5", "dir1/dir6"]), {'MKCOL': 5}),
+    ('get_properties', lambda client, tmpdir: client.get_properties("dir1/file1", properties), {'PROPFIND': 1}),
+    ('set_properties', lambda client, tmpdir: client.set_properties("dir1/file1", properties), {'PROPPATCH': 1}),
+    ('copy', lambda client, tmpdir: client.copy("dir1/file1", "dir1/file2"), {'COPY': 1}),
+    ('copy_many', lambda client, tmpdir: client.copy_many([("dir1/file1", "dir1/file2"), ("dir1/", "dir3/")]), {'COPY': 2}),
+    ('move', lambda client, tmpdir: client.move("dir1/file1", "dir1/file2"), {'MOVE': 1}),
+    ('download_file', lambda client, tmpdir: client.download_file("dir1/file1", str(tmpdir.join("file1"))), {'GET': 1}),
+    ('download', lambda client, tmpdir: client.download("dir1/file1", str(tmpdir.join("file1"))), {'PROPFIND': 1, 'GET': 1}),
+    ('download_to', lambda client, tmpdir: client.download_to(BytesIO(), "dir1/file1"), {'PROPFIND': 1, 'GET': 1}),
+    ('upload_file', lambda client, tmpdir: client.upload_file("dir1/file2", str(tmpdir.join("local1"))), {'PUT': 1}),
+    ('upload', lambda client, tmpdir: client.upload("dir1/file2", str(tmpdir.join("local1"))), {'PUT': 1}),
+    ('upload_from', lambda client, tmpdir: client.upload_from(BytesIO(b"data"), "dir1/file2"), {'PUT': 1}),
+]
+
+resource_budgets = [
+    ('is_dir', lambda resource, tmpdir: resource.is_dir(), {'PROPFIND': 1}),
+    ('check', lambda resource, tmpdir: resource.check(), {'HEAD': 1}),
+    ('info', lambda resource, tmpdir: resource.info(), {'PROPFIND': 1}),
+    ('clean', lambda resource, tmpdir: resource.clean(), {'DELETE': 1}),
+    ('rename', lambda resource, tmpdir: resource.rename("file2"), {'MOVE': 1}),
+    ('move', lambda resource, tmpdir: resource.move("dir1/dir2/file1"), {'MOVE': 1}),
+    ('copy', lambda resource, tmpdir: resource.copy("dir1/file2"), {'COPY': 1}),
+    ('read_from', lambda resource, tmpdir: resource.read_from(BytesIO(b"data")), {'PUT': 1}),
+    ('read', lambda resource, tmpdir: resource.read(str(tmpdir.join("local1"))), {'PUT': 1}),
+    ('write_to', lambda resource, tmpdir: resource.write_to(BytesIO()), {'PROPFIND': 1, 'GET': 1}),
+    ('write', lambda resource, tmpdir: resource.write(str(tmpdir.join("file1"))), {'PROPFIND': 1, 'GET': 1}),
+]
+
+
+@pytest.mark.parametrize("name,operation,budget", client_budgets, ids=[item[0] for item in client_budgets])
+def test_client_request_budget(dav, client, files, name, operation, budget):
+    assert_budget(requests(dav, lambda: operation(client, files)), **budget)
+
+
+@pytest.mark.parametrize("name,operation,budget", resource_budgets, ids=[item[0] for item in resource_budgets])
+def test_resource_request_budget(dav, client, files, name, operation, budget):
+    resource = client.resource("dir1/file1")
+    assert_budget(requests(dav, lambda: operation(resource, files)), **budget)
+
+
+def test_makedirs_memo(dav, client):
+    client.makedirs("dir1/dir2/dir3")
+    counter = requests(dav, lambda: [client.makedirs("dir1/dir2/dir3"), client.makedirs("dir1/dir2")])
+    assert_budget(counter)
+    counter = requests(dav, lambda: client.makedirs_many(["dir1/dir2/dir3/dir4", "dir1/dir2/dir5"]))
+    assert_budget(counter, MKCOL=2)
+
+
+def test_clean_many_collapses(dav, client):
+    dav.tree("/tree", depth=2, width=3, files=10)
+    paths = ["tree/dir{0}/file{1}".format(directory, index) for directory in range(3) for index in range(10)]
+    counter = requests(dav, lambda: client.clean_many(paths + ["tree/dir1/", "tree/dir2"]))
+    assert_budget(counter, DELETE=12)
+
+
+def test_info_many_per_parent(dav, client):
+    dav.tree("/tree", depth=2, width=3, files=20)
+    paths = ["tree/dir{0}/file{1}".format(directory, index) for directory in range(3) for index in range(20)]
+    counter = requests(dav, lambda: client.info_many(paths))
+    assert_budget(counter, PROPFIND=3)
+
+
+def test_connections_kept_by_handles(dav, client):
+    dav.create("/file1", b"data")
+    for _ in range(3):
+        request = client.Request({'URL': client.base_url + "/file1"})
+        client.perform(request)
+        client.release(request)
+    stats = client.stats.snapshot()
+    assert (stats['requests'], stats['connects'], stats['reused']) == (3, 1, 2)
+
+
+def test_connections_kept_by_thread_between_calls(dav, client):
+    dav.tree("/tree", depth=1, width=0, files=8)
+    paths = ["tree/file{0}".format(index) for index in range(8)]
+    client.check_many(paths, jobs=4)
+    connects = client.stats.connects
+    client.check_many(paths, jobs=4)
+    assert client.stats.connects == connects
+
+
+def test_connections_reused(dav, client):
+    dav.tree("/tree", depth=2, width=2, files=10)
+    paths = ["tree/dir{0}/file{1}".format(directory, index) for directory in range(2) for index in range(10)]
+    client.check_many(paths, jobs=16)
+    for path in paths:
+        client.info(path)
+    assert client.stats.connects <= 16
+
+
+@pytest.mark.parametrize("value", ["0", "false", "False", "no", "off", "", False, None])
+def test_http2_off(dav, value):
+    client = Client(dav.options(webdav_http2=value))
+    assert client.webdav.http2 is False
+    assert client.http2 is False
+    assert client.jobs == Client.jobs
+
+
+@pytest.mark.parametrize("value", ["1", "true", "Yes", "on", True, 1])
+def test_http2_on(value):
+    assert WebDAVSettings({'http2': value}).http2 is True
+
+
+@pytest.mark.skipif(not pycurl.version_info()[4] & pycurl.VERSION_HTTP2, reason="libcurl without HTTP/2")
+def test_http2_falls_back(dav, tmpdir):
+    client = Client(dav.options(webdav_http2=True))
+    dav.tree("/tree", depth=2, width=4, files=10)
+    assert client.jobs == Client.streams
+    client.download_directory("tree", str(tmpdir.join("tree")), jobs=client.jobs)
+    assert len(os.listdir(str(tmpdir.join("tree", "dir3")))) == 10
+    # one connection for the is_dir check, at most Client.jobs for the concurrent transfers
+    assert client.stats.connects <= Client.jobs + 1
+    request = client.Request({'URL': client.base_url + "/tree/dir0/file0"})
+    client.perform(request)
+    assert request.getinfo(pycurl.INFO_HTTP_VERSION) == pycurl.CURL_HTTP_VERSION_1_1
+    client.release(request)
+
+
+def tree_shape(depth, width, files):
+    directories = sum(width ** level for level in range(depth))
+    return directories, directories * files
+
+
+@pytest.mark.parametrize("jobs", [None, 4])
+@pytest.mark.parametrize("depth,width,files", [(2, 2, 2), (3, 3, 4)])
+class TestDirectoryBudgets:
+
+    def test_download_directory(self, dav, client, tmpdir, depth, width, files, jobs):
+        dav.tree("/tree", depth, width, files)
+        directories, total = tree_shape(depth, width, files)
+        counter = requests(dav, lambda: client.download_directory("tree", str(tmpdir.join("tree")), jobs=jobs))
+        assert_budget(counter, PROPFIND=directories + 1, GET=total)
+
+    def test_upload_directory(self, dav, client, tmpdir, depth, width, files, jobs):
+        dav.tree("/source", depth, width, files)
+        directories, total = tree_shape(depth, width, files)
+        counter = requests(dav, lambda: client.upload_directory("tree", dav.local("/source"), jobs=jobs))
+        assert_budget(counter, DELETE=1, MKCOL=directories, PUT=total)
+
+    def test_pull(self, dav, client, tmpdir, depth, width, files, jobs):
+        dav.tree("/tree", depth, width, files)
+        directories, total = tree_shape(depth, width, files)
+        counter = requests(dav, lambda: client.pull("tree", str(tmpdir), jobs=jobs))
+        assert_budget(counter, PROPFIND=directories + 1, GET=total)
+        counter = requests(dav, lambda: client.pull("tree", str(tmpdir), jobs=jobs))
+        assert_budget(counter, PROPFIND=directories + 1)
+
+    def test_push(self, dav, client, tmpdir, depth, width, files, jobs):
+        dav.tree("/source", depth, width, files)
+        dav.create("/tree/")
+        directories, total = tree_shape(depth, width, files)
+        counter = requests(dav, lambda: client.push("tree", dav.local("/source"), jobs=jobs))
+        assert_budget(counter, PROPFIND=2, MKCOL=directories - 1, PUT=total)
+        counter = requests(dav, lambda: client.push("tree", dav.local("/source"), jobs=jobs))
+        assert_budget(counter, PROPFIND=directories + 1)
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+from hamcrest import assert_that, equal_to, contains_inanyorder, has_item
+from webdav import snapshot
+from webdav.snapshot import Snapshot, DIRECTORY, FILE, diff
+
+
+@pytest.fixture(params=["numpy", "python"])
+def vectorized(request, monkeypatch):
+    if request.param == "numpy" and snapshot.numpy is None:
+        pytest.skip("NumPy is not installed")
+    if request.param == "python":
+        monkeypatch.setattr(snapshot, 'numpy', None)
+    return request.param
+
+
+def build(entries):
+
+    tree, ids = Snapshot(), {"": 0}
+    for (path, size, tag) in entries:
+        parent, _, name = path.rstrip("/").rpartition("/")
+        index = tree.add(ids[parent], name, DIRECTORY if path.endswith("/") else FILE, size=size, tag=tag)
+        ids[path.rstrip("/")] = index
+    return tree
+
+
+class TestSnapshot:
+
+    def test_paths(self):
+        tree = build([("dir1/", None, None), ("dir1/file1", 3, "a"), ("file1", 5, "b")])
+        assert_that([tree.path(index) for index in range(len(tree))], equal_to(["", "dir1/", "dir1/file1", "file1"]))
+        assert_that(len(tree.offsets) - 1, equal_to(3))
+        assert_that(tree.name(2), equal_to("file1"))
+
+    def test_diff(self, vectorized):
+        old = build([("dir1/", None, None), ("dir1/file1", 3, "a"), ("dir1/file2", 3, "b"), ("file3", 1, "c")])
+        new = build([("file3", 1, "c"), ("dir1/", None, None), ("dir1/file1", 4, "a"), ("dir2/", None, None),
+                     ("dir2/file2", 3, "b")])
+        result = diff(old, new)
+        assert_that(result.added, contains_inanyorder("dir2/", "dir2/file2"))
+        assert_that(result.removed, equal_to(["dir1/file2"]))
+        assert_that(result.changed, equal_to(["dir1/file1"]))
+
+    def test_save_and_load(self, vectorized, tmpdir):
+        old = build([("dir1/", None, None), ("dir1/file1", 3, "a"), ("dir1/file2", 3, "b")])
+        path = str(tmpdir.join("snapshot"))
+        old.save(path)
+        loaded = Snapshot.load(path)
+        assert_that([loaded.path(index) for index in range(len(loaded))], equal_to(["", "dir1/", "dir1/file1", "dir1/file2"]))
+        assert_that(diff(old, loaded), equal_to(([], [], [])))
+        new = build([("dir1/", None, None), ("dir1/file1", 3, "changed")])
+        assert_that(diff(loaded, new), equal_to(([], ["dir1/file2"], ["dir1/file1"])))
+        with pytest.raises(TypeError):
+            loaded.add(0, "file3")
+        loaded.close()
+
+    def test_load_maps_names(self, vectorized, tmpdir):
+        old = build([("каталог/", None, None), ("каталог/файл", 3, "a"), ("file1", 5, "b")])
+        path, copy = str(tmpdir.join("snapshot")), str(tmpdir.join("copy"))
+        old.save(path)
+        loaded = Snapshot.load(path)
+        assert_that(loaded.name_ids, equal_to(None))
+        assert_that(isinstance(loaded.blob, memoryview), equal_to(True))
+        loaded.save(copy)
+        loaded.close()
+        loaded = Snapshot.load(copy)
+        assert_that([loaded.path(index) for index in range(len(loaded))],
+                    equal_to(["", "каталог/", "каталог/файл", "file1"]))
+        assert_that(diff(old, loaded), equal_to(([], [], [])))
+        loaded.close()
+
+    def test_local_and_remote(self, dav, client, tmpdir, vectorized):
+        dav.tree("/tree", depth=2, width=2, files=2, size=10)
+        remote = client.snapshot("tree", jobs=2)
+        local = Snapshot.local(dav.local("/tree"))
+        assert_that(len(remote), equal_to(len(local)))
+        assert_that(diff(remote, local, compare=('kind', 'size')), equal_to(([], [], [])))
+
+        os.remove(dav.local("/tree/dir0/file0"))
+        with open(dav.local("/tree/file1"), 'wb') as f:
+            f.write(b"changed")
+        result = diff(remote, client.snapshot("tree"))
+        assert_that(result.removed, equal_to(["dir0/file0"]))
+        assert_that(result.changed, has_item("file1"))
@@ -0,0 +1,97 @@
+from collections import namedtuple
+from contextlib import contextmanager
+
+from webdav.client import Client
+from webdav.tracing import traced, start_request_span
+
+SpanContext = namedtuple('SpanContext', 'trace_id span_id trace_flags')
+
+
+class Span(object):
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.ended = False
+
+    def get_span_context(self):
+        return SpanContext(trace_id=0xabc, span_id=0x12, trace_flags=1)
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, error):
+        self.attributes['exception'] = error
+
+    def end(self):
+        self.ended = True
+
+
+class Tracer(object):
+
+    def __init__(self):
+        self.spans = list()
+
+    def start_span(self, name, attributes=None):
+        span = Span(name, attributes)
+        self.spans.append(span)
+        return span
+
+    @contextmanager
+    def start_as_current_span(self, name, attributes=None):
+        span = self.start_span(name, attributes)
+        yield span
+        span.end()
+
+
+class Operations(object):
+
+    webdav = Client({'webdav_hostname': "https://webdav.server.ru"}).webdav
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    @traced('download')
+    def download(self, remote_path, local_path, progress=None):
+        return remote_path
+
+
+class TestTracing:
+
+    def test_without_tracer_no_span_is_opened(self):
+        assert Operations(tracer=None).download("dir1/file1", "file1") == "dir1/file1"
+
+    def test_operation_opens_parent_span(self):
+        tracer = Tracer()
+        Operations(tracer).download("dir1/file1", local_path="file1")
+        (span,) = tracer.spans
+        assert span.name == 'download'
+        assert span.ended
+        assert span.attributes['webdav.remote_path'] == "dir1/file1"
+        assert span.attributes['webdav.local_path'] == "file1"
+
+    def test_request_span_injects_traceparent(self):
+        tracer = Tracer()
+        header = ["Accept: */*"]
+        options = {'URL': "https://webdav.server.ru/file1", 'CUSTOMREQUEST': "PROPFIND", 'HTTPHEADER': header}
+        span = start_request_span(tracer, options)
+        assert span.name == "HTTP PROPFIND"
+        assert options['HTTPHEADER'][-1] == "traceparent: 00-{0:032x}-{1:016x}-01".format(0xabc, 0x12)
+        assert header == ["Accept: */*"]
+
+    def test_client_requests_are_traced(self, dav, tmpdir):
+        dav.create("/file1", b"data")
+        tracer = Tracer()
+        client = Client(dav.options(), tracer=tracer)
+        client.download(remote_path="file1", local_path=str(tmpdir.join("file1")))
+
+        assert tracer.spans[0].name == 'download'
+        assert tracer.spans[0].attributes['webdav.remote_path'] == "file1"
+        (get,) = [span for span in tracer.spans if span.name == "HTTP GET"]
+        assert get.ended
+        assert get.attributes['http.url'].endswith("/file1")
+        assert get.attributes['http.status_code'] == 200
+        assert all(span.ended for span in tracer.spans)
+
+        (request,) = [request for request in dav.requests if request.method == "GET"]
+        assert request.headers.get('traceparent') == "00-{0:032x}-{1:016x}-01".format(0xabc, 0x12)
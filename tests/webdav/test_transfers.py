@@ -0,0 +1,297 @@
+import hashlib
+import json
+import os
+import tarfile
+from io import BytesIO
+
+import pytest
+from hamcrest import assert_that, equal_to, contains_inanyorder
+from proxy import Fault, FaultProxy
+from webdav.client import Client, Checksums, ChecksumMismatch, Journal, NotEnoughSpace, RemoteResourceNotFound
+from webdav.urn import Urn
+
+
+def read_tree(root):
+
+    contents = dict()
+    for (directory, _, file_names) in os.walk(root):
+        for file_name in file_names:
+            path = os.path.join(directory, file_name)
+            with open(path, 'rb') as f:
+                contents[os.path.relpath(path, root)] = f.read()
+    return contents
+
+
+class Progress(object):
+
+    def __init__(self):
+        self.calls = list()
+
+    def __call__(self, files_done, files_total, bytes_done, bytes_total):
+        self.calls.append((files_done, files_total, bytes_done, bytes_total))
+
+
+class TestTransfers:
+
+    def test_download_directory(self, dav, client, tmpdir):
+        dav.tree("/tree", depth=3, width=2, files=3, size=1000)
+        local_path = str(tmpdir.join("tree"))
+        progress = Progress()
+        client.download_directory(remote_path="tree", local_path=local_path, jobs=4, progress=progress)
+        assert_that(read_tree(local_path), equal_to(read_tree(dav.local("/tree"))))
+        assert_that(progress.calls[-1], equal_to((21, 21, 21000, 21000)))
+
+    def test_upload_directory(self, dav, client):
+        dav.tree("/source", depth=3, width=2, files=3)
+        client.upload_directory(remote_path="tree", local_path=dav.local("/source"), jobs=4)
+        assert_that(read_tree(dav.local("/tree")), equal_to(read_tree(dav.local("/source"))))
+
+    def test_segmented_download(self, dav, client, tmpdir):
+        data = os.urandom(100000)
+        dav.create("/file1", data)
+        local_path = str(tmpdir.join("file1"))
+        client.download(remote_path="file1", local_path=local_path, jobs=4, segment_size=16384)
+        assert_that(tmpdir.join("file1").read_binary(), equal_to(data))
+        ranges = [request for request in dav.requests if request.method == "GET"]
+        assert_that(len(ranges), equal_to(7))
+
+    def test_segmented_download_without_ranges(self, dav, client, tmpdir):
+        data = os.urandom(100000)
+        dav.create("/file1", data)
+        dav.ranges = False
+        client.download_files([("file1", str(tmpdir.join("file1")), len(data))], jobs=4, segment_size=16384)
+        assert_that(tmpdir.join("file1").read_binary(), equal_to(data))
+
+    def test_download_not_found(self, client, tmpdir):
+        with pytest.raises(RemoteResourceNotFound):
+            client.download_files([("file1", str(tmpdir.join("file1")))], jobs=2)
+
+    def test_push_and_pull(self, dav, client, tmpdir):
+        dav.tree("/dir1", depth=2, width=1, files=1)
+        local_path = tmpdir.mkdir("dir1")
+        local_path.join("file2").write_binary(b"data")
+        client.pull(remote_directory="dir1/", local_directory=str(local_path), jobs=4)
+        client.push(remote_directory="dir1/", local_directory=str(local_path), jobs=4)
+        assert_that(sorted(os.listdir(str(local_path.join("dir0")))), equal_to(["file0"]))
+        assert_that(client.list("dir1"), contains_inanyorder("dir0/", "file0", "file2"))
+
+    def test_push_after_remote_removal(self, dav, client, tmpdir):
+        local_path = tmpdir.mkdir("tree")
+        local_path.mkdir("dir0").mkdir("dir1").join("file1").write_binary(b"data")
+        dav.create("/tree/")
+        client.push(remote_directory="tree/", local_directory=str(local_path), jobs=2)
+        Client(dav.options()).clean("tree/dir0/")
+        client.push(remote_directory="tree/", local_directory=str(local_path), jobs=2)
+        assert_that(read_tree(dav.local("/tree")), equal_to(read_tree(str(local_path))))
+
+    def test_checksum_push_skips_unchanged(self, dav, client, tmpdir):
+        dav.create("/dir1/")
+        local_path = tmpdir.mkdir("dir1")
+        for name in ("file1", "file2", "file3"):
+            local_path.join(name).write_binary(name.encode() * 100)
+        checksums = Checksums(index=str(tmpdir.join("index.json")))
+        client.push(remote_directory="dir1/", local_directory=str(local_path), checksums=checksums)
+        digest = hashlib.sha256(b"file1" * 100).hexdigest()
+        assert_that(client.get_property("dir1/file1", checksums.option), equal_to(digest))
+
+        dav.reset()
+        local_path.join("file2").write_binary(b"changed")
+        client.push(remote_directory="dir1/", local_directory=str(local_path), checksums=checksums)
+        puts = [request.path for request in dav.requests if request.method == "PUT"]
+        assert_that(puts, equal_to(["/dir1/file2"]))
+        assert_that([request for request in dav.requests if request.method == "GET"], equal_to([]))
+        assert_that(open(dav.local("/dir1/file2"), 'rb').read(), equal_to(b"changed"))
+
+    def test_checksum_upload_directory_prunes(self, dav, client, tmpdir):
+        dav.tree("/dir1", depth=2, width=1, files=2)
+        local_path = tmpdir.mkdir("dir1")
+        local_path.join("file0").write_binary(b"data")
+        client.upload_directory(remote_path="dir1/", local_path=str(local_path), checksums=Checksums(), jobs=2)
+        assert_that(os.listdir(dav.local("/dir1")), equal_to(["file0"]))
+
+    def test_journal_resumes_download(self, dav, client, tmpdir):
+        data = os.urandom(10000)
+        dav.create("/dir1/file1", b"file1")
+        dav.create("/dir1/file2", data)
+        local_path = tmpdir.mkdir("dir1")
+        local_path.join("file1").write_binary(b"file1")
+        local_path.join("file2").write_binary(data[:4000])
+        local_path.join("stale").write_binary(b"stale")
+
+        journal = Journal(str(tmpdir.join("journal.sqlite")))
+        job = journal.job('download', "/dir1/", str(local_path))
+        job.plan([("/dir1/file1", str(local_path.join("file1")), 5, None),
+                  ("/dir1/file2", str(local_path.join("file2")), len(data), None)])
+        job.done("/dir1/file1")
+        job.start("/dir1/file2")
+        journal.close()
+
+        journal = Journal(str(tmpdir.join("journal.sqlite")))
+        dav.reset()
+        client.download_directory(remote_path="dir1/", local_path=str(local_path), journal=journal)
+        gets = [request for request in dav.requests if request.method == "GET"]
+        assert_that([request.path for request in gets], equal_to(["/dir1/file2"]))
+        assert_that(gets[0].headers.get('Range'), equal_to("bytes=4000-9999"))
+        assert_that(read_tree(str(local_path)), equal_to({"file1": b"file1", "file2": data}))
+        assert_that(journal.job('download', "/dir1/", str(local_path)).resumed, equal_to(False))
+
+    def test_journal_resume_without_ranges(self, dav, client, tmpdir):
+        data = os.urandom(10000)
+        dav.create("/file1", data)
+        dav.ranges = False
+        local_path = tmpdir.join("file1")
+        local_path.write_binary(data[:4000])
+        journal = Journal(str(tmpdir.join("journal.sqlite")))
+        job = journal.job('download', "/file1", str(local_path))
+        job.plan([("/file1", str(local_path), len(data), None)])
+        job.start("/file1")
+        client.download(remote_path="file1", local_path=str(local_path), journal=journal)
+        assert_that(local_path.read_binary(), equal_to(data))
+
+    def test_journal_upload_skips_done(self, dav, client, tmpdir):
+        dav.create("/dir1/file1", b"file1")
+        dav.create("/dir1/stale", b"stale")
+        local_path = tmpdir.mkdir("dir1")
+        local_path.join("file1").write_binary(b"file1")
+        local_path.join("file2").write_binary(b"file2")
+
+        journal = Journal(str(tmpdir.join("journal.sqlite")))
+        job = journal.job('upload', "/dir1/", str(local_path))
+        stat = os.stat(str(local_path.join("file1")))
+        job.plan([("/dir1/file1", str(local_path.join("file1")), stat.st_size, stat.st_mtime)])
+        job.done("/dir1/file1")
+
+        dav.reset()
+        client.upload_directory(remote_path="dir1/", local_path=str(local_path), journal=journal)
+        assert_that([request.path for request in dav.requests if request.method == "PUT"], equal_to(["/dir1/file2"]))
+        assert_that([request.path for request in dav.requests if request.method == "DELETE"], equal_to(["/dir1/stale"]))
+        assert_that(sorted(os.listdir(dav.local("/dir1"))), equal_to(["file1", "file2"]))
+
+    def test_atomic_upload_directory(self, dav, client, tmpdir):
+        local_path = tmpdir.mkdir("dir1")
+        local_path.join("file1").write_binary(b"file1")
+        local_path.join("file2").write_binary(b"file2")
+        local_path.mkdir("dir2").join("file3").write_binary(b"file3")
+        client.upload_directory(remote_path="dir1/", local_path=str(local_path), atomic=True)
+        assert_that(read_tree(dav.local("/dir1")), equal_to(read_tree(str(local_path))))
+
+        local_path.join("file1").remove()
+        local_path.join("file2").write_binary(b"changed")
+        local_path.join("file4").write_binary(b"file4")
+        dav.reset()
+        client.upload_directory(remote_path="dir1/", local_path=str(local_path), atomic=True, jobs=2)
+        methods = [(request.method, request.path.split("/")[-1]) for request in dav.requests]
+        assert_that([name for (method, name) in methods if method == "PUT"], contains_inanyorder("file2", "file4"))
+        assert_that([name for (method, name) in methods if method == "COPY"], equal_to(["file3"]))
+        assert_that([method for (method, _) in methods].count("MOVE"), equal_to(1))
+        assert_that(read_tree(dav.local("/dir1")), equal_to(read_tree(str(local_path))))
+        assert_that(os.listdir(dav.local("/")), equal_to(["dir1"]))
+
+    def test_atomic_upload_with_checksums(self, dav, client, tmpdir):
+        local_path = tmpdir.mkdir("dir1")
+        for name in ("file1", "file2", "file3"):
+            local_path.join(name).write_binary(name.encode() * 100)
+        checksums = Checksums(index=str(tmpdir.join("index.json")))
+        client.upload_directory(remote_path="dir1/", local_path=str(local_path), atomic=True, checksums=checksums)
+        assert_that([request.method for request in dav.requests].count("PROPFIND"), equal_to(1))
+
+        local_path.join("file2").write_binary(b"changed")
+        dav.reset()
+        client.upload_directory(remote_path="dir1/", local_path=str(local_path), atomic=True, checksums=checksums)
+        methods = [(request.method, request.path.split("/")[-1]) for request in dav.requests]
+        assert_that([name for (method, name) in methods if method == "PUT"], equal_to(["file2"]))
+        assert_that([name for (method, name) in methods if method == "COPY"], contains_inanyorder("file1", "file3"))
+        digest = hashlib.sha256(b"file1" * 100).hexdigest()
+        assert_that(client.get_property("dir1/file1", checksums.option), equal_to(digest))
+        assert_that(client.get_property("dir1/file2", checksums.option), equal_to(hashlib.sha256(b"changed").hexdigest()))
+
+    def test_atomic_upload_failure_keeps_old_tree(self, dav, tmpdir):
+        dav.create("/dir1/file1", b"old")
+        local_path = tmpdir.mkdir("dir1")
+        local_path.join("file1").write_binary(b"new" * 1000)
+        with FaultProxy(dav.url) as proxy:
+            proxy.faults['PUT'] = Fault(errors={507: 1.0})
+            with pytest.raises(NotEnoughSpace):
+                Client(dav.options(webdav_hostname=proxy.url)).upload_directory(
+                    remote_path="dir1/", local_path=str(local_path), atomic=True)
+        assert_that(read_tree(dav.local("/dir1")), equal_to({"file1": b"old"}))
+        assert_that(os.listdir(dav.local("/")), equal_to(["dir1"]))
+
+    def test_atomic_download_directory(self, dav, client, tmpdir):
+        dav.create("/dir1/file1", b"file1")
+        dav.create("/dir1/dir2/file2", b"file2")
+        local_path = tmpdir.join("dir1")
+        client.download_directory(remote_path="dir1/", local_path=str(local_path), atomic=True)
+        assert_that(read_tree(str(local_path)), equal_to(read_tree(dav.local("/dir1"))))
+        inode = os.stat(str(local_path.join("dir2", "file2"))).st_ino
+
+        with open(dav.local("/dir1/file1"), 'wb') as f:
+            f.write(b"changed")
+        local_path.join("stale").write_binary(b"stale")
+        dav.reset()
+        client.download_directory(remote_path="dir1/", local_path=str(local_path), atomic=True, jobs=2)
+        assert_that([request.path for request in dav.requests if request.method == "GET"], equal_to(["/dir1/file1"]))
+        assert_that(read_tree(str(local_path)), equal_to(read_tree(dav.local("/dir1"))))
+        assert_that(os.stat(str(local_path.join("dir2", "file2"))).st_ino, equal_to(inode))
+        assert_that(os.listdir(str(tmpdir)), equal_to(["dir1"]))
+
+    def test_checksum_index(self, tmpdir):
+        local_path = tmpdir.join("file1")
+        local_path.write_binary(b"data")
+        index = str(tmpdir.join("index.json"))
+        checksums = Checksums(index=index)
+        checksums.digests([str(local_path)])
+        checksums.save()
+        with open(index) as f:
+            files = json.load(f)['files']
+        assert_that(files[str(local_path)][2], equal_to(hashlib.sha256(b"data").hexdigest()))
+        files[str(local_path)][2] = "cached"
+        with open(index, 'w') as f:
+            json.dump({'algorithm': 'sha256', 'files': files}, f)
+        assert_that(Checksums(index=index).digests([str(local_path)]), equal_to({str(local_path): "cached"}))
+
+    def test_checksum_process_pool(self, tmpdir):
+        paths = list()
+        for index in range(3):
+            local_path = tmpdir.join("file{index}".format(index=index))
+            local_path.write_binary(os.urandom(1000))
+            paths.append(str(local_path))
+        checksums = Checksums(processes=2)
+        checksums.large_size = 1
+        digests = checksums.digests(paths)
+        expected = {path: hashlib.sha256(open(path, 'rb').read()).hexdigest() for path in paths}
+        assert_that(digests, equal_to(expected))
+
+    def test_checksum_mismatch(self, dav, client):
+        dav.create("/file1", b"data")
+        with pytest.raises(ChecksumMismatch):
+            client._verify_files([(Urn("file1"), hashlib.sha256(b"other").hexdigest())], 'sha256')
+
+    @pytest.mark.parametrize("compression", [None, 'gz'])
+    def test_tar_round_trip(self, dav, client, compression):
+        dav.tree("/tree", depth=3, width=2, files=3, size=1000)
+        dav.create("/tree/empty", b"")
+        archive = BytesIO()
+        client.download_tar("tree", archive, compression=compression, jobs=4)
+        with tarfile.open(fileobj=BytesIO(archive.getvalue())) as tar:
+            names = tar.getnames()
+            assert_that(tar.extractfile("dir1/file2").read(), equal_to(open(dav.local("/tree/dir1/file2"), 'rb').read()))
+        assert_that(names, equal_to(sorted(names)))
+        assert_that(len(names), equal_to(28))
+
+        archive.seek(0)
+        client.upload_tar("copy", archive, jobs=4)
+        assert_that(read_tree(dav.local("/copy")), equal_to(read_tree(dav.local("/tree"))))
+
+    def test_tar_small_buffer(self, dav, client):
+        dav.tree("/tree", depth=2, width=2, files=4, size=5000)
+        dav.create("/tree/dir0/large", os.urandom(20000))
+        archive = BytesIO()
+        client.download_tar("tree", archive, jobs=4, buffer_size=6000)
+        archive.seek(0)
+        client.upload_tar("copy/", archive, jobs=4, buffer_size=6000)
+        assert_that(read_tree(dav.local("/copy")), equal_to(read_tree(dav.local("/tree"))))
+
+    def test_tar_not_found(self, client):
+        with pytest.raises(RemoteResourceNotFound):
+            client.download_tar("tree", BytesIO())
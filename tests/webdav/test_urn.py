@@ -0,0 +1,25 @@
+import pytest
+from hamcrest import assert_that, equal_to
+from webdav.urn import Urn
+
+
+@pytest.mark.parametrize("path,directory,quoted,parent,filename", [
+    ("", False, "/", "/", "/"),
+    ("dir1/file1", False, "/dir1/file1", "/dir1/", "file1"),
+    ("dir1//dir2///", False, "/dir1/dir2/", "/dir1/", "dir2/"),
+    ("/dir1/./dir2", True, "/dir1/dir2/", "/dir1/", "dir2/"),
+    ("dir 1/file #1", False, "/dir%201/file%20%231", "/dir 1/", "file #1"),
+])
+def test_normalization(path, directory, quoted, parent, filename):
+    urn = Urn(path, directory=directory)
+    assert_that(urn.quote(), equal_to(quoted))
+    assert_that(urn.parent(), equal_to(parent))
+    assert_that(urn.filename(), equal_to(filename))
+
+
+def test_memo():
+    Urn.cache.clear()
+    first, second = Urn("dir1/file 1"), Urn("dir1/file 1")
+    assert_that(len(Urn.cache), equal_to(1))
+    assert_that(second.path(), equal_to(first.path()))
+    assert_that(Urn("dir1/file 1", directory=True).path(), equal_to("/dir1/file 1/"))
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from collections import Counter
+
+import pytest
+from hamcrest import assert_that, equal_to
+from webdav import inotify
+from webdav.client import WatchBatch, waves
+
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+
+def wait_for(condition, timeout=5):
+
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def watched(dav, client, tmpdir):
+
+    local = tmpdir.mkdir("local")
+    local.join("file1").write_binary(b"data")
+    batches, stop = Queue(), threading.Event()
+    thread = threading.Thread(target=client.watch_push, args=(str(local), "dir1/"),
+                              kwargs={'delay': 0.05, 'stop': stop, 'callback': batches.put})
+    thread.daemon = True
+    thread.start()
+    wait_for(lambda: os.path.exists(dav.local("/dir1/file1")))
+
+    def changed(operation):
+        dav.reset()
+        operation()
+        batches.get(timeout=5)
+        return Counter(request.method for request in dav.requests)
+
+    yield local, changed
+    stop.set()
+    thread.join(5)
+
+
+@pytest.mark.skipif(inotify.libc is None, reason="inotify is not available")
+class TestWatchPush:
+
+    def test_files(self, dav, watched):
+        local, changed = watched
+        changed(lambda: local.join("file2").write_binary(b"new"))
+        assert_that(open(dav.local("/dir1/file2"), 'rb').read(), equal_to(b"new"))
+
+        counter = changed(lambda: local.join("file2").rename(local.join("file3")))
+        assert_that(counter, equal_to(Counter(MOVE=1)))
+        assert_that(sorted(os.listdir(dav.local("/dir1"))), equal_to(["file1", "file3"]))
+
+        changed(lambda: local.join("file1").remove())
+        assert_that(os.listdir(dav.local("/dir1")), equal_to(["file3"]))
+
+    def test_directories(self, dav, watched):
+        local, changed = watched
+
+        def create():
+            local.mkdir("dir2").mkdir("dir3").join("file4").write_binary(b"four")
+        changed(create)
+        assert_that(open(dav.local("/dir1/dir2/dir3/file4"), 'rb').read(), equal_to(b"four"))
+
+        def rename():
+            local.join("dir2", "dir3", "file4").write_binary(b"changed")
+            local.join("dir2").rename(local.join("dir5"))
+        changed(rename)
+        assert_that(sorted(os.listdir(dav.local("/dir1"))), equal_to(["dir5", "file1"]))
+        assert_that(open(dav.local("/dir1/dir5/dir3/file4"), 'rb').read(), equal_to(b"changed"))
+
+        changed(lambda: local.join("dir5", "dir3", "file5").write_binary(b"five"))
+        assert os.path.exists(dav.local("/dir1/dir5/dir3/file5"))
+
+        changed(lambda: local.join("dir5").remove())
+        assert_that(os.listdir(dav.local("/dir1")), equal_to(["file1"]))
+
+    def test_moved_out_of_tree(self, dav, watched, tmpdir):
+        local, changed = watched
+        changed(lambda: local.join("file1").rename(tmpdir.join("file1")))
+        assert_that(os.listdir(dav.local("/dir1")), equal_to([]))
+
+
+class TestWatchBatch:
+
+    def test_new_file_moved(self):
+        batch = WatchBatch()
+        batch.put("/dir1/file1", "/local/file1")
+        batch.move("/dir1/file1", "/dir1/file2", "/local/file2")
+        assert_that(batch.files, equal_to({"/dir1/file2": "/local/file2"}))
+        assert_that(batch.deletes, equal_to({"/dir1/file1"}))
+        assert_that(batch.moves, equal_to([]))
+
+    def test_moves_chained_and_deleted(self):
+        batch = WatchBatch()
+        batch.move("/dir1/file1", "/dir1/file2", "/local/file2")
+        batch.move("/dir1/file2", "/dir1/file3", "/local/file3")
+        assert_that(batch.moves, equal_to([["/dir1/file1", "/dir1/file3", "/local/file3"]]))
+        batch.delete("/dir1/file3")
+        assert_that(batch.moves, equal_to([]))
+        assert_that(batch.deletes, equal_to({"/dir1/file1"}))
+
+    def test_delete_inside_moved_directory(self):
+        batch = WatchBatch()
+        batch.move("/dir1/dir2/", "/dir1/dir3/", "/local/dir3")
+        batch.delete("/dir1/dir3/file1")
+        batch.delete("/dir1/dir2/file1")
+        assert_that(batch.deletes, equal_to({"/dir1/dir2/file1"}))
+        assert_that(len(batch.moves), equal_to(1))
+
+    def test_waves(self):
+        moves = [["/a", "/b", None], ["/c/", "/d/", None], ["/b", "/e", None], ["/d/f", "/g", None]]
+        assert_that([len(wave) for wave in waves(moves)], equal_to([2, 2]))
@@ -1,22 +1,50 @@
 # -*- coding: utf-8
 
 import pycurl
+import calendar
+import gzip
+import hashlib
+import json
 import os
+import posixpath
+import random
 import shutil
+import sqlite3
+import tarfile
+import tempfile
 import threading
+import time
+import weakref
 import lxml.etree as etree
+from collections import deque
+from email.utils import formatdate, mktime_tz, parsedate_tz
+from fnmatch import fnmatchcase
+from functools import partial
 from io import BytesIO
-from re import sub
 from webdav.connection import *
 from webdav.exceptions import *
 from webdav.urn import Urn
+from webdav import inotify
+from webdav.snapshot import Snapshot, DIRECTORY, FILE
+from webdav.tracing import traced, request_method, start_request_span, end_request_span
 
 try:
-    from urllib.parse import unquote
+    from urllib.parse import unquote, urlparse
 except ImportError:
     from urllib import unquote
+    from urlparse import urlparse
 
-__version__ = "1.0.10-carlos"
+try:
+    from concurrent.futures import ProcessPoolExecutor
+except ImportError:
+    ProcessPoolExecutor = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from webdav import __version__
 
 
 def listdir(directory):
@@ -43,6 +71,748 @@ def add_options(request, options):
             raise OptionNotValid(key, value)
 
 
+def option_template(options):
+
+    # option names are resolved once, the template itself is shared by all requests and never changes
+    return tuple((pycurl.__dict__[key], key, value) for (key, value) in sorted(options.items()) if value is not None)
+
+
+def apply_template(request, template):
+
+    for (option, key, value) in template:
+        try:
+            request.setopt(option, value)
+        except (TypeError, pycurl.error):
+            raise OptionNotValid(key, value)
+
+
+class LocalFile(object):
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def write(self, data):
+        if self.file is None:
+            self.file = open(self.path, 'wb')
+        return self.file.write(data)
+
+    def close(self):
+        if self.file is None:
+            self.file = open(self.path, 'wb')
+        self.file.close()
+
+    def abort(self):
+        if self.file is not None:
+            self.file.close()
+
+
+class Segment(object):
+
+    def __init__(self, path, offset, length):
+        self.path = path
+        self.offset = offset
+        self.remaining = length
+        self.status = None
+        self.file = None
+
+    def header(self, line):
+        if line.startswith(b"HTTP/"):
+            self.status = int(line.split()[1])
+
+    def write(self, data):
+        # a server ignoring Range answers 200 with the whole body: abort instead of corrupting the file
+        if self.status != 206 or len(data) > self.remaining:
+            return 0
+        if self.file is None:
+            self.file = open(self.path, 'r+b')
+            self.file.seek(self.offset)
+        self.remaining -= len(data)
+        self.file.write(data)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+    abort = close
+
+
+class Transfers(object):
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.files_done = 0
+        self.files_total = 0
+        self.bytes_done = 0
+        self.bytes_total = 0
+        self.current = dict()
+
+    def add(self, size):
+        self.files_total += 1
+        self.bytes_total += size or 0
+
+    def update(self, key, transferred):
+        self.bytes_done += transferred - self.current.get(key, 0)
+        self.current[key] = transferred
+        self.report()
+
+    def finish(self, key, files=1):
+        self.current.pop(key, None)
+        self.files_done += files
+        self.report()
+
+    def report(self):
+        if self.callback:
+            self.callback(self.files_done, self.files_total, self.bytes_done, self.bytes_total)
+
+
+class TarMember(object):
+
+    def __init__(self, output, info):
+        self.output = output
+        self.info = info
+        self.buffer = list()
+        self.written = 0
+        self.direct = False
+
+    def write(self, data):
+
+        self.written += len(data)
+        if self.written > self.info.size:
+            # the resource has grown since it was listed, its header is already fixed
+            return 0
+        if self.direct:
+            self.output.write(data)
+        else:
+            self.buffer.append(data)
+
+    def emit(self):
+
+        self.output.write(self.info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape"))
+        for chunk in self.buffer:
+            self.output.write(chunk)
+        self.buffer = list()
+        self.direct = True
+
+    def close(self):
+        self.output.write(tarfile.NUL * (-self.info.size % tarfile.BLOCKSIZE))
+
+
+def tar_output(fileobj, compression=None):
+
+    if not compression:
+        return fileobj, (lambda: None)
+    if compression in ('gz', 'gzip'):
+        output = gzip.GzipFile(fileobj=fileobj, mode='wb')
+        return output, output.close
+    if compression in ('zst', 'zstd') and zstandard is not None:
+        output = zstandard.ZstdCompressor().stream_writer(fileobj)
+        return output, partial(output.flush, zstandard.FLUSH_FRAME)
+    raise OptionNotValid(name="compression", value=compression)
+
+
+def tar_input(fileobj, compression=None):
+
+    if compression in ('zst', 'zstd') and zstandard is not None:
+        return tarfile.open(fileobj=zstandard.ZstdDecompressor().stream_reader(fileobj), mode='r|')
+    if compression and compression not in ('gz', 'gzip'):
+        raise OptionNotValid(name="compression", value=compression)
+    return tarfile.open(fileobj=fileobj, mode='r|*')
+
+
+def file_digest(local_path, algorithm='sha256'):
+
+    digest = hashlib.new(algorithm)
+    with open(local_path, 'rb') as local_file:
+        for chunk in iter(partial(local_file.read, 1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Checksums(object):
+
+    namespace = "https://github.com/designerror/webdavclient"
+    large_size = 8 * 1024 * 1024
+
+    def __init__(self, index=None, algorithm='sha256', store=True, verify=False, processes=None):
+        self.index = index and os.path.expanduser(index)
+        self.algorithm = algorithm
+        self.store = store
+        self.verify = verify
+        self.processes = processes
+        self.entries = dict()
+
+        if self.index and os.path.exists(self.index):
+            with open(self.index) as f:
+                content = json.load(f)
+            if content.get('algorithm') == algorithm:
+                self.entries = content.get('files', dict())
+
+    @property
+    def option(self):
+        return {'namespace': self.namespace, 'name': self.algorithm}
+
+    def digests(self, local_paths):
+
+        digests, large = dict(), list()
+        for local_path in local_paths:
+            stat = os.stat(local_path)
+            key = os.path.abspath(local_path)
+            entry = self.entries.get(key)
+            if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime:
+                digests[local_path] = entry[2]
+                continue
+            if stat.st_size >= self.large_size and ProcessPoolExecutor is not None:
+                large.append((local_path, stat))
+                continue
+            digests[local_path] = file_digest(local_path, self.algorithm)
+            self.entries[key] = [stat.st_size, stat.st_mtime, digests[local_path]]
+
+        if len(large) > 1:
+            # hashing large files in other processes keeps the GIL out of the way
+            with ProcessPoolExecutor(self.processes) as pool:
+                paths = [local_path for (local_path, _) in large]
+                found = list(pool.map(file_digest, paths, [self.algorithm] * len(paths)))
+        else:
+            found = [file_digest(local_path, self.algorithm) for (local_path, _) in large]
+
+        for ((local_path, stat), digest) in zip(large, found):
+            digests[local_path] = digest
+            self.entries[os.path.abspath(local_path)] = [stat.st_size, stat.st_mtime, digest]
+
+        return digests
+
+    def save(self):
+
+        if not self.index:
+            return
+        temporary = "{index}.tmp".format(index=self.index)
+        with open(temporary, 'w') as f:
+            json.dump({'algorithm': self.algorithm, 'files': self.entries}, f)
+        try:
+            os.replace(temporary, self.index)
+        except AttributeError:
+            if os.path.exists(self.index):
+                os.remove(self.index)
+            os.rename(temporary, self.index)
+
+
+class Journal(object):
+
+    schema = (
+        "CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY, kind TEXT, remote TEXT, local TEXT,"
+        " finished INTEGER DEFAULT 0, UNIQUE (kind, remote, local))",
+        "CREATE TABLE IF NOT EXISTS items (job INTEGER, remote TEXT, local TEXT, size INTEGER, mtime REAL,"
+        " state TEXT, PRIMARY KEY (job, remote))",
+    )
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        # every state change is committed at once, the write-ahead log keeps that cheap
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in Journal.schema:
+            self.execute(statement)
+
+    def execute(self, statement, parameters=(), many=False):
+        with self.lock:
+            with self.connection:
+                if many:
+                    return self.connection.executemany(statement, parameters).fetchall()
+                return self.connection.execute(statement, parameters).fetchall()
+
+    def job(self, kind, remote_path, local_path):
+
+        local_path = os.path.abspath(local_path)
+        rows = self.execute("SELECT id, finished FROM jobs WHERE kind = ? AND remote = ? AND local = ?",
+                            (kind, remote_path, local_path))
+        if not rows:
+            self.execute("INSERT INTO jobs (kind, remote, local) VALUES (?, ?, ?)", (kind, remote_path, local_path))
+            rows = self.execute("SELECT id, finished FROM jobs WHERE kind = ? AND remote = ? AND local = ?",
+                                (kind, remote_path, local_path))
+        id, finished = rows[0]
+        if finished:
+            self.execute("UPDATE jobs SET finished = 0 WHERE id = ?", (id,))
+        return JournalJob(self, id)
+
+    def close(self):
+        self.connection.close()
+
+
+class JournalJob(object):
+
+    def __init__(self, journal, id):
+        self.journal = journal
+        self.id = id
+        rows = journal.execute("SELECT remote, local, size, mtime, state FROM items WHERE job = ?", (id,))
+        self.items = {remote: [local, size, mtime, state] for (remote, local, size, mtime, state) in rows}
+
+    @property
+    def resumed(self):
+        return bool(self.items)
+
+    def state(self, remote_path):
+        item = self.items.get(remote_path)
+        return item[3] if item else None
+
+    def plan(self, entries):
+
+        # an item keeps its state only while it still stands for the same file
+        states, rows = list(), list()
+        for (remote_path, local_path, size, mtime) in entries:
+            item = self.items.get(remote_path)
+            if item is None or item[:3] != [local_path, size, mtime]:
+                item = self.items[remote_path] = [local_path, size, mtime, 'planned']
+                rows.append((self.id, remote_path, local_path, size, mtime, 'planned'))
+            states.append(item[3])
+
+        self.journal.execute("INSERT OR REPLACE INTO items (job, remote, local, size, mtime, state) VALUES (?, ?, ?, ?, ?, ?)",
+                             rows, many=True)
+        return states
+
+    def mark(self, remote_path, state):
+
+        item = self.items.get(remote_path)
+        if item is None or item[3] == state:
+            return
+        item[3] = state
+        self.journal.execute("UPDATE items SET state = ? WHERE job = ? AND remote = ?", (state, self.id, remote_path))
+
+    def start(self, remote_path):
+        self.mark(remote_path, 'active')
+
+    def done(self, remote_path):
+        self.mark(remote_path, 'done')
+
+    def finish(self):
+
+        self.journal.execute("DELETE FROM items WHERE job = ?", (self.id,))
+        self.journal.execute("UPDATE jobs SET finished = 1 WHERE id = ?", (self.id,))
+        self.items = dict()
+
+
+class ConnectionStats(object):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connects = 0
+        self.handshakes = 0
+        self.connect_time = 0.0
+        self.handshake_time = 0.0
+
+    def add(self, request):
+
+        connects = request.getinfo(pycurl.NUM_CONNECTS)
+        connect = request.getinfo(pycurl.CONNECT_TIME)
+        handshake = request.getinfo(pycurl.APPCONNECT_TIME)
+
+        with self.lock:
+            self.requests += 1
+            if not connects:
+                return
+            self.connects += connects
+            self.connect_time += connect
+            if handshake:
+                self.handshakes += 1
+                self.handshake_time += handshake - connect
+
+    @property
+    def reused(self):
+        return max(self.requests - self.connects, 0)
+
+    @property
+    def saved(self):
+        # every reused connection skipped a DNS lookup, a TCP connect and a TLS handshake on average
+        if not self.connects:
+            return 0.0
+        return self.reused * (self.connect_time + self.handshake_time) / self.connects
+
+    def snapshot(self):
+
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'connects': self.connects,
+                'handshakes': self.handshakes,
+                'connect_time': self.connect_time,
+                'handshake_time': self.handshake_time,
+                'reused': self.reused,
+                'saved': self.saved,
+            }
+
+
+class Endpoints(object):
+
+    decay = 0.3
+
+    def __init__(self, urls, balance=None):
+        self.lock = threading.Lock()
+        self.urls = list(urls)
+        self.balance = balance or 'outstanding'
+        self.outstanding = dict.fromkeys(self.urls, 0)
+        self.latency = dict.fromkeys(self.urls, 0.0)
+        self.ejected = set()
+        self.stopped = threading.Event()
+
+    def cost(self, url):
+
+        # an endpoint without a measured latency yet gets tried first
+        if self.balance == 'latency':
+            return self.latency[url] * (self.outstanding[url] + 1)
+        return self.outstanding[url]
+
+    def choose(self, exclude=()):
+
+        with self.lock:
+            # ejected endpoints are still better than no endpoint at all
+            candidates = [url for url in self.urls if url not in exclude]
+            candidates = [url for url in candidates if url not in self.ejected] or candidates
+            if not candidates:
+                return None
+            lowest = min(self.cost(url) for url in candidates)
+            url = random.choice([url for url in candidates if self.cost(url) == lowest])
+            self.outstanding[url] += 1
+            return url
+
+    def finish(self, url, latency=None, failed=False):
+
+        with self.lock:
+            self.outstanding[url] -= 1
+            if failed:
+                self.ejected.add(url)
+                return
+            self.ejected.discard(url)
+            if latency:
+                previous = self.latency[url]
+                self.latency[url] = previous + Endpoints.decay * (latency - previous) if previous else latency
+
+    def update(self, healthy):
+
+        with self.lock:
+            for (url, ok) in healthy.items():
+                if ok:
+                    self.ejected.discard(url)
+                else:
+                    self.ejected.add(url)
+
+    def close(self):
+        self.stopped.set()
+
+
+def check_health(reference, stopped, interval):
+
+    # the thread only holds a weak reference, it ends with the client
+    while not stopped.wait(interval):
+        client = reference()
+        if client is None:
+            return
+        client._check_endpoints()
+        del client
+
+
+info_attributes = {
+    'created': ".//{DAV:}creationdate",
+    'name': ".//{DAV:}displayname",
+    'size': ".//{DAV:}getcontentlength",
+    'modified': ".//{DAV:}getlastmodified"
+}
+
+
+def parse_response(response, prefix):
+
+    href = response.findtext("{DAV:}href", "")
+    path = unquote(urlparse(href).path if "://" in href else href)
+    if prefix and path.startswith(prefix):
+        path = path[len(prefix):] or Urn.separate
+    is_dir = response.find(".//{DAV:}resourcetype/{DAV:}collection") is not None
+    if is_dir and not path.endswith(Urn.separate):
+        path = "{path}{sep}".format(path=path, sep=Urn.separate)
+    return path, is_dir
+
+
+def parse_responses(content, root):
+
+    prefix = unquote(root)
+    responses = list()
+
+    try:
+        tree = etree.fromstring(content)
+    except etree.XMLSyntaxError:
+        return responses
+
+    for response in tree.findall("{DAV:}response"):
+        path, is_dir = parse_response(response, prefix)
+        responses.append((path, is_dir, response))
+
+    return responses
+
+
+class ResponseStream(object):
+
+    def __init__(self):
+        self.parser = etree.XMLPullParser(events=('end',), tag="{DAV:}response")
+        self.failed = False
+
+    def write(self, data):
+        if self.failed:
+            return
+        try:
+            self.parser.feed(data)
+        except etree.XMLSyntaxError:
+            self.failed = True
+
+    def read(self):
+
+        if self.failed:
+            return
+        for (_, response) in self.parser.read_events():
+            yield response
+            # drop what has been handed out so a long multistatus is parsed in constant memory
+            response.clear()
+            while response.getprevious() is not None:
+                del response.getparent()[0]
+
+
+def timestamp(value):
+
+    if hasattr(value, 'utctimetuple'):
+        if value.tzinfo is None:
+            return time.mktime(value.timetuple())
+        return calendar.timegm(value.utctimetuple())
+    return float(value)
+
+
+def parse_size(response):
+
+    size = response.findtext(".//{DAV:}getcontentlength")
+    return int(size) if size else None
+
+
+def parse_modified(response):
+
+    date = parsedate_tz(response.findtext(".//{DAV:}getlastmodified") or "")
+    return mktime_tz(date) if date else None
+
+
+def parse_info(response):
+    return {name: response.findtext(xpath) for (name, xpath) in info_attributes.items()}
+
+
+def property_tag(option):
+
+    namespace = option.get('namespace', "")
+    if not namespace:
+        return option['name']
+    return "{{{namespace}}}{name}".format(namespace=namespace, name=option['name'])
+
+
+tag_options = [
+    {'namespace': "http://calendarserver.org/ns/", 'name': "getctag"},
+    {'namespace': "DAV:", 'name': "getetag"},
+    {'namespace': "DAV:", 'name': "getcontentlength"},
+    {'namespace': "DAV:", 'name': "getlastmodified"},
+]
+
+
+def resource_tag(response, is_dir):
+
+    ctag, etag, size, modified = parse_properties(response, tag_options)
+    if is_dir:
+        # without getctag or a collection ETag a collection is always looked into
+        return ctag or etag or None
+    return etag or "{size}-{modified}".format(size=size, modified=modified)
+
+
+def successful(propstat):
+
+    status = propstat.findtext("{DAV:}status", "").split()
+    return len(status) > 1 and status[1].startswith("2")
+
+
+def parse_properties(response, options):
+
+    propstats = [propstat for propstat in response.findall("{DAV:}propstat") if successful(propstat)]
+
+    values = list()
+    for option in options:
+        value = None
+        for propstat in propstats:
+            node = propstat.find("{{DAV:}}prop/{tag}".format(tag=property_tag(option)))
+            if node is not None:
+                value = node.text or ""
+                break
+        values.append(value)
+    return values
+
+
+def local_tree(local_directory, urn):
+
+    directories, files = list(), list()
+    for (directory, _, file_names) in os.walk(local_directory):
+        relative = os.path.relpath(directory, local_directory)
+        if relative == os.curdir:
+            remote_directory = urn.path()
+        else:
+            remote_directory = "{parent}{relative}{sep}".format(
+                parent=urn.path(), relative=relative.replace(os.path.sep, Urn.separate), sep=Urn.separate)
+        directories.append(remote_directory)
+        for file_name in file_names:
+            files.append(("{parent}{name}".format(parent=remote_directory, name=file_name), os.path.join(directory, file_name)))
+    return directories, files
+
+
+def below(path, prefix):
+
+    path, prefix = path.rstrip(Urn.separate), prefix.rstrip(Urn.separate)
+    return path == prefix or path.startswith(prefix + Urn.separate)
+
+
+def rebase(path, source, target):
+    return target.rstrip(Urn.separate) + path[len(source.rstrip(Urn.separate)):]
+
+
+def lineage(path):
+
+    path = path.rstrip(Urn.separate)
+    paths = [path]
+    while Urn.separate in path.strip(Urn.separate):
+        path = path.rsplit(Urn.separate, 1)[0]
+        paths.append(path)
+    return paths
+
+
+def waves(moves):
+
+    # moves touching the same subtree keep their order, the others run concurrently
+    result, touched, ancestors = list(), set(), set()
+    for move in moves:
+        paths = [move[0].rstrip(Urn.separate), move[1].rstrip(Urn.separate)]
+        if not result or any(path in ancestors or touched.intersection(lineage(path)) for path in paths):
+            result.append(list())
+            touched, ancestors = set(), set()
+        result[-1].append(move)
+        for path in paths:
+            touched.add(path)
+            ancestors.update(lineage(path))
+    return result
+
+
+class WatchBatch(object):
+
+    def __init__(self):
+        self.deletes = set()
+        self.moves = list()
+        self.directories = set()
+        self.files = dict()
+        self.sources = dict()
+        self.rescan = False
+
+    def __len__(self):
+        return len(self.deletes) + len(self.moves) + len(self.directories) + len(self.files) + len(self.sources) + int(self.rescan)
+
+    def put(self, remote_path, local_path):
+        self.files[remote_path] = local_path
+
+    def create(self, remote_path, local_path):
+
+        if not os.path.isdir(local_path):
+            self.put(remote_path, local_path)
+            return
+        directories, files = local_tree(local_path, Urn(remote_path, directory=True))
+        self.directories.update(directories)
+        self.files.update(files)
+
+    def drop(self, remote_path):
+
+        for path in [path for path in self.files if below(path, remote_path)]:
+            del self.files[path]
+        self.directories = set(path for path in self.directories if not below(path, remote_path))
+
+    def delete(self, remote_path):
+
+        self.drop(remote_path)
+        for move in reversed(list(self.moves)):
+            source, target, _ = move
+            if below(remote_path, target):
+                # deletes run before moves, so it is deleted where it was moved from
+                if remote_path.rstrip(Urn.separate) == target.rstrip(Urn.separate):
+                    self.moves.remove(move)
+                remote_path = rebase(remote_path, target, source)
+            elif below(remote_path, source):
+                # after the move only what this batch created was there
+                return
+        self.deletes.add(remote_path)
+
+    def move(self, source, target, local_path):
+
+        if source in self.files or source in self.directories:
+            # not on the server yet, or changed since: it is sent again under the new name
+            self.delete(source)
+            self.create(target, local_path)
+            return
+
+        for move in self.moves:
+            if move[1] == source:
+                move[1], move[2] = target, local_path
+                break
+        else:
+            self.moves.append([source, target, local_path])
+
+        for path in [path for path in self.files if below(path, source)]:
+            del self.files[path]
+            relative = path[len(source):].replace(Urn.separate, os.path.sep)
+            self.files[rebase(path, source, target)] = os.path.join(local_path, relative)
+        self.directories = set(rebase(path, source, target) if below(path, source) else path for path in self.directories)
+
+
+def local_path_of(remote_path, urn, local_directory):
+
+    relative = remote_path[len(urn.path()):]
+    return os.path.join(local_directory, relative.replace(Urn.separate, os.path.sep))
+
+
+def unchanged_local(local_path, size, modified):
+
+    # a local copy is current when it has the remote size and was written after the remote one changed
+    if modified is None or not os.path.isfile(local_path):
+        return False
+    stat = os.stat(local_path)
+    return stat.st_size == size and stat.st_mtime >= modified
+
+
+def unchanged_remote(local_path, size, modified):
+
+    # HTTP dates have whole seconds
+    stat = os.stat(local_path)
+    return modified is not None and stat.st_size == size and modified >= int(stat.st_mtime)
+
+
+def link_or_copy(source, target):
+
+    try:
+        os.link(source, target)
+    except (OSError, AttributeError):
+        shutil.copy2(source, target)
+
+
+def replace_directory(source, target):
+
+    if not os.path.lexists(target):
+        os.rename(source, target)
+        return
+
+    retired = "{source}.old".format(source=source)
+    os.rename(target, retired)
+    os.rename(source, target)
+    if os.path.isdir(retired) and not os.path.islink(retired):
+        shutil.rmtree(retired)
+    else:
+        os.remove(retired)
+
+
 def get_options(type, from_options):
 
     _options = dict()
@@ -63,6 +833,21 @@ class Client(object):
 
     root = '/'
     large_size = 2 * 1024 * 1024 * 1024
+    pool_size = 8
+    jobs = 4
+    streams = 100
+    buffer_size = 64 * 1024 * 1024
+    health_interval = 5
+    health_timeout = 2000
+    watch_delay = 0.2
+    watch_limit = 1.0
+
+    reads = {"GET", "HEAD", "PROPFIND", "SEARCH", "OPTIONS"}
+    transient = {
+        pycurl.E_COULDNT_RESOLVE_HOST, pycurl.E_COULDNT_CONNECT, pycurl.E_SSL_CONNECT_ERROR,
+        pycurl.E_OPERATION_TIMEDOUT, pycurl.E_GOT_NOTHING, pycurl.E_SEND_ERROR, pycurl.E_RECV_ERROR,
+        pycurl.E_PARTIAL_FILE
+    }
 
     http_header = {
         'list': ["Accept: */*", "Depth: 1"],
@@ -72,26 +857,16 @@ class Client(object):
         'mkdir': ["Accept: */*", "Connection: Keep-Alive"],
         'clean': ["Accept: */*", "Connection: Keep-Alive"],
         'check': ["Accept: */*"],
-        'info': ["Accept: */*", "Depth: 1"],
-        'get_metadata': ["Accept: */*", "Depth: 1", "Content-Type: application/x-www-form-urlencoded"],
-        'set_metadata': ["Accept: */*", "Depth: 1", "Content-Type: application/x-www-form-urlencoded"]
+        'info': ["Accept: */*", "Depth: 0"],
+        'find': ["Accept: */*", "Depth: infinity", "Content-Type: text/xml"],
+        'crawl': ["Accept: */*", "Depth: 1", "Content-Type: text/xml"],
+        'search': ["Accept: */*", "Content-Type: text/xml"],
+        'get_metadata': ["Accept: */*", "Depth: 0", "Content-Type: text/xml"],
+        'set_metadata': ["Accept: */*", "Content-Type: text/xml"]
     }
 
     def get_header(self, method):
-
-        if method in Client.http_header:
-            try:
-                header = Client.http_header[method].copy()
-            except AttributeError:
-                header = Client.http_header[method][:]
-        else:
-            header = list()
-
-        if self.webdav.token:
-            webdav_token = "Authorization: OAuth {token}".format(token=self.webdav.token)
-            header.append(webdav_token)
-
-        return header
+        return list(self.headers.get(method, self.auth_header))
 
     requests = {
         'copy': "COPY",
@@ -102,6 +877,10 @@ class Client(object):
         'list': "PROPFIND",
         'free': "PROPFIND",
         'info': "PROPFIND",
+        'find': "PROPFIND",
+        'crawl': "PROPFIND",
+        'search': "SEARCH",
+        'options': "OPTIONS",
         'publish': "PROPPATCH",
         'unpublish': "PROPPATCH",
         'published': "PROPPATCH",
@@ -113,20 +892,104 @@ class Client(object):
         'https://webdav.yandex.ru': "urn:yandex:disk:meta",
     }
 
-    def __init__(self, options):
+    def __init__(self, options, tracer=None):
 
         webdav_options = get_options(type=WebDAVSettings, from_options=options)
         proxy_options = get_options(type=ProxySettings, from_options=options)
 
         self.webdav = WebDAVSettings(webdav_options)
         self.proxy = ProxySettings(proxy_options)
+        self.base_url = "{hostname}{root}".format(hostname=self.webdav.hostname, root=self.webdav.root)
 
         # ver __del__
         # se inicializa automaticamente la primera vez que usa libcurl
         # ver https://curl.haxx.se/libcurl/c/libcurl.html#GLOBAL 
         #pycurl.global_init(pycurl.GLOBAL_DEFAULT)
 
-        self.default_options = {}
+        # handles share the DNS cache and TLS sessions, pycurl locks the share for threads; libcurl does not
+        # support sharing connections between threads, so those stay with a handle or a thread's multi handle
+        self.share = pycurl.CurlShare()
+        self.share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_DNS)
+        self.share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_SSL_SESSION)
+        self.local = threading.local()
+        self.stats = ConnectionStats()
+
+        # without ALPN h2 the server is talked to over HTTP/1.1 as before
+        self.http2 = self.webdav.http2 and bool(pycurl.version_info()[4] & pycurl.VERSION_HTTP2)
+        if self.http2:
+            self.jobs = Client.streams
+
+        self.default_options = self.connection_options()
+        self.template = option_template(self.default_options)
+
+        auth = ["Authorization: OAuth {token}".format(token=self.webdav.token)] if self.webdav.token else []
+        self.auth_header = tuple(auth)
+        self.headers = {method: tuple(header + auth) for (method, header) in Client.http_header.items()}
+
+        self.tracer = tracer
+
+        self.handles = list()
+        self.handles_lock = threading.Lock()
+        self.dasl = None
+        self.collections = {Urn.separate}
+        self.collections_lock = threading.Lock()
+
+        # reads are spread over the replicas, everything else goes to hostname
+        self.endpoints = None
+        if self.webdav.replicas:
+            replicas = ["{hostname}{root}".format(hostname=replica, root=self.webdav.root) for replica in self.webdav.replicas]
+            self.endpoints = Endpoints([self.base_url] + replicas, balance=self.webdav.balance)
+            arguments = (weakref.ref(self), self.endpoints.stopped, Client.health_interval)
+            thread = threading.Thread(target=check_health, args=arguments)
+            thread.daemon = True
+            thread.start()
+
+    def connection_options(self):
+
+        options = {
+            'URL': self.webdav.hostname,
+            'NOBODY': 1,
+            'NOSIGNAL': 1,
+            'SSLVERSION': pycurl.SSLVERSION_TLSv1_2,
+        }
+
+        if self.http2:
+            options['HTTP_VERSION'] = pycurl.CURL_HTTP_VERSION_2TLS
+            options['PIPEWAIT'] = 1
+
+        if not self.webdav.token:
+            options['USERPWD'] = '{login}:{password}'.format(login=self.webdav.login, password=self.webdav.password)
+
+        if self.proxy.valid():
+            if self.proxy.hostname:
+                options['PROXY'] = self.proxy.hostname
+
+            if self.proxy.login:
+                if not self.proxy.password:
+                    options['PROXYUSERNAME'] = self.proxy.login
+                else:
+                    proxy_token = '{login}:{password}'.format(login=self.proxy.login, password=self.proxy.password)
+                    options['PROXYUSERPWD'] = proxy_token
+
+        if self.webdav.cert_path:
+            options['SSLCERT'] = self.webdav.cert_path
+
+        if self.webdav.key_path:
+            options['SSLKEY'] = self.webdav.key_path
+
+        if self.webdav.recv_speed:
+            options['MAX_RECV_SPEED_LARGE'] = self.webdav.recv_speed
+
+        if self.webdav.send_speed:
+            options['MAX_SEND_SPEED_LARGE'] = self.webdav.send_speed
+
+        if self.webdav.verbose:
+            options['VERBOSE'] = self.webdav.verbose
+
+        if self.webdav.conn_timeout:
+            options['CONNECTTIMEOUT_MS'] = self.webdav.conn_timeout
+
+        return options
 
     def __del__(self):
         # Comento cleanup porque me trae problemas con la libreria gcloud de google
@@ -140,63 +1003,205 @@ class Client(object):
         # ssl.SSLError: ('failed to allocate SSL context',)
 
         #pycurl.global_cleanup()
-        pass
+        if getattr(self, 'endpoints', None) is not None:
+            self.endpoints.close()
 
     def valid(self):
         return True if self.webdav.valid() and self.proxy.valid() else False
 
-    def Request(self, options=None):
+    def Request(self, options=None, route=True):
 
-        curl = pycurl.Curl()
+        with self.handles_lock:
+            curl = self.handles.pop() if self.handles else None
 
-        self.default_options.update({
-            'URL': self.webdav.hostname,
-            'NOBODY': 1,
-            'SSLVERSION': pycurl.SSLVERSION_TLSv1,
-        })
+        if curl is None:
+            # a handle keeps its share across resets
+            curl = pycurl.Curl()
+            curl.setopt(pycurl.SHARE, self.share)
 
-        if not self.webdav.token:
-            server_token = '{login}:{password}'.format(login=self.webdav.login, password=self.webdav.password)
-            self.default_options.update({
-                'USERPWD': server_token,
-            })
+        apply_template(curl, self.template)
 
-        if self.proxy.valid():
-            if self.proxy.hostname:
-                self.default_options['PROXY'] = self.proxy.hostname
+        if options and route and self.endpoints is not None:
+            options = self._route(curl, options)
 
-            if self.proxy.login:
-                if not self.proxy.password:
-                    self.default_options['PROXYUSERNAME'] = self.proxy.login
-                else:
-                    proxy_token = '{login}:{password}'.format(login=self.proxy.login, password=self.proxy.password)
-                    self.default_options['PROXYUSERPWD'] = proxy_token
+        if options and self.tracer is not None:
+            options = dict(options)
+            curl.span = start_request_span(self.tracer, options)
 
-        if self.webdav.cert_path:
-            self.default_options['SSLCERT'] = self.webdav.cert_path
+        if options:
+            add_options(curl, options)
 
-        if self.webdav.key_path:
-            self.default_options['SSLKEY'] = self.webdav.key_path
+        return curl
 
-        if self.webdav.recv_speed:
-            self.default_options['MAX_RECV_SPEED_LARGE'] = self.webdav.recv_speed
+    def _route(self, request, options):
 
-        if self.webdav.send_speed:
-            self.default_options['MAX_SEND_SPEED_LARGE'] = self.webdav.send_speed
+        url = options.get('URL')
+        if not url or not url.startswith(self.base_url) or request_method(options) not in Client.reads:
+            return options
 
-        if self.webdav.verbose:
-            self.default_options['VERBOSE'] = self.webdav.verbose
+        endpoint = self.endpoints.choose()
+        path = url[len(self.base_url):]
+        request.endpoint = endpoint
+        request.route = (path, options.get('WRITEDATA'), {endpoint})
+        return dict(options, URL=endpoint + path)
+
+    def _retry(self, request, error):
+
+        if not hasattr(request, 'endpoint'):
+            return False
+
+        if error is not None:
+            failed = error.args[0] in Client.transient
+        else:
+            failed = int(request.getinfo(pycurl.HTTP_CODE)) in (502, 503, 504)
+        if not failed:
+            return False
+
+        path, data, tried = request.route
+        self.endpoints.finish(request.endpoint, failed=True)
+        del request.endpoint
+
+        # a response already handed to a writer that cannot be rewound is not read twice
+        if request.getinfo(pycurl.SIZE_DOWNLOAD_T):
+            if not hasattr(data, 'truncate'):
+                return False
+            data.seek(0)
+            data.truncate()
+
+        endpoint = self.endpoints.choose(exclude=tried)
+        if endpoint is None:
+            return False
+
+        tried.add(endpoint)
+        request.endpoint = endpoint
+        request.setopt(pycurl.URL, endpoint + path)
+        return True
+
+    def _check_endpoints(self):
+
+        def probe(url):
+            options = {
+                'URL': url + Urn.separate,
+                'CUSTOMREQUEST': Client.requests['options'],
+                'HTTPHEADER': self.get_header('options'),
+                'TIMEOUT_MS': Client.health_timeout
+            }
+            return url, self.Request(options=options, route=False)
+
+        probes = [probe(url) for url in self.endpoints.urls]
+        healthy = dict()
+        for (url, request, error) in self.perform_many(probes, jobs=len(probes)):
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+            healthy[url] = error is None and 0 < code < 500
+        self.endpoints.update(healthy)
+
+    def perform(self, request):
+
+        while True:
+            try:
+                request.perform()
+            except pycurl.error as e:
+                if e.args[0] != pycurl.E_HTTP_RETURNED_ERROR:
+                    if self._retry(request, e):
+                        continue
+                    if self.tracer is not None and hasattr(request, 'span'):
+                        end_request_span(request.span, request, error=e)
+                    raise
+            if not self._retry(request, None):
+                break
+
+        if self.tracer is not None and hasattr(request, 'span'):
+            end_request_span(request.span, request)
+
+    def release(self, request):
+
+        self.stats.add(request)
+
+        if hasattr(request, 'endpoint'):
+            self.endpoints.finish(request.endpoint, latency=request.getinfo(pycurl.STARTTRANSFER_TIME))
+            del request.endpoint
+
+        if hasattr(request, 'route'):
+            del request.route
+
+        if hasattr(request, 'span'):
+            del request.span
+
+        request.reset()
+        with self.handles_lock:
+            if len(self.handles) < Client.pool_size:
+                self.handles.append(request)
+                return
+
+        request.close()
+
+    def perform_many(self, requests, jobs=None, ticks=False):
+
+        if not callable(requests):
+            requests = partial(next, iter(requests), None)
 
-        if self.webdav.conn_timeout:
-            self.default_options['CONNECTTIMEOUT_MS'] = self.webdav.conn_timeout
-        
-        if self.default_options:
-            add_options(curl, self.default_options)
+        jobs = jobs or self.jobs
+        active = dict()
 
-        if options:
-            add_options(curl, options)
+        # each thread keeps an idle multi handle with its connections, a nested call gets one of its own
+        multi = getattr(self.local, 'multi', None)
+        self.local.multi = None
+        if multi is None:
+            multi = pycurl.CurlMulti()
+            if self.http2:
+                # streams wait for a multiplexed connection, a server without h2 gets no more connections than usual
+                multi.setopt(pycurl.M_PIPELINING, pycurl.PIPE_MULTIPLEX)
+                multi.setopt(pycurl.M_MAX_HOST_CONNECTIONS, Client.jobs)
 
-        return curl
+        try:
+            while True:
+                while len(active) < jobs:
+                    item = requests()
+                    if item is None:
+                        break
+                    key, request = item
+                    multi.add_handle(request)
+                    active[request] = key
+
+                if not active:
+                    return
+
+                while multi.perform()[0] == pycurl.E_CALL_MULTI_PERFORM:
+                    pass
+
+                finished = list()
+                while True:
+                    queued, succeeded, failed = multi.info_read()
+                    finished.extend((request, None) for request in succeeded)
+                    for (request, errno, message) in failed:
+                        error = pycurl.error(errno, message) if errno != pycurl.E_HTTP_RETURNED_ERROR else None
+                        finished.append((request, error))
+                    if not queued:
+                        break
+
+                if not finished:
+                    if ticks:
+                        yield None, None, None
+                    multi.select(1.0)
+
+                for (request, error) in finished:
+                    multi.remove_handle(request)
+                    if self._retry(request, error):
+                        multi.add_handle(request)
+                        continue
+                    key = active.pop(request)
+                    if self.tracer is not None and hasattr(request, 'span'):
+                        end_request_span(request.span, request, error=error)
+                    yield key, request, error
+        finally:
+            for request in active:
+                multi.remove_handle(request)
+                self.release(request)
+            if self.local.multi is None:
+                self.local.multi = multi
+            else:
+                multi.close()
 
     def list(self, remote_path=root):
 
@@ -213,15 +1218,10 @@ class Client(object):
         try:
             directory_urn = Urn(remote_path, directory=True)
 
-            if directory_urn.path() != Client.root:
-                if not self.check(directory_urn.path()):
-                    raise RemoteResourceNotFound(directory_urn.path())
-
             response = BytesIO()
 
-            url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': directory_urn.quote()}
             options = {
-                'URL': "{hostname}{root}{path}".format(**url),
+                'URL': self.base_url + directory_urn.quote(),
                 'CUSTOMREQUEST': Client.requests['list'],
                 'HTTPHEADER': self.get_header('list'),
                 'WRITEDATA': response,
@@ -230,9 +1230,16 @@ class Client(object):
 
             request = self.Request(options=options)
 
-            request.perform()
-            request.close()
+            self.perform(request)
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if code == 404:
+                raise RemoteResourceNotFound(directory_urn.path())
+            if code >= 400:
+                raise UnhandledError()
 
+            self._remember(directory_urn.path())
             urns = parse(response)
 
             path = "{root}{path}".format(root=self.webdav.root, path=directory_urn.path())
@@ -282,8 +1289,8 @@ class Client(object):
 
             request = self.Request(options=options)
 
-            request.perform()
-            request.close()
+            self.perform(request)
+            self.release(request)
 
             return parse(response)
 
@@ -296,9 +1303,8 @@ class Client(object):
             urn = Urn(remote_path)
             response = BytesIO()
 
-            url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': urn.quote()}
             options = {
-                'URL': "{hostname}{root}{path}".format(**url),
+                'URL': self.base_url + urn.quote(),
                 'CUSTOMREQUEST': Client.requests['check'],
                 'HTTPHEADER': self.get_header('check'),
                 'WRITEDATA': response,
@@ -307,9 +1313,9 @@ class Client(object):
 
             request = self.Request(options=options)
 
-            request.perform()
+            self.perform(request)
             code = request.getinfo(pycurl.HTTP_CODE)
-            request.close()
+            self.release(request)
 
             if int(code) == 200:
                 return True
@@ -321,27 +1327,113 @@ class Client(object):
 
     def mkdir(self, remote_path):
 
-        try:
-            directory_urn = Urn(remote_path, directory=True)
+        directory_urn = Urn(remote_path, directory=True)
+        code = self._mkcol(directory_urn)
+
+        if code in (404, 409):
+            raise RemoteParentNotFound(directory_urn.path())
+
+    def makedirs(self, remote_path, exist_ok=True):
+
+        urn = Urn(remote_path, directory=True)
 
-            if not self.check(directory_urn.parent()):
-                raise RemoteParentNotFound(directory_urn.path())
+        if urn.path() in self.collections:
+            if not exist_ok:
+                raise RemoteResourceExists(urn.path())
+            return
+
+        code = self._mkcol(urn)
+
+        if code in (404, 409):
+            # the parent is missing, or was remembered but has been removed since
+            self._forget(urn.parent())
+            self.makedirs(urn.parent())
+            code = self._mkcol(urn)
+
+        if code in (404, 409):
+            raise RemoteParentNotFound(urn.path())
+        if code == 405 and not exist_ok:
+            raise RemoteResourceExists(urn.path())
+        if code >= 400 and code != 405:
+            raise UnhandledError()
+
+    def makedirs_many(self, remote_paths, jobs=None):
+
+        levels, seen = dict(), set()
+        for remote_path in remote_paths:
+            urn = Urn(remote_path, directory=True)
+            # the memo only spares the parents: a path asked for is always made, the server says if it exists
+            if urn.path() not in seen and urn.path() != Urn.separate:
+                seen.add(urn.path())
+                levels.setdefault(urn.nesting_level(), list()).append(urn)
+                urn = Urn(urn.parent(), directory=True)
+            while urn.path() not in self.collections and urn.path() not in seen:
+                seen.add(urn.path())
+                levels.setdefault(urn.nesting_level(), list()).append(urn)
+                urn = Urn(urn.parent(), directory=True)
+
+        def mkcol(urn):
 
-            url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': directory_urn.quote()}
             options = {
-                'URL': "{hostname}{root}{path}".format(**url),
+                'URL': self.base_url + urn.quote(),
+                'CUSTOMREQUEST': Client.requests['mkdir'],
+                'HTTPHEADER': self.get_header('mkdir')
+            }
+            return urn, self.Request(options=options)
+
+        for level in sorted(levels):
+            missing = list()
+            for (urn, request, error) in self.perform_many((mkcol(urn) for urn in levels[level]), jobs):
+                code = int(request.getinfo(pycurl.HTTP_CODE))
+                self.release(request)
+
+                if error is not None:
+                    raise NotConnection(self.webdav.hostname+" : "+repr(error))
+                if code in (404, 409):
+                    missing.append(urn)
+                elif code >= 400 and code != 405:
+                    raise UnhandledError()
+                else:
+                    self._remember(urn.path())
+
+            for urn in missing:
+                self.makedirs(urn.path())
+
+    def _mkcol(self, urn):
+
+        try:
+            options = {
+                'URL': self.base_url + urn.quote(),
                 'CUSTOMREQUEST': Client.requests['mkdir'],
                 'HTTPHEADER': self.get_header('mkdir')
             }
 
             request = self.Request(options=options)
 
-            request.perform()
-            request.close()
+            self.perform(request)
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
 
         except pycurl.error as e:
             raise NotConnection(self.webdav.hostname+" : "+repr(e))
 
+        # 405: something is already there
+        if code < 400 or code == 405:
+            self._remember(urn.path())
+        return code
+
+    def _remember(self, remote_path):
+
+        with self.collections_lock:
+            self.collections.add(Urn(remote_path, directory=True).path())
+
+    def _forget(self, remote_path):
+
+        path = Urn(remote_path, directory=True).path()
+        with self.collections_lock:
+            self.collections.difference_update([known for known in self.collections if known.startswith(path)])
+            self.collections.add(Urn.separate)
+
     def download_to(self, buff, remote_path):
 
         try:
@@ -350,49 +1442,157 @@ class Client(object):
             if self.is_dir(urn.path()):
                 raise OptionNotValid(name="remote_path", value=remote_path)
 
-            if not self.check(urn.path()):
-                raise RemoteResourceNotFound(urn.path())
-
-            url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': urn.quote()}
             options = {
-                'URL': "{hostname}{root}{path}".format(**url),
+                'URL': self.base_url + urn.quote(),
                 'WRITEFUNCTION': buff.write,
                 'HTTPHEADER': self.get_header('download_to'),
+                'FAILONERROR': 1,
                 'NOBODY': 0
             }
 
             request = self.Request(options=options)
 
-            request.perform()
-            request.close()
+            self.perform(request)
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if code == 404:
+                raise RemoteResourceNotFound(urn.path())
+            if code >= 400:
+                raise UnhandledError()
 
         except pycurl.error as e:
             raise NotConnection(self.webdav.hostname+" : "+repr(e))
 
-    def download(self, remote_path, local_path, progress=None):
+    @traced('download')
+    def download(self, remote_path, local_path, progress=None, jobs=None, segment_size=None, bwlimit=None,
+                 journal=None, atomic=False):
 
         urn = Urn(remote_path)
         if self.is_dir(urn.path()):
-            self.download_directory(local_path=local_path, remote_path=remote_path, progress=progress)
-        else:
+            self.download_directory(local_path=local_path, remote_path=remote_path, progress=progress,
+                                    jobs=jobs, segment_size=segment_size, bwlimit=bwlimit, journal=journal,
+                                    atomic=atomic)
+        elif jobs is None and journal is None:
             self.download_file(local_path=local_path, remote_path=remote_path, progress=progress)
-
-    def download_directory(self, remote_path, local_path, progress=None):
+        else:
+            size = int(self.info(urn.path())['size'] or 0) if segment_size or journal is not None else None
+            files = [(urn.path(), local_path, size)]
+            job = None
+            if journal is not None:
+                job = journal.job('download', urn.path(), local_path)
+                files = self._journaled_downloads(job, files)
+            self.download_files(files, jobs=jobs, segment_size=segment_size, bwlimit=bwlimit, progress=progress,
+                                job=job)
+            if job is not None:
+                job.finish()
+
+    def download_directory(self, remote_path, local_path, progress=None, jobs=None, segment_size=None, bwlimit=None,
+                           journal=None, atomic=False):
 
         urn = Urn(remote_path, directory=True)
 
         if not self.is_dir(urn.path()):
             raise OptionNotValid(name="remote_path", value=remote_path)
 
-        if os.path.exists(local_path):
+        if atomic:
+            if journal is not None:
+                raise OptionNotValid(name="journal", value=journal)
+            self._download_atomic(urn, local_path, jobs=jobs, segment_size=segment_size, bwlimit=bwlimit,
+                                  progress=progress)
+            return
+
+        if journal is None and os.path.exists(local_path):
             shutil.rmtree(local_path)
 
+        if jobs is None and journal is None:
+            self._download_directory(urn, local_path, progress)
+            return
+
+        directories, files = self._walk(urn, jobs)
+        for directory in directories:
+            directory = local_path_of(directory, urn, local_path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+
+        files = [(path, local_path_of(path, urn, local_path), size) for (path, size) in files]
+        job = None
+        if journal is not None:
+            # an interrupted run left finished files in place: keep them and drop only what is not remote
+            job = journal.job('download', urn.path(), local_path)
+            self._prune_local(local_path, urn, directories, files)
+            files = self._journaled_downloads(job, files)
+
+        self.download_files(files, jobs=jobs, segment_size=segment_size, bwlimit=bwlimit, progress=progress, job=job)
+        if job is not None:
+            job.finish()
+
+    def _download_atomic(self, urn, local_path, jobs=None, segment_size=None, bwlimit=None, progress=None):
+
+        local_path = os.path.abspath(local_path).rstrip(os.path.sep)
+        parent, name = os.path.split(local_path)
+        if not os.path.isdir(parent):
+            os.makedirs(parent)
+
+        # the new tree is put together next to the old one and takes its place only once it is complete
+        staging = tempfile.mkdtemp(prefix=".{name}.".format(name=name), suffix=".partial", dir=parent)
+        directories, files = self._walk(urn, jobs, modified=True)
+        replaced = False
+        try:
+            for directory in directories:
+                directory = local_path_of(directory, urn, staging)
+                if not os.path.isdir(directory):
+                    os.makedirs(directory)
+
+            downloads = list()
+            for (remote_path, size, modified) in files:
+                current = local_path_of(remote_path, urn, local_path)
+                if unchanged_local(current, size, modified):
+                    link_or_copy(current, local_path_of(remote_path, urn, staging))
+                else:
+                    downloads.append((remote_path, local_path_of(remote_path, urn, staging), size))
+
+            self.download_files(downloads, jobs=jobs, segment_size=segment_size, bwlimit=bwlimit, progress=progress)
+            replace_directory(staging, local_path)
+            replaced = True
+        finally:
+            if not replaced:
+                shutil.rmtree(staging, ignore_errors=True)
+
+    def _journaled_downloads(self, job, files):
+
+        def intact(local_path, size):
+            return os.path.isfile(local_path) and (size is None or os.path.getsize(local_path) == size)
+
+        states = job.plan([(remote_path, os.path.abspath(local_path), size, None) for (remote_path, local_path, size) in files])
+        return [item for (item, state) in zip(files, states) if state != 'done' or not intact(item[1], item[2])]
+
+    def _prune_local(self, local_path, urn, directories, files):
+
+        directories = set(local_path_of(directory, urn, local_path).rstrip(os.path.sep) for directory in directories)
+        files = set(local_file for (_, local_file, _) in files)
+        for (directory, directory_names, file_names) in os.walk(local_path):
+            for name in directory_names:
+                path = os.path.join(directory, name)
+                if path not in directories:
+                    shutil.rmtree(path)
+            directory_names[:] = [name for name in directory_names if os.path.join(directory, name) in directories]
+            for name in file_names:
+                path = os.path.join(directory, name)
+                if path not in files:
+                    os.remove(path)
+
+    def _download_directory(self, urn, local_path, progress=None):
+
         os.makedirs(local_path)
 
         for resource_name in self.list(urn.path()):
             _remote_path = "{parent}{name}".format(parent=urn.path(), name=resource_name)
             _local_path = os.path.join(local_path, resource_name)
-            self.download(local_path=_local_path, remote_path=_remote_path, progress=progress)
+            if Urn(_remote_path).is_dir():
+                self._download_directory(Urn(_remote_path), _local_path, progress)
+            else:
+                self.download_file(local_path=_local_path, remote_path=_remote_path, progress=progress)
 
     def download_file(self, remote_path, local_path, progress=None):
 
@@ -402,30 +1602,401 @@ class Client(object):
             if os.path.isdir(local_path):
                 raise OptionNotValid(name="local_path", value=local_path)
 
-            if not self.check(urn.path()):
+            local_file = LocalFile(local_path)
+
+            options = {
+                'URL': self.base_url + urn.quote(),
+                'HTTPHEADER': self.get_header('download_file'),
+                'WRITEFUNCTION': local_file.write,
+                'FAILONERROR': 1,
+                'NOPROGRESS': 0 if progress else 1,
+                'NOBODY': 0
+            }
+
+            if progress:
+               options["PROGRESSFUNCTION"] = progress
+
+            request = self.Request(options=options)
+
+            try:
+                self.perform(request)
+            except pycurl.error:
+                local_file.abort()
+                raise
+
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if code == 404:
+                local_file.abort()
                 raise RemoteResourceNotFound(urn.path())
+            if code >= 400:
+                local_file.abort()
+                raise UnhandledError()
+
+            local_file.close()
+
+        except pycurl.error as e:
+            raise NotConnection(self.webdav.hostname+" : "+repr(e))
+
+    def download_files(self, files, jobs=None, segment_size=None, bwlimit=None, progress=None, job=None):
+
+        jobs = jobs or self.jobs
+        transfers = Transfers(progress)
+        pending = deque()
+
+        def resumed(remote_path, local_path, size):
+            # a file cut off in the middle goes on from what reached the disk, one written in segments starts over
+            if job is None or job.state(remote_path) != 'active' or not size or (segment_size and size > segment_size):
+                return None
+            offset = os.path.getsize(local_path) if os.path.isfile(local_path) else 0
+            if not 0 < offset < size:
+                return None
+            transfers.bytes_done += offset
+            return ({'remaining': 1, 'failed': False, 'resumed': offset}, offset, size - offset)
+
+        for item in files:
+            size = item[2] if len(item) > 2 else None
+            transfers.add(size)
+            pending.append((item[0], item[1], size, resumed(item[0], item[1], size)))
+
+        def requests():
+
+            while pending:
+                task = remote_path, local_path, size, segment = pending.popleft()
+
+                # segment is None for a file that may still be split, False once it must not be
+                if segment is None and segment_size and size and size > segment_size:
+                    with open(local_path, 'wb') as local_file:
+                        local_file.truncate(size)
+                    offsets = list(range(0, size, segment_size))
+                    state = {'remaining': len(offsets), 'failed': False}
+                    for offset in reversed(offsets):
+                        length = min(segment_size, size - offset)
+                        pending.appendleft((remote_path, local_path, size, (state, offset, length)))
+                    continue
 
-            with open(local_path, 'wb') as local_file:
+                if job is not None:
+                    job.start(remote_path)
 
-                url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': urn.quote()}
+                urn = Urn(remote_path)
                 options = {
-                    'URL': "{hostname}{root}{path}".format(**url),
+                    'URL': self.base_url + urn.quote(),
                     'HTTPHEADER': self.get_header('download_file'),
-                    'WRITEDATA': local_file,
-                    'NOPROGRESS': 0 if progress else 1,
+                    'FAILONERROR': 1,
                     'NOBODY': 0
                 }
 
+                if segment:
+                    _, offset, length = segment
+                    writer = Segment(local_path, offset, length)
+                    options['RANGE'] = "{first}-{last}".format(first=offset, last=offset + length - 1)
+                    options['HEADERFUNCTION'] = writer.header
+                else:
+                    writer = LocalFile(local_path)
+                options['WRITEFUNCTION'] = writer.write
+
+                if bwlimit:
+                    options['MAX_RECV_SPEED_LARGE'] = max(bwlimit // jobs, 1)
+
                 if progress:
-                   options["PROGRESSFUNCTION"] = progress
+                    options['NOPROGRESS'] = 0
+                    options['XFERINFOFUNCTION'] = (lambda download_t, download_d, upload_t, upload_d, writer=writer:
+                                                   transfers.update(writer, download_d))
 
-                request = self.Request(options=options)
+                return (task, writer), self.Request(options=options)
 
-                request.perform()
-                request.close()
+        for ((task, writer), request, error) in self.perform_many(requests, jobs):
+            remote_path, local_path, size, segment = task
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if error is not None:
+                writer.abort()
+                if segment and error.args[0] == pycurl.E_WRITE_ERROR:
+                    state = segment[0]
+                    transfers.update(writer, 0)
+                    transfers.finish(writer, files=0)
+                    transfers.bytes_done -= state.pop('resumed', 0)
+                    if not state['failed']:
+                        state['failed'] = True
+                        pending.append((remote_path, local_path, size, False))
+                    continue
+                raise NotConnection(self.webdav.hostname+" : "+repr(error))
+
+            if code == 404:
+                writer.abort()
+                raise RemoteResourceNotFound(Urn(remote_path).path())
+            if code >= 400:
+                writer.abort()
+                raise UnhandledError()
+
+            writer.close()
+
+            if segment:
+                state = segment[0]
+                state['remaining'] -= 1
+                complete = not state['remaining'] and not state['failed']
+                transfers.finish(writer, files=1 if complete else 0)
+            else:
+                complete = True
+                transfers.finish(writer)
 
-        except pycurl.error as e:
-            raise NotConnection(self.webdav.hostname+" : "+repr(e))
+            if complete and job is not None:
+                job.done(remote_path)
+
+    @traced('download_tar')
+    def download_tar(self, remote_path, fileobj, compression=None, jobs=None, buffer_size=None, progress=None):
+
+        urn = Urn(remote_path, directory=True)
+        buffer_size = buffer_size or Client.buffer_size
+        transfers = Transfers(progress)
+
+        members = list()
+        for entry in sorted(self.find(urn.path(), jobs=jobs), key=lambda entry: entry['path']):
+            info = tarfile.TarInfo(entry['path'][len(urn.path()):].rstrip(Urn.separate))
+            modified = entry['modified'] and parsedate_tz(entry['modified'])
+            info.mtime = mktime_tz(modified) if modified else int(time.time())
+            if entry['is_dir']:
+                info.type, info.mode = tarfile.DIRTYPE, 0o755
+            else:
+                info.size, info.mode = entry['size'] or 0, 0o644
+                transfers.add(info.size)
+            members.append(info)
+
+        output, finish = tar_output(fileobj, compression)
+        pending = deque(index for (index, info) in enumerate(members) if info.isfile() and info.size)
+        started, done = dict(), set()
+        state = {'head': 0, 'buffered': 0, 'offset': 0}
+
+        def advance():
+
+            # members go out in order: the head streams straight into the archive, the rest wait in memory
+            while state['head'] < len(members):
+                index = state['head']
+                info = members[index]
+                if not info.isfile() or not info.size:
+                    header = info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+                    output.write(header)
+                    state['offset'] += len(header)
+                    state['head'] += 1
+                    continue
+                member = started.get(index)
+                if member is None:
+                    return
+                if not member.direct:
+                    state['buffered'] -= info.size
+                    state['offset'] += len(info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape"))
+                    member.emit()
+                if index not in done:
+                    return
+                if member.written != info.size:
+                    raise UnhandledError()
+                member.close()
+                state['offset'] += info.size + (-info.size % tarfile.BLOCKSIZE)
+                del started[index]
+                state['head'] += 1
+
+        def requests():
+
+            if not pending:
+                return None
+
+            index = pending[0]
+            info = members[index]
+            if index != state['head'] and state['buffered'] + info.size > buffer_size:
+                return None
+            pending.popleft()
+
+            member = started[index] = TarMember(output, info)
+            state['buffered'] += info.size
+            advance()
+
+            path = "{parent}{name}".format(parent=urn.path(), name=info.name)
+            options = {
+                'URL': self.base_url + Urn(path).quote(),
+                'HTTPHEADER': self.get_header('download_file'),
+                'WRITEFUNCTION': member.write,
+                'NOBODY': 0
+            }
+
+            if progress:
+                options['NOPROGRESS'] = 0
+                options['XFERINFOFUNCTION'] = (lambda download_t, download_d, upload_t, upload_d:
+                                               transfers.update(member, download_d))
+
+            return (index, path, member), self.Request(options=options)
+
+        advance()
+        for ((index, path, member), request, error) in self.perform_many(requests, jobs):
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if error is not None:
+                if error.args[0] == pycurl.E_WRITE_ERROR:
+                    raise UnhandledError()
+                raise NotConnection(self.webdav.hostname+" : "+repr(error))
+            if code == 404:
+                raise RemoteResourceNotFound(path)
+            if code >= 400:
+                raise UnhandledError()
+
+            done.add(index)
+            transfers.finish(member)
+            advance()
+
+        end = tarfile.NUL * (2 * tarfile.BLOCKSIZE)
+        output.write(end + tarfile.NUL * (-(state['offset'] + len(end)) % tarfile.RECORDSIZE))
+        finish()
+
+    @traced('upload_tar')
+    def upload_tar(self, remote_path, fileobj, compression=None, jobs=None, buffer_size=None, progress=None):
+
+        urn = Urn(remote_path, directory=True)
+        buffer_size = buffer_size or Client.buffer_size
+        transfers = Transfers(progress)
+        archive = tar_input(fileobj, compression)
+        state = {'held': None, 'buffered': 0, 'streaming': False, 'finished': False}
+
+        self.makedirs(urn.path())
+
+        def requests():
+
+            while not state['streaming'] and not state['finished']:
+                info = state['held'] or archive.next()
+                state['held'] = None
+                if info is None:
+                    state['finished'] = True
+                    return None
+
+                name = posixpath.normpath(info.name).lstrip(Urn.separate)
+                if name in (os.curdir, "") or name == os.pardir or name.startswith(os.pardir + Urn.separate):
+                    continue
+                path = "{parent}{name}".format(parent=urn.path(), name=name)
+
+                if info.isdir():
+                    self.makedirs(path)
+                    continue
+                if not info.isfile():
+                    continue
+
+                streamed = info.size > buffer_size
+                if not streamed and state['buffered'] + info.size > buffer_size:
+                    # the member stays current in the archive until earlier uploads free the buffer
+                    state['held'] = info
+                    return None
+
+                self.makedirs(Urn(path).parent())
+                if streamed:
+                    # a large member is read from the archive while it is sent, nothing else can be read meanwhile
+                    source = archive.extractfile(info)
+                    state['streaming'] = True
+                else:
+                    source = BytesIO(archive.extractfile(info).read())
+                    state['buffered'] += info.size
+                transfers.add(info.size)
+
+                urn_to = Urn(path)
+                options = {
+                    'URL': self.base_url + urn_to.quote(),
+                    'HTTPHEADER': self.get_header('upload_file'),
+                    'UPLOAD': 1,
+                    'READFUNCTION': source.read,
+                    'INFILESIZE_LARGE': info.size
+                }
+
+                if progress:
+                    options['NOPROGRESS'] = 0
+                    options['XFERINFOFUNCTION'] = (lambda download_t, download_d, upload_t, upload_d:
+                                                   transfers.update(source, upload_d))
+
+                return (urn_to, source, info.size, streamed), self.Request(options=options)
+
+            return None
+
+        for ((urn_to, source, size, streamed), request, error) in self.perform_many(requests, jobs):
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if error is not None:
+                raise NotConnection(self.webdav.hostname+" : "+repr(error))
+            if code in (404, 409):
+                raise RemoteParentNotFound(urn_to.path())
+            if code == 507:
+                raise NotEnoughSpace()
+            if code == 500:
+                raise InternalServerError()
+            if code < 200 or code >= 400:
+                raise UnhandledError()
+
+            if streamed:
+                state['streaming'] = False
+            else:
+                state['buffered'] -= size
+            transfers.finish(source)
+
+    def _walk(self, urn, jobs=None, descend=None, modified=False):
+
+        directories, files = [urn.path()], list()
+        for (path, is_dir, response) in self._crawl(urn, jobs, descend):
+            if is_dir:
+                directories.append(path)
+            elif modified:
+                files.append((path, parse_size(response), parse_modified(response)))
+            else:
+                files.append((path, parse_size(response)))
+        return directories, files
+
+    def _crawl(self, urn, jobs=None, descend=None):
+
+        pending = deque([urn.path()])
+
+        def requests():
+
+            if not pending:
+                return None
+
+            path = pending.popleft()
+            response = BytesIO()
+
+            options = {
+                'URL': self.base_url + Urn(path, directory=True).quote(),
+                'CUSTOMREQUEST': Client.requests['list'],
+                'HTTPHEADER': self.get_header('list'),
+                'WRITEDATA': response,
+                'NOBODY': 0
+            }
+
+            return (path, response), self.Request(options=options)
+
+        listed, found = set(), set()
+        for ((path, response), request, error) in self.perform_many(requests, jobs):
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if error is not None:
+                raise NotConnection(self.webdav.hostname+" : "+repr(error))
+            if code == 404:
+                self._forget(path)
+                raise RemoteResourceNotFound(path)
+
+            listed.add(Urn(path, directory=True).path())
+            for (resource_path, is_dir, element) in parse_responses(response.getvalue(), self.webdav.root):
+                if resource_path == path or resource_path == path.rstrip(Urn.separate):
+                    continue
+                if is_dir:
+                    self._remember(resource_path)
+                    found.add(Urn(resource_path, directory=True).path())
+                    if descend is None or descend(resource_path):
+                        pending.append(resource_path)
+                yield resource_path, is_dir, element
+
+        # collections remembered earlier that a fresh listing of their parent no longer shows are gone
+        with self.collections_lock:
+            stale = [known for known in self.collections
+                     if known != Urn.separate and known not in found and Urn(known, directory=True).parent() in listed]
+        for known in stale:
+            self._forget(known)
 
     def download_sync(self, remote_path, local_path, callback=None):
 
@@ -447,12 +2018,8 @@ class Client(object):
             if urn.is_dir():
                 raise OptionNotValid(name="remote_path", value=remote_path)
 
-            if not self.check(urn.parent()):
-                raise RemoteParentNotFound(urn.path())
-
-            url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': urn.quote()}
             options = {
-                'URL': "{hostname}{root}{path}".format(**url),
+                'URL': self.base_url + urn.quote(),
                 'HTTPHEADER': self.get_header('upload_from'),
                 'UPLOAD': 1,
                 'READFUNCTION': buff.read,
@@ -460,24 +2027,39 @@ class Client(object):
 
             request = self.Request(options=options)
 
-            request.perform()
+            self.perform(request)
             code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if code in (404, 409):
+                raise RemoteParentNotFound(urn.path())
             if code == 507:
                 raise NotEnoughSpace()
 
-            request.close()
-
         except pycurl.error as e:
             raise NotConnection(self.webdav.hostname+" : "+repr(e))
 
-    def upload(self, remote_path, local_path, progress=None):
+    @traced('upload')
+    def upload(self, remote_path, local_path, progress=None, jobs=None, bwlimit=None, checksums=None, journal=None,
+               atomic=False):
 
         if os.path.isdir(local_path):
-            self.upload_directory(local_path=local_path, remote_path=remote_path, progress=progress)
-        else:
+            self.upload_directory(local_path=local_path, remote_path=remote_path, progress=progress,
+                                  jobs=jobs, bwlimit=bwlimit, checksums=checksums, journal=journal, atomic=atomic)
+        elif jobs is None and checksums is None and journal is None:
             self.upload_file(local_path=local_path, remote_path=remote_path, progress=progress)
-
-    def upload_directory(self, remote_path, local_path, progress=None):
+        else:
+            files = [(Urn(remote_path).path(), local_path)]
+            job = None
+            if journal is not None:
+                job = journal.job('upload', Urn(remote_path).path(), local_path)
+                files = self._journaled_uploads(job, files)
+            self.upload_files(files, jobs=jobs, bwlimit=bwlimit, progress=progress, checksums=checksums, job=job)
+            if job is not None:
+                job.finish()
+
+    def upload_directory(self, remote_path, local_path, progress=None, jobs=None, bwlimit=None, checksums=None,
+                         journal=None, atomic=False):
 
         urn = Urn(remote_path, directory=True)
 
@@ -490,15 +2072,116 @@ class Client(object):
         if not os.path.exists(local_path):
             raise LocalResourceNotFound(local_path)
 
-        if self.check(urn.path()):
+        if atomic:
+            if journal is not None:
+                raise OptionNotValid(name="journal", value=journal)
+            if urn.path() == Urn.separate:
+                raise OptionNotValid(name="remote_path", value=remote_path)
+            self._upload_atomic(urn, local_path, jobs=jobs, bwlimit=bwlimit, progress=progress, checksums=checksums)
+            return
+
+        if checksums is None and journal is None:
             self.clean(urn.path())
 
-        self.mkdir(remote_path)
+        if jobs is None and checksums is None and journal is None:
+            self._upload_directory(urn, local_path, progress)
+            return
+
+        directories, files = local_tree(local_path, urn)
+        if checksums is not None or journal is not None:
+            self._prune(urn, directories, files, jobs)
+
+        job = None
+        if journal is not None:
+            job = journal.job('upload', urn.path(), local_path)
+            files = self._journaled_uploads(job, files)
+
+        self.makedirs_many(directories, jobs)
+        self.upload_files(files, jobs=jobs, bwlimit=bwlimit, progress=progress, checksums=checksums, job=job)
+        if job is not None:
+            job.finish()
+
+    def _upload_atomic(self, urn, local_path, jobs=None, bwlimit=None, progress=None, checksums=None):
+
+        staging = Urn("{parent}.{name}.{token:08x}.partial".format(
+            parent=urn.parent(), name=urn.filename().rstrip(Urn.separate), token=random.getrandbits(32)), directory=True)
+
+        def staged(remote_path):
+            return staging.path() + remote_path[len(urn.path()):]
+
+        directories, files = local_tree(local_path, urn)
+        try:
+            _, remote_files = self._walk(urn, jobs, modified=True)
+        except RemoteResourceNotFound:
+            remote_files = list()
+        remote = {remote_path: (size, modified) for (remote_path, size, modified) in remote_files}
+
+        # what the old tree already holds is copied on the server instead of being sent again
+        if checksums is not None:
+            candidates = [(Urn(remote_path), local_file, os.path.getsize(local_file))
+                          for (remote_path, local_file) in files if remote_path in remote]
+            digests = checksums.digests([local_file for (_, local_file, _) in candidates])
+            checksums.save()
+            changed = self._changed_files(candidates, digests, checksums, jobs)
+            unchanged = set(target.path() for (target, _, _) in candidates) - set(target.path() for (target, _, _) in changed)
+        else:
+            unchanged = set(remote_path for (remote_path, local_file) in files
+                            if remote_path in remote and unchanged_remote(local_file, *remote[remote_path]))
+
+        moved = False
+        try:
+            self.makedirs_many([staged(directory) for directory in directories], jobs)
+            copies = self.copy_many([(remote_path, staged(remote_path)) for remote_path in unchanged], jobs=jobs)
+            uploads = [(staged(remote_path), local_file) for (remote_path, local_file) in files
+                       if copies.get((remote_path, staged(remote_path)), True) is not None]
+            # staged paths are new, there is nothing on the server to compare them with
+            self.upload_files(uploads, jobs=jobs, bwlimit=bwlimit, progress=progress, checksums=checksums,
+                              compare=False)
+            self.move(staging.path(), urn.path(), overwrite=True)
+            moved = True
+        finally:
+            if not moved:
+                self.clean_many([staging.path()], jobs)
+
+        self._forget(urn.path())
+
+    def _journaled_uploads(self, job, files):
+
+        # a file is sent again unless it was uploaded whole and has not changed since
+        entries = list()
+        for (remote_path, local_path) in files:
+            stat = os.stat(local_path)
+            entries.append((remote_path, os.path.abspath(local_path), stat.st_size, stat.st_mtime))
+        states = job.plan(entries)
+        return [item for (item, state) in zip(files, states) if state != 'done']
+
+    def _prune(self, urn, directories, files, jobs=None):
+
+        # instead of cleaning the whole directory only what is not there locally is deleted
+        try:
+            remote_directories, remote_files = self._walk(urn, jobs)
+        except RemoteResourceNotFound:
+            return
+
+        local = set(directories) | set(remote_path for (remote_path, _) in files)
+        stale = [path for path in remote_directories if path not in local]
+        stale += [path for (path, _) in remote_files if path not in local]
+
+        for error in self.clean_many(stale, jobs).values():
+            if error is not None and not isinstance(error, RemoteResourceNotFound):
+                raise error
+
+    def _upload_directory(self, urn, local_path, progress=None):
+
+        self.mkdir(urn.path())
 
         for resource_name in listdir(local_path):
             _remote_path = "{parent}{name}".format(parent=urn.path(), name=resource_name)
             _local_path = os.path.join(local_path, resource_name)
-            self.upload(local_path=_local_path, remote_path=_remote_path, progress=progress)
+            if os.path.isdir(_local_path):
+                self._upload_directory(Urn(_remote_path, directory=True), _local_path, progress)
+            else:
+                self.upload_file(local_path=_local_path, remote_path=_remote_path, progress=progress)
 
     def upload_file(self, remote_path, local_path, progress=None):
 
@@ -506,52 +2189,171 @@ class Client(object):
             if not os.path.exists(local_path):
                 raise LocalResourceNotFound(local_path)
 
-            urn = Urn(remote_path)
+            urn = Urn(remote_path)
+
+            if urn.is_dir():
+                raise OptionNotValid(name="remote_path", value=remote_path)
+
+            if os.path.isdir(local_path):
+                raise OptionNotValid(name="local_path", value=local_path)
+
+            with open(local_path, "rb") as local_file:
+
+                options = {
+                    'URL': self.base_url + urn.quote(),
+                    'HTTPHEADER': self.get_header('upload_file'),
+                    'UPLOAD': 1,
+                    'READFUNCTION': local_file.read,
+                    'NOPROGRESS': 0 if progress else 1
+                }
+
+                if progress:
+                   options["PROGRESSFUNCTION"] = progress
+
+                file_size = os.path.getsize(local_path)
+                if file_size > self.large_size:
+                    options['INFILESIZE_LARGE'] = file_size
+                else:
+                    options['INFILESIZE'] = file_size
+
+                request = self.Request(options=options)
+
+                self.perform(request)
+                code = int(request.getinfo(pycurl.HTTP_CODE))
+                self.release(request)
+
+                if code in (404, 409):
+                    raise RemoteParentNotFound(urn.path())
+                if code == 507:
+                    raise NotEnoughSpace()
+                if code == 500:
+                    raise InternalServerError()
+                if code < 200 or code >=400:
+                    raise UnhandledError()
+
+        except pycurl.error as e:
+            raise NotConnection(self.webdav.hostname+" : "+repr(e))
+
+    def upload_files(self, files, jobs=None, bwlimit=None, progress=None, checksums=None, job=None, compare=True):
+
+        jobs = jobs or self.jobs
+        transfers = Transfers(progress)
+        pending = deque()
+
+        for (remote_path, local_path) in files:
+            if not os.path.exists(local_path):
+                raise LocalResourceNotFound(local_path)
+            if os.path.isdir(local_path):
+                raise OptionNotValid(name="local_path", value=local_path)
+            urn = Urn(remote_path)
+            if urn.is_dir():
+                raise OptionNotValid(name="remote_path", value=remote_path)
+            pending.append((urn, local_path, os.path.getsize(local_path)))
+
+        if checksums is not None:
+            digests = checksums.digests([local_path for (_, local_path, _) in pending])
+            checksums.save()
+            if compare:
+                pending = deque(self._changed_files(pending, digests, checksums, jobs))
+            uploaded = [(urn, digests[local_path]) for (urn, local_path, _) in pending]
+
+        for (_, _, size) in pending:
+            transfers.add(size)
+
+        def requests():
+
+            if not pending:
+                return None
+
+            urn, local_path, size = pending.popleft()
+            local_file = open(local_path, "rb")
+            if job is not None:
+                job.start(urn.path())
+
+            options = {
+                'URL': self.base_url + urn.quote(),
+                'HTTPHEADER': self.get_header('upload_file'),
+                'UPLOAD': 1,
+                'READFUNCTION': local_file.read,
+                'INFILESIZE_LARGE': size
+            }
+
+            if bwlimit:
+                options['MAX_SEND_SPEED_LARGE'] = max(bwlimit // jobs, 1)
+
+            if progress:
+                options['NOPROGRESS'] = 0
+                options['XFERINFOFUNCTION'] = (lambda download_t, download_d, upload_t, upload_d:
+                                               transfers.update(local_file, upload_d))
+
+            return (urn, local_file), self.Request(options=options)
+
+        for ((urn, local_file), request, error) in self.perform_many(requests, jobs):
+            local_file.close()
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if error is not None:
+                raise NotConnection(self.webdav.hostname+" : "+repr(error))
+            if code in (404, 409):
+                raise RemoteParentNotFound(urn.path())
+            if code == 507:
+                raise NotEnoughSpace()
+            if code == 500:
+                raise InternalServerError()
+            if code < 200 or code >= 400:
+                raise UnhandledError()
+
+            transfers.finish(local_file)
+            if job is not None:
+                job.done(urn.path())
 
-            if urn.is_dir():
-                raise OptionNotValid(name="remote_path", value=remote_path)
+        if checksums is not None:
+            if checksums.verify:
+                self._verify_files(uploaded, checksums.algorithm, jobs)
+            if checksums.store:
+                self.set_properties_many({urn.path(): [dict(checksums.option, value=digest)] for (urn, digest) in uploaded}, jobs)
 
-            if os.path.isdir(local_path):
-                raise OptionNotValid(name="local_path", value=local_path)
+    def _changed_files(self, files, digests, checksums, jobs=None):
 
-            if not self.check(urn.parent()):
-                raise RemoteParentNotFound(urn.path())
+        length = {'namespace': "DAV:", 'name': "getcontentlength"}
+        remote = self.get_properties_many([urn.path() for (urn, _, _) in files], [checksums.option, length], jobs)
 
-            with open(local_path, "rb") as local_file:
+        changed = list()
+        for (urn, local_path, size) in files:
+            values = remote[urn.path()]
+            if values and values[0] == digests[local_path] and values[1] == str(size):
+                continue
+            changed.append((urn, local_path, size))
+        return changed
 
-                url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': urn.quote()}
-                options = {
-                    'URL': "{hostname}{root}{path}".format(**url),
-                    'HTTPHEADER': self.get_header('upload_file'),
-                    'UPLOAD': 1,
-                    'READFUNCTION': local_file.read,
-                    'NOPROGRESS': 0 if progress else 1
-                }
+    def _verify_files(self, files, algorithm, jobs=None):
 
-                if progress:
-                   options["PROGRESSFUNCTION"] = progress
+        def get(urn, digest):
 
-                file_size = os.path.getsize(local_path)
-                if file_size > self.large_size:
-                    options['INFILESIZE_LARGE'] = file_size
-                else:
-                    options['INFILESIZE'] = file_size
+            hasher = hashlib.new(algorithm)
 
-                request = self.Request(options=options)
+            options = {
+                'URL': self.base_url + urn.quote(),
+                'HTTPHEADER': self.get_header('download_file'),
+                'WRITEFUNCTION': hasher.update,
+                'NOBODY': 0
+            }
 
-                request.perform()
-                code = int(request.getinfo(pycurl.HTTP_CODE))
-                if code == 507:
-                    raise NotEnoughSpace()
-                if code == 500:
-                    raise InternalServerError()
-                if code < 200 or code >=400:
-                    raise UnhandledError()
+            return (urn, digest, hasher), self.Request(options=options)
 
-                request.close()
+        requests = (get(urn, digest) for (urn, digest) in files)
 
-        except pycurl.error as e:
-            raise NotConnection(self.webdav.hostname+" : "+repr(e))
+        for ((urn, digest, hasher), request, error) in self.perform_many(requests, jobs):
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if error is not None:
+                raise NotConnection(self.webdav.hostname+" : "+repr(error))
+            if code == 404:
+                raise RemoteResourceNotFound(urn.path())
+            if hasher.hexdigest() != digest:
+                raise ChecksumMismatch(urn.path())
 
     def upload_sync(self, remote_path, local_path, callback=None):
 
@@ -565,101 +2367,181 @@ class Client(object):
         target = (lambda: self.upload_sync(local_path=local_path, remote_path=remote_path, callback=callback))
         threading.Thread(target=target).start()
 
-    def copy(self, remote_path_from, remote_path_to):
+    @traced('copy')
+    def copy(self, remote_path_from, remote_path_to, overwrite=True, depth=None):
 
-        def header(remote_path_to):
+        pair = (remote_path_from, remote_path_to)
+        error = self._transfer_many('copy', [pair], overwrite=overwrite, depth=depth)[pair]
+        if error is not None:
+            raise error
 
-            path = Urn(remote_path_to).path()
-            destination = "{root}{path}".format(root=self.webdav.root, path=path)
-            header_item = "Destination: {destination}".format(destination=destination)
+    @traced('move')
+    def move(self, remote_path_from, remote_path_to, overwrite=True):
 
-            header = self.get_header('copy')
-            header.append(header_item)
+        pair = (remote_path_from, remote_path_to)
+        error = self._transfer_many('move', [pair], overwrite=overwrite)[pair]
+        if error is not None:
+            raise error
 
-            return header
+    def copy_many(self, pairs, overwrite=True, depth=None, jobs=None):
+        return self._transfer_many('copy', pairs, overwrite=overwrite, depth=depth, jobs=jobs)
 
-        try:
-            urn_from = Urn(remote_path_from)
+    def move_many(self, pairs, overwrite=True, jobs=None):
+        return self._transfer_many('move', pairs, overwrite=overwrite, jobs=jobs)
 
-            if not self.check(urn_from.path()):
-                raise RemoteResourceNotFound(urn_from.path())
+    def _transfer_many(self, method, pairs, overwrite=True, depth=None, jobs=None):
 
-            urn_to = Urn(remote_path_to)
+        pairs = list(pairs)
 
-            if not self.check(urn_to.parent()):
-                raise RemoteParentNotFound(urn_to.path())
+        def transfer(pair):
+
+            urn_from, urn_to = Urn(pair[0]), Urn(pair[1])
+            response = BytesIO()
+
+            destination = "{root}{path}".format(root=self.webdav.root, path=urn_to.quote())
+            header = self.get_header(method)
+            header.append("Destination: {destination}".format(destination=destination))
+            header.append("Overwrite: {flag}".format(flag="T" if overwrite else "F"))
+            if depth is not None:
+                header.append("Depth: {depth}".format(depth=depth))
 
-            url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': urn_from.quote()}
             options = {
-                'URL': "{hostname}{root}{path}".format(**url),
-                'CUSTOMREQUEST': Client.requests['copy'],
-                'HTTPHEADER': header(remote_path_to)
+                'URL': self.base_url + urn_from.quote(),
+                'CUSTOMREQUEST': Client.requests[method],
+                'HTTPHEADER': header,
+                'WRITEDATA': response,
+                'NOBODY': 0
             }
 
-            request = self.Request(options=options)
+            return (pair, urn_from, urn_to, response), self.Request(options=options)
 
-            request.perform()
-            request.close()
+        results = dict()
+        requests = (transfer(pair) for pair in pairs)
 
-        except pycurl.error as e:
-            raise NotConnection(self.webdav.hostname+" : "+repr(e))
+        for ((pair, urn_from, urn_to, response), request, error) in self.perform_many(requests, jobs):
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if error is not None:
+                results[pair] = NotConnection(self.webdav.hostname+" : "+repr(error))
+                continue
+
+            # the status of the request itself says what pre-flight checks would have
+            if code == 404:
+                results[pair] = RemoteResourceNotFound(urn_from.path())
+            elif code == 409:
+                results[pair] = RemoteParentNotFound(urn_to.path())
+            elif code == 412:
+                results[pair] = RemoteResourceExists(urn_to.path())
+            elif code == 507:
+                results[pair] = NotEnoughSpace()
+            elif code == 207:
+                # a multistatus answer lists the members that failed, the rest was transferred
+                error = UnhandledError()
+                error.failed = [path for (path, _, _) in parse_responses(response.getvalue(), self.webdav.root)]
+                results[pair] = error
+            elif code >= 400:
+                results[pair] = UnhandledError()
+            else:
+                results[pair] = None
 
-    def move(self, remote_path_from, remote_path_to):
+            if method == 'move' and code < 400:
+                self._forget(urn_from.path())
 
-        def header(remote_path_to):
+        return results
 
-            path = Urn(remote_path_to).path()
-            destination = "{root}{path}".format(root=self.webdav.root, path=path)
-            header_item = "Destination: {destination}".format(destination=destination)
-            header = self.get_header('move')
-            header.append(header_item)
-            return header
+    def clean(self, remote_path):
 
         try:
-            urn_from = Urn(remote_path_from)
-
-            if not self.check(urn_from.path()):
-                raise RemoteResourceNotFound(urn_from.path())
-
-            urn_to = Urn(remote_path_to)
-
-            if not self.check(urn_to.parent()):
-                raise RemoteParentNotFound(urn_to.path())
+            urn = Urn(remote_path)
 
-            url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': urn_from.quote()}
             options = {
-                'URL': "{hostname}{root}{path}".format(**url),
-                'CUSTOMREQUEST': Client.requests['move'],
-                'HTTPHEADER': header(remote_path_to)
+                'URL': self.base_url + urn.quote(),
+                'CUSTOMREQUEST': Client.requests['clean'],
+                'HTTPHEADER': self.get_header('clean')
             }
 
             request = self.Request(options=options)
 
-            request.perform()
-            request.close()
+            self.perform(request)
+            self.release(request)
+            self._forget(urn.path())
 
         except pycurl.error as e:
             raise NotConnection(self.webdav.hostname+" : "+repr(e))
 
-    def clean(self, remote_path):
+    def clean_many(self, remote_paths, jobs=None):
 
-        try:
-            urn = Urn(remote_path)
+        def key(path):
+            return Urn(path).path().rstrip(Urn.separate) or Urn.separate
+
+        keys = {remote_path: key(remote_path) for remote_path in remote_paths}
+        targets = set(keys.values())
+
+        def covering(path):
+
+            # the topmost targeted ancestor deletes this path along with its whole collection
+            found = None
+            while path != Urn.separate:
+                path = path.rsplit(Urn.separate, 1)[0] or Urn.separate
+                if path in targets:
+                    found = path
+            return found
+
+        ancestors = {path: covering(path) for path in targets}
+
+        def delete(path):
+
+            response = BytesIO()
 
-            url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': urn.quote()}
             options = {
-                'URL': "{hostname}{root}{path}".format(**url),
+                'URL': self.base_url + Urn(path).quote(),
                 'CUSTOMREQUEST': Client.requests['clean'],
-                'HTTPHEADER': self.get_header('clean')
+                'HTTPHEADER': self.get_header('clean'),
+                'WRITEDATA': response,
+                'NOBODY': 0
             }
 
-            request = self.Request(options=options)
+            return (path, response), self.Request(options=options)
 
-            request.perform()
-            request.close()
+        results, partial, failed = dict(), set(), set()
+        requests = (delete(path) for path in targets if ancestors[path] is None)
 
-        except pycurl.error as e:
-            raise NotConnection(self.webdav.hostname+" : "+repr(e))
+        for ((path, response), request, error) in self.perform_many(requests, jobs):
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if error is not None:
+                results[path] = NotConnection(self.webdav.hostname+" : "+repr(error))
+                continue
+
+            self._forget(path)
+
+            if code == 404:
+                results[path] = RemoteResourceNotFound(path)
+            elif code == 207:
+                # a multistatus answer lists the members that could not be deleted
+                results[path] = UnhandledError()
+                partial.add(path)
+                for (member, _, _) in parse_responses(response.getvalue(), self.webdav.root):
+                    failed.add(member.rstrip(Urn.separate) or Urn.separate)
+            elif code >= 400:
+                results[path] = UnhandledError()
+            else:
+                results[path] = None
+
+        outcome = dict()
+        for (remote_path, path) in keys.items():
+            ancestor = ancestors[path]
+            if ancestor is None:
+                outcome[remote_path] = results[path]
+            elif ancestor in partial:
+                outcome[remote_path] = UnhandledError() if path in failed else None
+            elif isinstance(results[ancestor], RemoteResourceNotFound):
+                outcome[remote_path] = RemoteResourceNotFound(path)
+            else:
+                outcome[remote_path] = results[ancestor]
+        return outcome
 
     def publish(self, remote_path):
 
@@ -699,9 +2581,8 @@ class Client(object):
 
             response = BytesIO()
 
-            url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': urn.quote()}
             options = {
-                'URL': "{hostname}{root}{path}".format(**url),
+                'URL': self.base_url + urn.quote(),
                 'CUSTOMREQUEST': Client.requests['publish'],
                 'HTTPHEADER': self.get_header('publish'),
                 'POSTFIELDS': data(for_server=self.webdav.hostname),
@@ -711,8 +2592,8 @@ class Client(object):
 
             request = self.Request(options=options)
 
-            request.perform()
-            request.close()
+            self.perform(request)
+            self.release(request)
 
             return parse(response)
 
@@ -741,9 +2622,8 @@ class Client(object):
             if not self.check(urn.path()):
                 raise RemoteResourceNotFound(urn.path())
 
-            url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': urn.quote()}
             options = {
-                'URL': "{hostname}{root}{path}".format(**url),
+                'URL': self.base_url + urn.quote(),
                 'CUSTOMREQUEST': Client.requests['unpublish'],
                 'HTTPHEADER': self.get_header('unpublish'),
                 'POSTFIELDS': data(for_server=self.webdav.hostname)
@@ -751,8 +2631,8 @@ class Client(object):
 
             request = self.Request(options=options)
 
-            request.perform()
-            request.close()
+            self.perform(request)
+            self.release(request)
 
         except pycurl.error as e:
             raise NotConnection(self.webdav.hostname+" : "+repr(e))
@@ -765,13 +2645,6 @@ class Client(object):
                 response_str = response.getvalue()
                 tree = etree.fromstring(response_str)
 
-                find_attributes = {
-                    'created': ".//{DAV:}creationdate",
-                    'name': ".//{DAV:}displayname",
-                    'size': ".//{DAV:}getcontentlength",
-                    'modified': ".//{DAV:}getlastmodified"
-                }
-
                 resps = tree.findall("{DAV:}response")
 
                 for resp in resps:
@@ -786,10 +2659,7 @@ class Client(object):
                         if not path == urn and not path_with_sep == urn:
                             continue
 
-                    info = dict()
-                    for (name, value) in find_attributes.items():
-                        info[name] = resp.findtext(value)
-                    return info
+                    return parse_info(resp)
 
                 raise RemoteResourceNotFound(path)
             except etree.XMLSyntaxError:
@@ -799,12 +2669,8 @@ class Client(object):
             urn = Urn(remote_path)
             response = BytesIO()
 
-            if not self.check(urn.path()) and not self.check(Urn(remote_path, directory=True).path()):
-                raise RemoteResourceNotFound(remote_path)
-
-            url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': urn.quote()}
             options = {
-                'URL': "{hostname}{root}{path}".format(**url),
+                'URL': self.base_url + urn.quote(),
                 'CUSTOMREQUEST': Client.requests['info'],
                 'HTTPHEADER': self.get_header('info'),
                 'WRITEDATA': response,
@@ -813,8 +2679,14 @@ class Client(object):
 
             request = self.Request(options=options)
 
-            request.perform()
-            request.close()
+            self.perform(request)
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if code == 404:
+                raise RemoteResourceNotFound(remote_path)
+            if code >= 400:
+                raise UnhandledError()
 
             path = "{root}{path}".format(root=self.webdav.root, path=urn.path())
 
@@ -858,15 +2730,10 @@ class Client(object):
 
         try:
             urn = Urn(remote_path)
-            parent_urn = Urn(urn.parent())
-            if not self.check(urn.path()) and not self.check(Urn(remote_path, directory=True).path()):
-                raise RemoteResourceNotFound(remote_path)
-
             response = BytesIO()
 
-            url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': parent_urn.quote()}
             options = {
-                'URL': "{hostname}{root}{path}".format(**url),
+                'URL': self.base_url + urn.quote(),
                 'CUSTOMREQUEST': Client.requests['info'],
                 'HTTPHEADER': self.get_header('info'),
                 'WRITEDATA': response,
@@ -875,114 +2742,513 @@ class Client(object):
 
             request = self.Request(options=options)
 
-            request.perform()
-            request.close()
+            self.perform(request)
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if code == 404:
+                raise RemoteResourceNotFound(remote_path)
+            if code >= 400:
+                raise UnhandledError()
 
             path = "{root}{path}".format(root=self.webdav.root, path=urn.path())
 
-            return parse(response, path)
+            is_dir = parse(response, path)
+            if is_dir:
+                self._remember(urn.path())
+            return is_dir
 
         except pycurl.error as e:
             raise NotConnection(self.webdav.hostname+" : "+repr(e))
 
-    def resource(self, remote_path):
+    def info_many(self, remote_paths, jobs=None):
 
-        urn = Urn(remote_path)
-        return Resource(self, urn.path())
+        found = self._propfind_many(remote_paths, jobs)
+        return {path: parse_info(response) if response is not None else None for (path, response) in found.items()}
 
-    def get_property(self, remote_path, option):
+    def check_many(self, remote_paths, jobs=None):
+
+        found = self._propfind_many(remote_paths, jobs)
+        return {path: response is not None for (path, response) in found.items()}
+
+    def _propfind_many(self, remote_paths, jobs=None):
+
+        def key(path):
+            return path.rstrip(Urn.separate) or Urn.separate
+
+        groups = dict()
+        for remote_path in remote_paths:
+            groups.setdefault(Urn(remote_path).parent(), list()).append(remote_path)
+
+        def propfind(parent, paths):
+
+            # a lone path is looked up by itself rather than by listing its parent
+            urn, method = (Urn(paths[0]), 'info') if len(paths) == 1 else (Urn(parent, directory=True), 'list')
+            response = BytesIO()
+
+            options = {
+                'URL': self.base_url + urn.quote(),
+                'CUSTOMREQUEST': Client.requests[method],
+                'HTTPHEADER': self.get_header(method),
+                'WRITEDATA': response,
+                'NOBODY': 0
+            }
+
+            return (paths, response), self.Request(options=options)
+
+        found = dict.fromkeys(remote_paths)
+        requests = (propfind(parent, paths) for (parent, paths) in groups.items())
+
+        for ((paths, response), request, error) in self.perform_many(requests, jobs):
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if error is not None:
+                raise NotConnection(self.webdav.hostname+" : "+repr(error))
+            if code == 404:
+                continue
+
+            resources = {key(path): (is_dir, element) for (path, is_dir, element) in parse_responses(response.getvalue(), self.webdav.root)}
+            for remote_path in paths:
+                urn = Urn(remote_path)
+                is_dir, element = resources.get(key(urn.path()), (False, None))
+                if urn.is_dir() and not is_dir:
+                    continue
+                found[remote_path] = element
+
+        return found
+
+    def find(self, remote_path=root, predicate=None, kind=None, min_size=None, max_size=None, modified_since=None,
+             name=None, properties=None, jobs=None):
+
+        urn = Urn(remote_path, directory=True)
+        properties = properties or list()
+        since = int(timestamp(modified_since)) if modified_since is not None else None
+
+        tags = ["{DAV:}resourcetype", "{DAV:}getcontentlength", "{DAV:}getlastmodified"]
+        tags.extend(property_tag(option) for option in properties)
+
+        conditions = list()
+        if kind == 'file':
+            conditions.append(('not', None, None))
+        elif kind == 'directory':
+            conditions.append(('is-collection', None, None))
+        if min_size is not None:
+            conditions.append(('gte', "{DAV:}getcontentlength", str(min_size)))
+        if max_size is not None:
+            conditions.append(('lte', "{DAV:}getcontentlength", str(max_size)))
+        if since is not None:
+            conditions.append(('gte', "{DAV:}getlastmodified", formatdate(since, usegmt=True)))
+        for option in properties:
+            if 'value' in option:
+                conditions.append(('eq', property_tag(option), option['value']))
+
+        def entry(response, path, is_dir):
+
+            size = response.findtext("{DAV:}propstat/{DAV:}prop/{DAV:}getcontentlength")
+            return {
+                'path': path,
+                'name': Urn(path).filename().rstrip(Urn.separate),
+                'is_dir': is_dir,
+                'size': int(size) if size else None,
+                'modified': response.findtext("{DAV:}propstat/{DAV:}prop/{DAV:}getlastmodified"),
+                'properties': parse_properties(response, properties)
+            }
+
+        def accept(entry):
+
+            if kind is not None and entry['is_dir'] != (kind == 'directory'):
+                return False
+            if min_size is not None and (entry['size'] is None or entry['size'] < min_size):
+                return False
+            if max_size is not None and (entry['size'] is None or entry['size'] > max_size):
+                return False
+            if since is not None:
+                modified = parsedate_tz(entry['modified'] or "")
+                if modified is None or mktime_tz(modified) < since:
+                    return False
+            if name is not None and not fnmatchcase(entry['name'], name):
+                return False
+            for (option, value) in zip(properties, entry['properties']):
+                if 'value' in option and value != option['value']:
+                    return False
+            return predicate is None or predicate(entry)
+
+        def search_body():
+
+            root = etree.Element("{DAV:}searchrequest", nsmap={'d': "DAV:"})
+            search = etree.SubElement(root, "{DAV:}basicsearch")
+            prop = etree.SubElement(etree.SubElement(search, "{DAV:}select"), "{DAV:}prop")
+            for tag in tags:
+                etree.SubElement(prop, tag)
+            scope = etree.SubElement(etree.SubElement(search, "{DAV:}from"), "{DAV:}scope")
+            etree.SubElement(scope, "{DAV:}href").text = "{root}{path}".format(root=self.webdav.root, path=urn.quote())
+            etree.SubElement(scope, "{DAV:}depth").text = "infinity"
+            if conditions:
+                where = etree.SubElement(search, "{DAV:}where")
+                if len(conditions) > 1:
+                    where = etree.SubElement(where, "{DAV:}and")
+                for (operator, tag, literal) in conditions:
+                    if operator == 'not':
+                        etree.SubElement(etree.SubElement(where, "{DAV:}not"), "{DAV:}is-collection")
+                    elif operator == 'is-collection':
+                        etree.SubElement(where, "{DAV:}is-collection")
+                    else:
+                        node = etree.SubElement(where, "{{DAV:}}{operator}".format(operator=operator))
+                        etree.SubElement(etree.SubElement(node, "{DAV:}prop"), tag)
+                        etree.SubElement(node, "{DAV:}literal").text = literal
+            return etree.tostring(root)
+
+        def propfind_body():
+
+            root = etree.Element("{DAV:}propfind", nsmap={'d': "DAV:"})
+            prop = etree.SubElement(root, "{DAV:}prop")
+            for tag in tags:
+                etree.SubElement(prop, tag)
+            return etree.tostring(root)
+
+        bodies = {'search': search_body, 'find': propfind_body, 'crawl': propfind_body}
+
+        if self.dasl is None:
+            self.dasl = self._supports_search(urn)
+
+        pending = deque([('search' if self.dasl else 'find', urn.path())])
+        streams = dict()
+        prefix = unquote(self.webdav.root)
+
+        def requests():
+
+            if not pending:
+                return None
+
+            method, path = pending.popleft()
+            stream = ResponseStream()
+
+            options = {
+                'URL': self.base_url + Urn(path, directory=True).quote(),
+                'CUSTOMREQUEST': Client.requests[method],
+                'HTTPHEADER': self.get_header(method),
+                'POSTFIELDS': bodies[method](),
+                'WRITEFUNCTION': stream.write,
+                'NOBODY': 0
+            }
+
+            request = self.Request(options=options)
+            streams[request] = (method, path, stream)
+            return (method, path, stream), request
+
+        def drain(method, path, stream):
+
+            for response in stream.read():
+                resource_path, is_dir = parse_response(response, prefix)
+                if resource_path == path or resource_path == path.rstrip(Urn.separate):
+                    continue
+                if method == 'crawl' and is_dir:
+                    pending.append(('crawl', resource_path))
+                item = entry(response, resource_path, is_dir)
+                if accept(item):
+                    yield item
+
+        for (key, request, error) in self.perform_many(requests, jobs, ticks=True):
+            if request is None:
+                for item in list(streams.values()):
+                    for found in drain(*item):
+                        yield found
+                continue
+
+            del streams[request]
+            method, path, stream = key
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if error is not None:
+                raise NotConnection(self.webdav.hostname+" : "+repr(error))
+            if code == 404:
+                raise RemoteResourceNotFound(path)
+
+            if code != 207:
+                # servers may refuse SEARCH or Depth: infinity; step down to the next strategy
+                if method == 'search':
+                    self.dasl = False
+                    pending.append(('find', path))
+                elif method == 'find':
+                    pending.append(('crawl', path))
+                else:
+                    raise UnhandledError()
+                continue
+
+            for found in drain(method, path, stream):
+                yield found
+
+    def _supports_search(self, urn):
+
+        headers = list()
+
+        options = {
+            'URL': self.base_url + urn.quote(),
+            'CUSTOMREQUEST': Client.requests['options'],
+            'HTTPHEADER': self.get_header('options'),
+            'HEADERFUNCTION': headers.append,
+            'NOBODY': 1
+        }
 
-        def parse(response, option):
+        try:
+            request = self.Request(options=options)
+            self.perform(request)
+            self.release(request)
+        except pycurl.error as e:
+            raise NotConnection(self.webdav.hostname+" : "+repr(e))
 
-            response_str = response.getvalue()
-            tree = etree.fromstring(response_str)
-            xpath = "{xpath_prefix}{xpath_exp}".format(xpath_prefix=".//", xpath_exp=option['name'])
-            return tree.findtext(xpath)
+        for line in headers:
+            key, _, value = line.decode('latin-1').partition(":")
+            if key.strip().lower() == "dasl" and "basicsearch" in value.lower():
+                return True
+        return False
+
+    def changes(self, remote_path=root, since=None, jobs=None):
 
-        def data(option):
+        def data():
 
             root = etree.Element("propfind", xmlns="DAV:")
             prop = etree.SubElement(root, "prop")
-            etree.SubElement(prop, option.get('name', ""), xmlns=option.get('namespace', ""))
+            etree.SubElement(prop, "resourcetype")
+            for option in tag_options:
+                etree.SubElement(prop, property_tag(option))
             tree = etree.ElementTree(root)
-
             buff = BytesIO()
-
             tree.write(buff)
             return buff.getvalue()
 
-        try:
-            urn = Urn(remote_path)
+        urn = Urn(remote_path, directory=True)
+        root = urn.path()
+        if since is not None and since.get('path') != root:
+            raise OptionNotValid(name="since", value=since.get('path'))
 
-            if not self.check(urn.path()):
-                raise RemoteResourceNotFound(urn.path())
+        previous = since['collections'] if since is not None else dict()
+        body = data()
+
+        def propfind(path, method):
+
+            response = BytesIO()
+
+            options = {
+                'URL': self.base_url + Urn(path, directory=True).quote(),
+                'CUSTOMREQUEST': Client.requests[method],
+                'HTTPHEADER': self.get_header(method),
+                'POSTFIELDS': body,
+                'WRITEDATA': response,
+                'NOBODY': 0
+            }
+
+            return (path, response), self.Request(options=options)
+
+        # the tag of the root collection alone tells whether anything below it changed
+        if since is not None and since['tag'] is not None:
+            (_, response), request = propfind(root, 'get_metadata')
+            try:
+                self.perform(request)
+            except pycurl.error as e:
+                raise NotConnection(self.webdav.hostname+" : "+repr(e))
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if code == 404:
+                raise RemoteResourceNotFound(root)
+
+            for (resource_path, is_dir, element) in parse_responses(response.getvalue(), self.webdav.root):
+                if is_dir and resource_tag(element, is_dir) == since['tag']:
+                    return {'added': [], 'modified': [], 'deleted': []}, since
+
+        collections = dict()
+        added, modified, deleted = list(), list(), list()
+        pending = deque([root])
+        tag = None
+
+        def keep(path):
+
+            if path not in previous:
+                pending.append(path)
+                return
+            collections[path] = previous[path]
+            for child in previous[path][1]:
+                if child.endswith(Urn.separate):
+                    keep(child)
+
+        def requests():
+
+            if not pending:
+                return None
+            return propfind(pending.popleft(), 'crawl')
+
+        for ((path, response), request, error) in self.perform_many(requests, jobs):
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
+
+            if error is not None:
+                raise NotConnection(self.webdav.hostname+" : "+repr(error))
+            if code == 404:
+                if path == root:
+                    raise RemoteResourceNotFound(root)
+                continue
+
+            old = previous.get(path, (None, dict()))[1]
+            children = dict()
+            for (resource_path, is_dir, element) in parse_responses(response.getvalue(), self.webdav.root):
+                if resource_path == path or resource_path == path.rstrip(Urn.separate):
+                    if path == root:
+                        tag = resource_tag(element, is_dir)
+                    collections[path] = [resource_tag(element, is_dir), children]
+                    continue
+
+                children[resource_path] = child_tag = resource_tag(element, is_dir)
+                if resource_path not in old:
+                    added.append(resource_path)
+                    if is_dir:
+                        pending.append(resource_path)
+                elif child_tag is None or child_tag != old[resource_path]:
+                    if is_dir:
+                        pending.append(resource_path)
+                    else:
+                        modified.append(resource_path)
+                elif is_dir:
+                    keep(resource_path)
+
+            deleted.extend(child for child in old if child not in children)
+            if path not in collections:
+                collections[path] = [None, children]
+
+        state = {'path': root, 'tag': tag, 'collections': collections}
+        return {'added': sorted(added), 'modified': sorted(modified), 'deleted': sorted(deleted)}, state
+
+    def snapshot(self, remote_path=root, jobs=None):
+
+        urn = Urn(remote_path, directory=True)
+        tree = Snapshot()
+        # only collections are looked up by path, and only while their members are being listed
+        ids = {urn.path(): 0}
+
+        for (path, is_dir, response) in self._crawl(urn, jobs):
+            parent, _, name = path.rstrip(Urn.separate).rpartition(Urn.separate)
+            index = tree.add(ids[parent + Urn.separate], name, DIRECTORY if is_dir else FILE,
+                             size=parse_size(response), mtime=parse_modified(response),
+                             tag=response.findtext(".//{DAV:}getetag"))
+            if is_dir:
+                ids[path] = index
+
+        return tree
+
+    def resource(self, remote_path):
+
+        urn = Urn(remote_path)
+        return Resource(self, urn)
+
+    def get_property(self, remote_path, option):
+        return self.get_properties(remote_path, [option])[0]
+
+    def get_properties(self, remote_path, options):
+
+        values = self.get_properties_many([remote_path], options)[remote_path]
+        if values is None:
+            raise RemoteResourceNotFound(Urn(remote_path).path())
+        return values
+
+    def get_properties_many(self, remote_paths, options, jobs=None):
+
+        def data(options):
+
+            root = etree.Element("{DAV:}propfind", nsmap={'d': "DAV:"})
+            prop = etree.SubElement(root, "{DAV:}prop")
+            for option in options:
+                etree.SubElement(prop, property_tag(option))
+            return etree.tostring(root)
 
+        body = data(options)
+
+        def propfind(remote_path):
+
+            urn = Urn(remote_path)
             response = BytesIO()
 
-            url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': urn.quote()}
             options = {
-                'URL': "{hostname}{root}{path}".format(**url),
+                'URL': self.base_url + urn.quote(),
                 'CUSTOMREQUEST': Client.requests['get_metadata'],
                 'HTTPHEADER': self.get_header('get_metadata'),
-                'POSTFIELDS': data(option),
+                'POSTFIELDS': body,
                 'WRITEDATA': response,
                 'NOBODY': 0
             }
 
-            request = self.Request(options=options)
+            return (remote_path, response), self.Request(options=options)
 
-            request.perform()
-            request.close()
+        values = dict.fromkeys(remote_paths)
 
-            return parse(response, option)
+        for ((remote_path, response), request, error) in self.perform_many((propfind(path) for path in values), jobs):
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
 
-        except pycurl.error as e:
-            raise NotConnection(self.webdav.hostname+" : "+repr(e))
+            if error is not None:
+                raise NotConnection(self.webdav.hostname+" : "+repr(error))
+            if code == 404:
+                continue
+
+            responses = parse_responses(response.getvalue(), self.webdav.root)
+            if not responses:
+                raise MethodNotSupported(name="get_property", server=self.webdav.hostname)
+            values[remote_path] = parse_properties(responses[0][2], options)
+
+        return values
 
     def set_property(self, remote_path, option):
+        self.set_properties(remote_path, [option])
 
-        def data(option):
+    def set_properties(self, remote_path, options):
+        self.set_properties_many({remote_path: options})
 
-            root_node = etree.Element("propertyupdate", xmlns="DAV:")
-            root_node.set('xmlns:u', option.get('namespace', ""))
-            set_node = etree.SubElement(root_node, "set")
-            prop_node = etree.SubElement(set_node, "prop")
-            opt_node = etree.SubElement(prop_node, "{namespace}:{name}".format(namespace='u', name=option['name']))
-            opt_node.text = option.get('value', "")
+    def set_properties_many(self, properties, jobs=None):
 
-            tree = etree.ElementTree(root_node)
+        def data(options):
 
-            buff = BytesIO()
-            tree.write(buff)
+            root = etree.Element("{DAV:}propertyupdate", nsmap={'d': "DAV:"})
+            prop = etree.SubElement(etree.SubElement(root, "{DAV:}set"), "{DAV:}prop")
+            for option in options:
+                etree.SubElement(prop, property_tag(option)).text = option.get('value', "")
+            return etree.tostring(root)
 
-            return buff.getvalue()
+        def proppatch(remote_path, options):
 
-        try:
             urn = Urn(remote_path)
+            response = BytesIO()
 
-            if not self.check(urn.path()):
-                raise RemoteResourceNotFound(urn.path())
-
-            url = {'hostname': self.webdav.hostname, 'root': self.webdav.root, 'path': urn.quote()}
             options = {
-                'URL': "{hostname}{root}{path}".format(**url),
+                'URL': self.base_url + urn.quote(),
                 'CUSTOMREQUEST': Client.requests['set_metadata'],
-                'HTTPHEADER': self.get_header('get_metadata'),
-                'POSTFIELDS': data(option)
+                'HTTPHEADER': self.get_header('set_metadata'),
+                'POSTFIELDS': data(options),
+                'WRITEDATA': response,
+                'NOBODY': 0
             }
 
-            request = self.Request(options=options)
+            return (urn, response), self.Request(options=options)
 
-            request.perform()
-            request.close()
+        requests = (proppatch(remote_path, options) for (remote_path, options) in properties.items())
 
-        except pycurl.error as e:
-            raise NotConnection(self.webdav.hostname+" : "+repr(e))
+        for ((urn, response), request, error) in self.perform_many(requests, jobs):
+            code = int(request.getinfo(pycurl.HTTP_CODE))
+            self.release(request)
 
-    def push(self, remote_directory, local_directory):
+            if error is not None:
+                raise NotConnection(self.webdav.hostname+" : "+repr(error))
+            if code == 404:
+                raise RemoteResourceNotFound(urn.path())
+            if code < 200 or code >= 400:
+                raise UnhandledError()
+
+            for (_, _, element) in parse_responses(response.getvalue(), self.webdav.root):
+                if not all(successful(propstat) for propstat in element.findall("{DAV:}propstat")):
+                    raise UnhandledError()
 
-        def prune(src, exp):
-            return [sub(exp, "", item) for item in src]
+    @traced('push')
+    def push(self, remote_directory, local_directory, progress=None, jobs=None, bwlimit=None, checksums=None):
 
         urn = Urn(remote_directory, directory=True)
 
@@ -995,9 +3261,22 @@ class Client(object):
         if not os.path.exists(local_directory):
             raise LocalResourceNotFound(local_directory)
 
-        paths = self.list(urn.path())
-        expression = "{begin}{end}".format(begin="^", end=urn.path())
-        remote_resource_names = prune(paths, expression)
+        if jobs is None and checksums is None:
+            self._push(urn, local_directory, self.list(urn.path()), progress)
+            return
+
+        local_directories, local_files = local_tree(local_directory, urn)
+        remote_directories, remote_files = self._walk(urn, jobs, descend=set(local_directories).__contains__)
+
+        remote_directories = set(remote_directories)
+        remote_files = set(path for (path, size) in remote_files)
+
+        self.makedirs_many([path for path in local_directories if path not in remote_directories], jobs)
+        if checksums is None:
+            local_files = [(remote_path, local_path) for (remote_path, local_path) in local_files if remote_path not in remote_files]
+        self.upload_files(local_files, jobs=jobs, bwlimit=bwlimit, progress=progress, checksums=checksums)
+
+    def _push(self, urn, local_directory, remote_resource_names, progress=None):
 
         for local_resource_name in listdir(local_directory):
 
@@ -1005,18 +3284,123 @@ class Client(object):
             remote_path = "{remote_directory}{resource_name}".format(remote_directory=urn.path(), resource_name=local_resource_name)
 
             if os.path.isdir(local_path):
-                if not self.check(remote_path=remote_path):
+                remote_urn = Urn(remote_path, directory=True)
+                if local_resource_name in remote_resource_names:
+                    self._push(remote_urn, local_path, self.list(remote_urn.path()), progress)
+                else:
                     self.mkdir(remote_path=remote_path)
-                self.push(remote_directory=remote_path, local_directory=local_path)
+                    self._push(remote_urn, local_path, list(), progress)
             else:
                 if local_resource_name in remote_resource_names:
                     continue
-                self.upload_file(remote_path=remote_path, local_path=local_path)
+                self.upload_file(remote_path=remote_path, local_path=local_path, progress=progress)
+
+    def watch_push(self, local_directory, remote_directory, jobs=None, delay=None, stop=None, callback=None):
+
+        urn = Urn(remote_directory, directory=True)
+
+        if not os.path.isdir(local_directory):
+            raise OptionNotValid(name="local_path", value=local_directory)
+
+        local_directory = os.path.abspath(local_directory)
+        delay = Client.watch_delay if delay is None else delay
+        jobs = jobs or self.jobs
+        watcher = inotify.Inotify()
+
+        def remote(local_path, is_dir):
+            relative = os.path.relpath(local_path, local_directory).replace(os.path.sep, Urn.separate)
+            return "{parent}{relative}{sep}".format(parent=urn.path(), relative=relative, sep=Urn.separate if is_dir else "")
+
+        try:
+            # watches are set up before the first push so that nothing changed in between is missed
+            watcher.add_tree(local_directory)
+            self.makedirs(urn.path())
+            self.push(remote_directory=urn.path(), local_directory=local_directory, jobs=jobs)
+
+            batch, started = WatchBatch(), None
+            while stop is None or not stop.is_set():
+                events = watcher.read(delay)
+
+                for event in events:
+                    if event.mask & inotify.IN_Q_OVERFLOW:
+                        watcher.add_tree(local_directory)
+                        batch.rescan = True
+                        continue
+
+                    is_dir = bool(event.mask & inotify.IN_ISDIR)
+                    remote_path = remote(event.path, is_dir)
+
+                    if event.mask & inotify.IN_MOVED_FROM:
+                        batch.sources[event.cookie] = (remote_path, event.path, is_dir)
+                    elif event.mask & inotify.IN_MOVED_TO and event.cookie in batch.sources:
+                        source, local_source, _ = batch.sources.pop(event.cookie)
+                        if is_dir:
+                            watcher.moved(local_source, event.path)
+                        batch.move(source, remote_path, event.path)
+                    elif is_dir and event.mask & (inotify.IN_CREATE | inotify.IN_MOVED_TO):
+                        watcher.add_tree(event.path)
+                        batch.create(remote_path, event.path)
+                    elif event.mask & (inotify.IN_CLOSE_WRITE | inotify.IN_MOVED_TO):
+                        batch.put(remote_path, event.path)
+                    elif event.mask & inotify.IN_DELETE:
+                        batch.delete(remote_path)
+
+                if not len(batch):
+                    continue
+                if started is None:
+                    started = time.time()
+                # changes are sent once things calm down, or after watch_limit while they keep coming
+                if events and time.time() - started < Client.watch_limit:
+                    continue
 
-    def pull(self, remote_directory, local_directory):
+                # what was moved out of the tree is gone for the server
+                for (source, local_source, is_dir) in batch.sources.values():
+                    if is_dir:
+                        watcher.remove(local_source)
+                    batch.delete(source)
+                batch.sources.clear()
+
+                try:
+                    self._push_batch(batch, urn, local_directory, jobs)
+                except (NotConnection, LocalResourceNotFound):
+                    # the batch is sent again together with whatever changes next
+                    continue
 
-        def prune(src, exp):
-            return [sub(exp, "", item) for item in src]
+                if callback:
+                    callback(batch)
+                batch, started = WatchBatch(), None
+        finally:
+            watcher.close()
+
+    def _push_batch(self, batch, urn, local_directory, jobs=None):
+
+        if batch.rescan:
+            self.push(remote_directory=urn.path(), local_directory=local_directory, jobs=jobs)
+            batch.rescan = False
+
+        # deletes, moves, new directories and then files: every step finds what the previous ones left
+        for error in self.clean_many(sorted(batch.deletes), jobs).values():
+            if error is not None and not isinstance(error, RemoteResourceNotFound):
+                raise error
+
+        for wave in waves(batch.moves):
+            results = self.move_many([(source, target) for (source, target, _) in wave], jobs=jobs)
+            for (source, target, local_path) in wave:
+                error = results[(source, target)]
+                if isinstance(error, RemoteParentNotFound):
+                    self.makedirs(Urn(target).parent())
+                    error = self.move_many([(source, target)])[(source, target)]
+                if isinstance(error, RemoteResourceNotFound):
+                    batch.create(target, local_path)
+                elif error is not None:
+                    raise error
+
+        self.makedirs_many(sorted(batch.directories), jobs)
+        files = [(remote_path, local_path) for (remote_path, local_path) in sorted(batch.files.items()) if os.path.isfile(local_path)]
+        self.upload_files(files, jobs=jobs)
+
+    @traced('pull')
+    def pull(self, remote_directory, local_directory, progress=None, jobs=None, segment_size=None, bwlimit=None):
 
         urn = Urn(remote_directory, directory=True)
 
@@ -1026,28 +3410,41 @@ class Client(object):
         if not os.path.exists(local_directory):
             raise LocalResourceNotFound(local_directory)
 
-        local_resource_names = listdir(local_directory)
+        if jobs is None:
+            self._pull(urn, local_directory, progress)
+            return
+
+        directories, files = self._walk(urn, jobs)
+        for directory in directories:
+            local_path = local_path_of(directory, urn, local_directory)
+            if not os.path.exists(local_path):
+                os.makedirs(local_path)
+
+        files = [(path, local_path_of(path, urn, local_directory), size) for (path, size) in files]
+        files = [item for item in files if not os.path.exists(item[1])]
+        self.download_files(files, jobs=jobs, segment_size=segment_size, bwlimit=bwlimit, progress=progress)
 
-        paths = self.list(urn.path())
-        expression = "{begin}{end}".format(begin="^", end=remote_directory)
-        remote_resource_names = prune(paths, expression)
+    def _pull(self, urn, local_directory, progress=None):
+
+        local_resource_names = listdir(local_directory)
 
-        for remote_resource_name in remote_resource_names:
+        for remote_resource_name in self.list(urn.path()):
 
             local_path = os.path.join(local_directory, remote_resource_name)
             remote_path = "{remote_directory}{resource_name}".format(remote_directory=urn.path(), resource_name=remote_resource_name)
 
             remote_urn = Urn(remote_path)
 
-            if self.is_dir(remote_urn.path()):
+            if remote_urn.is_dir():
                 if not os.path.exists(local_path):
                     os.mkdir(local_path)
-                self.pull(remote_directory=remote_path, local_directory=local_path)
+                self._pull(remote_urn, local_path, progress)
             else:
                 if remote_resource_name in local_resource_names:
                     continue
-                self.download_file(remote_path=remote_path, local_path=local_path)
+                self.download_file(remote_path=remote_path, local_path=local_path, progress=progress)
 
+    @traced('sync')
     def sync(self, remote_directory, local_directory):
 
         self.pull(remote_directory=remote_directory, local_directory=local_directory)
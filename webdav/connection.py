@@ -21,7 +21,8 @@ class WebDAVSettings(ConnectionSettings):
 
     ns = "webdav:"
     prefix = "webdav_"
-    keys = {'hostname', 'login', 'password', 'token', 'root', 'cert_path', 'key_path', 'recv_speed', 'send_speed', 'verbose', 'conn_timeout'}
+    keys = {'hostname', 'login', 'password', 'token', 'root', 'cert_path', 'key_path', 'recv_speed', 'send_speed', 'verbose', 'conn_timeout', 'http2',
+            'replicas', 'balance'}
 
     def __init__(self, options):
 
@@ -35,11 +36,24 @@ class WebDAVSettings(ConnectionSettings):
         self.root = Urn(self.root).quote() if self.root else ''
         self.root = self.root.rstrip(Urn.separate)
 
+        replicas = self.replicas or []
+        if hasattr(replicas, 'split'):
+            replicas = replicas.split(",")
+        self.replicas = [replica.strip() for replica in replicas if replica.strip()]
+
+        # values from wdc or a config file arrive as strings
+        if hasattr(self.http2, 'lower'):
+            self.http2 = self.http2.strip().lower() in ('1', 'true', 'yes', 'on')
+        self.http2 = bool(self.http2)
+
     def is_valid(self):
 
         if not self.hostname:
             raise OptionNotValid(name="hostname", value=self.hostname, ns=self.ns)
 
+        if self.balance and self.balance not in ('outstanding', 'latency'):
+            raise OptionNotValid(name="balance", value=self.balance, ns=self.ns)
+
         if self.cert_path and not exists(self.cert_path):
             raise OptionNotValid(name="cert_path", value=self.cert_path, ns=self.ns)
 
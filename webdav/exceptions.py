@@ -51,6 +51,22 @@ class RemoteParentNotFound(NotFound):
         return "Remote parent for: {path} not found".format(path=self.path)
 
 
+class RemoteResourceExists(WebDavException):
+    def __init__(self, path):
+        self.path = path
+
+    def __str__(self):
+        return "Remote resource: {path} already exists".format(path=self.path)
+
+
+class ChecksumMismatch(WebDavException):
+    def __init__(self, path):
+        self.path = path
+
+    def __str__(self):
+        return "Remote resource: {path} does not match the local checksum".format(path=self.path)
+
+
 class MethodNotSupported(WebDavException):
     def __init__(self, name, server):
         self.name = name
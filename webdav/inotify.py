@@ -0,0 +1,120 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+from collections import namedtuple
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+Event = namedtuple('Event', 'path mask cookie')
+
+header = struct.Struct("iIII")
+
+encode = getattr(os, 'fsencode', lambda path: path)
+decode = getattr(os, 'fsdecode', lambda path: path)
+
+try:
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    libc.inotify_init1
+except (OSError, AttributeError):
+    libc = None
+
+
+class Inotify(object):
+
+    mask = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+    buffer_size = 64 * 1024
+
+    def __init__(self):
+
+        if libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+
+        self.paths = dict()
+        self.watches = dict()
+
+    def add(self, path):
+
+        wd = libc.inotify_add_watch(self.fd, encode(path), self.mask)
+        if wd < 0:
+            code = ctypes.get_errno()
+            # a directory gone before it could be watched has nothing left to report
+            if code in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(code, "inotify_add_watch", path)
+
+        self.paths[wd] = path
+        self.watches[path] = wd
+
+    def add_tree(self, path):
+
+        for (directory, _, _) in os.walk(path):
+            self.add(directory)
+
+    def remove(self, path):
+
+        for (watched, wd) in list(self.watches.items()):
+            if watched == path or watched.startswith(path + os.sep):
+                libc.inotify_rm_watch(self.fd, wd)
+                del self.watches[watched]
+                self.paths.pop(wd, None)
+
+    def moved(self, source, target):
+
+        # watches follow a moved directory, only the paths they stand for change
+        for (path, wd) in list(self.watches.items()):
+            if path == source or path.startswith(source + os.sep):
+                del self.watches[path]
+                path = target + path[len(source):]
+                self.paths[wd] = path
+                self.watches[path] = wd
+
+    def read(self, timeout=None):
+
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return list()
+
+        data = os.read(self.fd, Inotify.buffer_size)
+        events, offset = list(), 0
+
+        while offset < len(data):
+            wd, mask, cookie, length = header.unpack_from(data, offset)
+            offset += header.size
+            name = decode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_IGNORED:
+                path = self.paths.pop(wd, None)
+                if self.watches.get(path) == wd:
+                    del self.watches[path]
+                continue
+
+            directory = self.paths.get(wd)
+            if directory is None and not mask & IN_Q_OVERFLOW:
+                continue
+            path = os.path.join(directory, name) if name else directory
+            events.append(Event(path, mask, cookie))
+
+        return events
+
+    def close(self):
+
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
@@ -0,0 +1,219 @@
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from collections import namedtuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+FILE = 0
+DIRECTORY = 1
+
+# widest first, so that every column of a saved snapshot stays aligned
+columns = (('key', 'Q'), ('tag', 'Q'), ('size', 'q'), ('mtime', 'd'), ('parent', 'i'), ('name', 'i'), ('kind', 'b'))
+codes = dict(columns)
+compared = ('kind', 'size', 'mtime', 'tag')
+
+# columns are written in the byte order of the machine, the header follows it
+header = struct.Struct("=8sQQQ")
+magic = b"WDSNAP2\0"
+multiplier = 0x100000001b3
+mask = 0xffffffffffffffff
+
+Diff = namedtuple('Diff', 'added removed changed')
+
+
+def digest(value):
+    return struct.unpack("<Q", hashlib.sha1(value.encode('utf-8', 'surrogateescape')).digest()[:8])[0]
+
+
+def aligned(offset):
+    return (offset + 7) & ~7
+
+
+def mapped(buffer, offset, code, count):
+
+    if numpy is not None:
+        return numpy.frombuffer(buffer, dtype=code, count=count, offset=offset)
+    return memoryview(buffer)[offset:offset + count * array(code).itemsize].cast(code)
+
+
+class Snapshot(object):
+
+    def __init__(self):
+
+        # names are packed into one UTF-8 blob, name i is blob[offsets[i]:offsets[i + 1]]
+        self.blob = bytearray()
+        self.offsets = array('Q', [0])
+        self.name_ids = dict()
+        self.name_keys = array('Q')
+        self.columns = {name: array(code) for (name, code) in columns}
+        self.buffer = None
+        self.add(-1, "", DIRECTORY)
+
+    def __len__(self):
+        return len(self.columns['kind'])
+
+    def intern(self, name):
+
+        index = self.name_ids.get(name)
+        if index is None:
+            index = self.name_ids[name] = len(self.name_keys)
+            self.blob += name.encode('utf-8', 'surrogateescape')
+            self.offsets.append(len(self.blob))
+            self.name_keys.append(digest(name))
+        return index
+
+    def name(self, index):
+
+        return str(self.blob[int(self.offsets[index]):int(self.offsets[index + 1])], 'utf-8', 'surrogateescape')
+
+    def add(self, parent, name, kind=FILE, size=None, mtime=None, tag=None):
+
+        if self.buffer is not None:
+            raise TypeError("a loaded snapshot is read-only")
+
+        name = self.intern(name)
+        columns = self.columns
+        # the key of an entry stands for its whole path, so that two snapshots line up without building paths
+        key = 0 if parent < 0 else ((columns['key'][parent] ^ self.name_keys[name]) * multiplier) & mask
+
+        columns['key'].append(key)
+        columns['tag'].append(digest(tag) if tag else 0)
+        columns['size'].append(-1 if size is None else size)
+        columns['mtime'].append(mtime or 0)
+        columns['parent'].append(parent)
+        columns['name'].append(name)
+        columns['kind'].append(kind)
+        return len(columns['kind']) - 1
+
+    def path(self, index):
+
+        parent, name, kind = self.columns['parent'], self.columns['name'], self.columns['kind']
+        parts = list()
+        suffix = "/" if kind[index] == DIRECTORY and index else ""
+        while index > 0:
+            parts.append(self.name(name[index]))
+            index = parent[index]
+        return "/".join(reversed(parts)) + suffix
+
+    @classmethod
+    def local(cls, directory):
+
+        snapshot = cls()
+        stack = [(os.path.expanduser(directory), 0)]
+        while stack:
+            path, parent = stack.pop()
+            for name in sorted(os.listdir(path)):
+                local_path = os.path.join(path, name)
+                stat = os.lstat(local_path)
+                if os.path.isdir(local_path) and not os.path.islink(local_path):
+                    stack.append((local_path, snapshot.add(parent, name, DIRECTORY, mtime=stat.st_mtime)))
+                else:
+                    snapshot.add(parent, name, FILE, size=stat.st_size, mtime=stat.st_mtime)
+        return snapshot
+
+    def save(self, path):
+
+        path = os.path.expanduser(path)
+        temporary = "{path}.tmp".format(path=path)
+        with open(temporary, 'wb') as f:
+            f.write(header.pack(magic, len(self), len(self.offsets) - 1, len(self.blob)))
+            for values in [self.columns[name] for (name, _) in columns] + [self.offsets]:
+                f.write(b"\0" * (aligned(f.tell()) - f.tell()))
+                f.write(values)
+            f.write(self.blob)
+        try:
+            os.replace(temporary, path)
+        except AttributeError:
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+
+        snapshot = cls.__new__(cls)
+        with open(os.path.expanduser(path), 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        found, count, names, blob_size = header.unpack_from(buffer, 0)
+        if found != magic:
+            raise ValueError("not a snapshot: {path}".format(path=path))
+
+        # columns and names are views of the mapped file, pages are only read when they are used
+        offset, snapshot.columns = header.size, dict()
+        for (name, code) in columns:
+            offset = aligned(offset)
+            snapshot.columns[name] = mapped(buffer, offset, code, count)
+            offset += count * array(code).itemsize
+
+        offset = aligned(offset)
+        snapshot.offsets = mapped(buffer, offset, 'Q', names + 1)
+        offset += (names + 1) * array('Q').itemsize
+        snapshot.blob = memoryview(buffer)[offset:offset + blob_size]
+        snapshot.name_ids = None
+        snapshot.name_keys = None
+        snapshot.buffer = buffer
+        return snapshot
+
+    def close(self):
+
+        if self.buffer is not None:
+            for values in list(self.columns.values()) + [self.offsets, self.blob]:
+                if isinstance(values, memoryview):
+                    values.release()
+            self.columns, self.offsets, self.blob = dict(), None, None
+            self.buffer.close()
+
+
+def vector(snapshot, name):
+
+    values = snapshot.columns[name]
+    return values if isinstance(values, numpy.ndarray) else numpy.frombuffer(values, dtype=codes[name])
+
+
+def matches(old, new):
+
+    if numpy is not None:
+        old_keys, new_keys = vector(old, 'key'), vector(new, 'key')
+        order = numpy.argsort(old_keys, kind='stable')
+        positions = numpy.searchsorted(old_keys[order], new_keys).clip(0, len(order) - 1)
+        found = old_keys[order[positions]] == new_keys
+        return order[positions[found]], numpy.nonzero(found)[0]
+
+    index = dict((key, position) for (position, key) in enumerate(old.columns['key']))
+    pairs = [(index[key], position) for (position, key) in enumerate(new.columns['key']) if key in index]
+    return [pair[0] for pair in pairs], [pair[1] for pair in pairs]
+
+
+def diff(old, new, compare=compared):
+
+    old_matched, new_matched = matches(old, new)
+
+    if numpy is not None:
+        present = numpy.zeros(len(old), dtype=bool)
+        present[old_matched] = True
+        removed = numpy.nonzero(~present)[0]
+        present = numpy.zeros(len(new), dtype=bool)
+        present[new_matched] = True
+        added = numpy.nonzero(~present)[0]
+        different = numpy.zeros(len(new_matched), dtype=bool)
+        for name in compare:
+            different |= vector(old, name)[old_matched] != vector(new, name)[new_matched]
+        changed = new_matched[different]
+    else:
+        old_set, new_set = set(old_matched), set(new_matched)
+        removed = [position for position in range(len(old)) if position not in old_set]
+        added = [position for position in range(len(new)) if position not in new_set]
+        changed = [position for (old_position, position) in zip(old_matched, new_matched)
+                   if any(old.columns[name][old_position] != new.columns[name][position] for name in compare)]
+
+    # the roots of both snapshots always match, whatever their own properties
+    return Diff(added=[new.path(index) for index in added],
+                removed=[old.path(index) for index in removed],
+                changed=[new.path(index) for index in changed if index])
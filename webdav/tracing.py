@@ -0,0 +1,81 @@
+import pycurl
+from functools import wraps
+
+timing_info = {
+    'webdav.time.namelookup': pycurl.NAMELOOKUP_TIME,
+    'webdav.time.connect': pycurl.CONNECT_TIME,
+    'webdav.time.appconnect': pycurl.APPCONNECT_TIME,
+    'webdav.time.pretransfer': pycurl.PRETRANSFER_TIME,
+    'webdav.time.starttransfer': pycurl.STARTTRANSFER_TIME,
+    'webdav.time.total': pycurl.TOTAL_TIME,
+    'webdav.connects': pycurl.NUM_CONNECTS,
+    'webdav.http_version': pycurl.INFO_HTTP_VERSION,
+    'http.request_content_length': getattr(pycurl, 'SIZE_UPLOAD_T', pycurl.SIZE_UPLOAD),
+    'http.response_content_length': getattr(pycurl, 'SIZE_DOWNLOAD_T', pycurl.SIZE_DOWNLOAD),
+}
+
+
+def traced(name):
+
+    def decorator(method):
+
+        names = method.__code__.co_varnames[1:method.__code__.co_argcount]
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+
+            if self.tracer is None:
+                return method(self, *args, **kwargs)
+
+            attributes = {'webdav.operation': name, 'webdav.hostname': self.webdav.hostname}
+            for (key, value) in list(zip(names, args)) + list(kwargs.items()):
+                if isinstance(value, str):
+                    attributes["webdav.{key}".format(key=key)] = value
+
+            with self.tracer.start_as_current_span(name, attributes=attributes):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def request_method(options):
+
+    if options.get('CUSTOMREQUEST'):
+        return options['CUSTOMREQUEST']
+    if options.get('UPLOAD'):
+        return "PUT"
+    return "GET"
+
+
+def traceparent(span):
+
+    context = span.get_span_context()
+    return "traceparent: 00-{trace_id:032x}-{span_id:016x}-{flags:02x}".format(
+        trace_id=context.trace_id, span_id=context.span_id, flags=int(context.trace_flags))
+
+
+def start_request_span(tracer, options):
+
+    method = request_method(options)
+    attributes = {'http.method': method, 'http.url': options.get('URL', "")}
+    span = tracer.start_span("HTTP {method}".format(method=method), attributes=attributes)
+
+    header = list(options.get('HTTPHEADER') or [])
+    header.append(traceparent(span))
+    options['HTTPHEADER'] = header
+
+    return span
+
+
+def end_request_span(span, request, error=None):
+
+    if error is not None:
+        span.record_exception(error)
+    else:
+        span.set_attribute('http.status_code', int(request.getinfo(pycurl.HTTP_CODE)))
+        for (attribute, info) in timing_info.items():
+            span.set_attribute(attribute, request.getinfo(info))
+
+    span.end()
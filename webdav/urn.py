@@ -3,54 +3,74 @@ try:
 except ImportError:
     from urllib import unquote, quote
 
-from re import sub
+import re
+
+dots = re.compile(r"/\.+/")
+slashes = re.compile(r"/+")
+unreserved = re.compile(r"[A-Za-z0-9_.~/-]*\Z")
+
+
+def fast_quote(path):
+    return path if unreserved.match(path) else quote(path)
+
+
+def fast_unquote(path):
+    return unquote(path) if "%" in path else path
 
 
 class Urn(object):
 
     separate = "/"
+    cache_size = 100000
+    cache = dict()
+
+    __slots__ = ('_path', '_unquoted', '_parent', '_filename')
 
     def __init__(self, path, directory=False):
 
-        self._path = quote(path)
-        expressions = "/\.+/", "/+"
-        for expression in expressions:
-            self._path = sub(expression, Urn.separate, self._path)
+        # the same paths come back again and again, so their normalized forms are memoized
+        key = (path, directory)
+        try:
+            self._path, self._unquoted = Urn.cache[key]
+        except KeyError:
+            quoted = slashes.sub(Urn.separate, dots.sub(Urn.separate, fast_quote(path)))
+
+            if not quoted.startswith(Urn.separate):
+                quoted = Urn.separate + quoted
+
+            if directory and not quoted.endswith(Urn.separate):
+                quoted += Urn.separate
 
-        if not self._path.startswith(Urn.separate):
-            self._path = "{begin}{end}".format(begin=Urn.separate, end=self._path)
+            if len(Urn.cache) >= Urn.cache_size:
+                Urn.cache.clear()
+            self._path, self._unquoted = Urn.cache[key] = quoted, fast_unquote(quoted)
 
-        if directory and not self._path.endswith(Urn.separate):
-            self._path = "{begin}{end}".format(begin=self._path, end=Urn.separate)
+        self._parent = None
+        self._filename = None
 
     def __str__(self):
         return self.path()
 
     def path(self):
-        return unquote(self._path)
+        return self._unquoted
 
     def quote(self):
         return self._path
 
     def filename(self):
 
-        path_split = self._path.split(Urn.separate)
-        name = path_split[-2] + Urn.separate if path_split[-1] == '' else path_split[-1]
-        return unquote(name)
+        if self._filename is None:
+            self._filename = fast_unquote(self._path[self._path.rfind(Urn.separate, 0, -1) + 1:])
+        return self._filename
 
     def parent(self):
 
-        path_split = self._path.split(Urn.separate)
-        nesting_level = self.nesting_level()
-        parent_path_split = path_split[:nesting_level]
-        parent = self.separate.join(parent_path_split) if nesting_level != 1 else Urn.separate
-        if not parent.endswith(Urn.separate):
-            return unquote(parent + Urn.separate)
-        else:
-            return unquote(parent)
+        if self._parent is None:
+            self._parent = fast_unquote(self._path[:-1].rpartition(Urn.separate)[0] + Urn.separate)
+        return self._parent
 
     def nesting_level(self):
         return self._path.count(Urn.separate, 0, -1)
 
     def is_dir(self):
-        return self._path[-1] == Urn.separate
\ No newline at end of file
+        return self._path[-1] == Urn.separate